@@ -1,63 +1,334 @@
+import base64
+import binascii
 import json
+import os
+import time
 from datetime import datetime
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 
-from models import OntologyVersion
-from visualization import generate_visualization
-from convert import detect_data_type, convert_owl_to_jsonld, convert_jsonld_to_owl
+from cache import content_hash, get_visualization_cache
+from downloads import DOWNLOAD_FORMATS, compress_chunks, download_etag, iter_artifact, iter_serialized, iter_text, supported_encodings
+from jobs import get_job_queue, is_async_ingest
+from metrics import REQUEST_SECONDS, finish_request, format_server_timing, render_prometheus, span, start_request
+from models import ARTIFACT_FIELDS, IngestJob, OntologyVersion, META_FIELDS, VERSION_FIELDS
+from ontology import OntologyModel
+from parsers import PARSER_BACKENDS
+from pipeline import (build_artifacts, convert_formats, ingest_upload, ingest_version, load_upload, rebuild_artifacts,
+                      recover_version, reingest_version)
+from uploads import UploadTooLarge, discard_upload, get_max_upload_bytes, read_upload_text, sniff_data_type, spool_upload
+from visualization import generate_visualization, is_graph_data, render_graph_html
+
+# 版本详情默认返回的字段，网络图数据通过/api/versions/<id>/graph单独获取
+DEFAULT_VERSION_FIELDS = tuple(field for field in VERSION_FIELDS if field != 'graph')
+
+
+def _encode_cursor(version):
+    """将列表中最后一条记录的(updated_at, id)编码为分页游标"""
+    raw = json.dumps([version['updated_at'], version['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """解码分页游标，无效时返回None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(updated_at, str) or not isinstance(id, int):
+        return None
+    return updated_at, id
+
+
+def _parse_fields(fields_arg):
+    """解析fields查询参数，返回(字段元组, 无效字段列表)；未指定时返回除graph外的全部字段"""
+    if not fields_arg:
+        return DEFAULT_VERSION_FIELDS, []
+    fields = tuple(dict.fromkeys(f.strip() for f in fields_arg.split(',') if f.strip()))
+    invalid = [f for f in fields if f not in VERSION_FIELDS]
+    return fields, invalid
+
+
+def _parser_backend_arg():
+    """读取parser查询参数指定的解析器后端，返回(后端名称, 错误响应)；未指定时后端为None，使用PARSER_BACKEND配置"""
+    parser_backend = request.args.get('parser') or None
+    if parser_backend is not None and parser_backend not in PARSER_BACKENDS:
+        return None, (jsonify({
+            'error': '参数验证失败',
+            'details': [f'不支持的解析器后端: {parser_backend}']
+        }), 400)
+    return parser_backend, None
+
+
+def _parent_id_arg(value):
+    """校验父版本ID，返回(父版本ID, 错误响应)；未指定时为None，版本数据以前一个版本为差异基准"""
+    if value is None or value == '':
+        return None, None
+    try:
+        parent_id = int(value)
+    except (TypeError, ValueError):
+        parent_id = None
+    if parent_id is None or isinstance(value, bool) or OntologyVersion.get_download_info(parent_id) is None:
+        return None, (jsonify({
+            'error': '参数验证失败',
+            'details': [f'父版本不存在: {value}']
+        }), 400)
+    return parent_id, None
+
+
+def _serialize_version(version, fields=VERSION_FIELDS):
+    """将版本序列化为响应字典，只包含元数据字段和请求的字段"""
+    result = {}
+    for field in VERSION_FIELDS:
+        if field not in META_FIELDS and field not in fields:
+            continue
+        value = getattr(version, field)
+        if field in ('created_at', 'updated_at'):
+            value = value.isoformat() if value else None
+        result[field] = value
+    return result
+
+
+def _accepted_response(version, job_id):
+    """返回202响应，包含版本基本信息和后台任务的查询地址"""
+    status_url = f'/api/jobs/{job_id}'
+    response = jsonify({
+        'id': version.id,
+        'name': version.name,
+        'description': version.description,
+        'created_at': version.created_at.isoformat() if version.created_at else None,
+        'updated_at': version.updated_at.isoformat() if version.updated_at else None,
+        'job': {
+            'id': job_id,
+            'status': IngestJob.QUEUED,
+            'status_url': status_url
+        }
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+def _load_download_formats(id):
+    """读取已持久化的OWL/JSON-LD数据，仅在缺失或过期时重新转换并回写"""
+    formats = OntologyVersion.get_formats(id)
+    if formats is None:
+        return None
+
+    is_stale = formats['formats_hash'] is None or formats['formats_hash'] != formats['content_hash']
+    if formats['owl_data'] and formats['jsonld_data'] and not is_stale:
+        return formats
+
+    ontology_data = OntologyVersion.get_ontology_data(id)
+    if not ontology_data:
+        return formats
+
+    owl_data, jsonld_data = convert_formats(ontology_data)
+    OntologyVersion.update_formats(id, owl_data, jsonld_data, formats['content_hash'])
+    formats['owl_data'] = owl_data
+    formats['jsonld_data'] = jsonld_data
+    formats['formats_hash'] = formats['content_hash']
+    return formats
+
+
+def _download_chunks(id, info, data_format):
+    """获取指定格式的下载内容块生成器，没有数据时返回None
+
+    OWL/JSON-LD优先分块解压已保存的产物，产物缺失或过期时重新转换并回写；Turtle/N-Triples从原始数据生成
+    """
+    artifact = DOWNLOAD_FORMATS[data_format].get('artifact')
+    if artifact:
+        if info['content_hash'] and info['formats_hash'] == info['content_hash']:
+            encoded = OntologyVersion.get_encoded_artifact(id, artifact)
+            if encoded and encoded[1]:
+                return iter_artifact(*encoded)
+        formats = _load_download_formats(id)
+        return iter_text(formats[artifact]) if formats and formats[artifact] else None
+
+    ontology_data = OntologyVersion.get_ontology_data(id)
+    if not ontology_data:
+        return None
+    # 以下载地址作为相对IRI的基准地址
+    return iter_serialized(OntologyModel.parse(ontology_data).graph, data_format, request.base_url)
+
+
+def _download_file(id, data_format):
+    """按格式分块返回版本文件
+
+    未指定Content-Length，由服务器以分块传输发送；支持If-None-Match条件请求，
+    并按Accept-Encoding使用brotli或gzip压缩
+    """
+    info = OntologyVersion.get_download_info(id)
+    if info is None:
+        return jsonify({'error': 'Version not found'}), 404
+
+    etag = download_etag(info['content_hash'], data_format) if info['content_hash'] else None
+    if etag and request.if_none_match.contains_raw(etag):
+        response = Response(status=304)
+        response.headers['ETag'] = etag
+        return response
+
+    try:
+        chunks = _download_chunks(id, info, data_format)
+    except Exception as e:
+        return jsonify({'error': f'格式转换失败: {str(e)}'}), 500
+    if chunks is None:
+        return jsonify({'error': 'No data found in version'}), 400
+
+    spec = DOWNLOAD_FORMATS[data_format]
+    content_encoding = request.accept_encodings.best_match(supported_encodings())
+    response = Response(compress_chunks(chunks, content_encoding), mimetype=spec['mimetype'])
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{info['name']}.{spec['extension']}")
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+def _format_download(id):
+    """处理下载接口的format查询参数，未指定时返回None（返回两种格式的JSON）"""
+    data_format = request.args.get('format')
+    if data_format is None:
+        return None
+    if data_format not in DOWNLOAD_FORMATS:
+        return jsonify({
+            'error': '参数验证失败',
+            'details': [f'不支持的格式: {data_format}']
+        }), 400
+    return _download_file(id, data_format)
+
+
+def _load_graph_data(id):
+    """读取版本的紧凑格式网络图数据
+
+    早期版本保存的是完整HTML页面，后台任务尚未完成的版本还没有网络图，
+    这两种情况从原始数据重新生成并回写。版本不存在时返回None。
+    """
+    version = OntologyVersion.get_by_id(id, fields=('graph',))
+    if version is None:
+        return None
+    if is_graph_data(version.graph):
+        return version.graph
+
+    ontology_data = OntologyVersion.get_ontology_data(id)
+    if not ontology_data:
+        return {}
+    visualization_data = generate_visualization(ontology_data)
+    if not visualization_data:
+        raise ValueError('无法解析ontology数据')
+    graph_data = visualization_data['graph']
+    OntologyVersion.update_artifacts(id, {'graph': graph_data}, content_hash(ontology_data))
+    return graph_data
 
 
 def create_app():
     app = Flask(__name__)
-    CORS(app)
-    OntologyVersion.init_db()  # 启用CORS支持
+    CORS(app)  # 启用CORS支持
 
-    # 初始化数据库
+    # 初始化数据库（执行未应用的结构迁移）
     OntologyVersion.init_db()
+    # 重新执行上次运行时（进程重启或崩溃前）未完成的导入任务
+    get_job_queue().recover(recover_version)
+
+    @app.before_request
+    def start_request_timing():
+        g.request_started = time.perf_counter()
+        g.timing_token = start_request()
+
+    @app.after_request
+    def add_server_timing(response):
+        # 各阶段耗时写入Server-Timing响应头，可在浏览器开发者工具中查看
+        token = g.pop('timing_token', None)
+        if token is None:
+            return response
+        elapsed = time.perf_counter() - g.pop('request_started')
+        timings = finish_request(token)
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(elapsed, request.method, endpoint, str(response.status_code))
+        response.headers['Server-Timing'] = format_server_timing(timings, elapsed)
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        # Prometheus文本格式：各阶段和各接口的耗时直方图，以及可视化缓存的统计
+        extra_lines = []
+        cache = get_visualization_cache()
+        if cache:
+            for name, value in cache.stats().items():
+                is_counter = name in ('hits', 'misses')
+                metric = f'ontology_visualization_cache_{name}' + ('_total' if is_counter else '')
+                extra_lines.append(f'# TYPE {metric} {"counter" if is_counter else "gauge"}')
+                extra_lines.append(f'{metric} {value}')
+        return Response(render_prometheus(extra_lines), mimetype='text/plain; version=0.0.4')
 
     @app.route('/api/versions', methods=['GET'])
     def get_versions():
         page = int(request.args.get('page', 1))
         page_size = int(request.args.get('page_size', 20))
         search_term = request.args.get('search', '')
+        # 传入上一页返回的next_cursor时使用键集分页，任意深度的翻页代价相同
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('total', 'true').lower() not in ('false', '0', 'no')
+
+        after = None
+        if cursor:
+            after = _decode_cursor(cursor)
+            if after is None:
+                return jsonify({
+                    'error': '参数验证失败',
+                    'details': ['无效的分页游标']
+                }), 400
 
-        versions = OntologyVersion.get_all_basic(page, page_size, search_term)
-        total = OntologyVersion.count_all(search_term)
+        versions = OntologyVersion.get_all_basic(page, page_size, search_term, after=after)
+        total = OntologyVersion.count_all(search_term) if include_total else None
 
         return jsonify({
             'versions': versions,
             'pagination': {
                 'page': page,
                 'page_size': page_size,
-                'total': total
+                'total': total,
+                # 搜索结果按相关度排序，只支持page分页
+                'next_cursor': _encode_cursor(versions[-1]) if len(versions) == page_size and not search_term else None
             }
         })
 
     @app.route('/api/versions/<int:id>', methods=['GET'])
     def get_version(id):
-        version = OntologyVersion.get_by_id(id)
-        if version:
+        # 支持?fields=tree,table只读取并返回需要的字段
+        fields, invalid = _parse_fields(request.args.get('fields', ''))
+        if invalid:
             return jsonify({
-                'id': version.id,
-                'name': version.name,
-                'description': version.description,
-                'ontology_data': version.ontology_data,
-                'owl_data': version.owl_data,
-                'jsonld_data': version.jsonld_data,
-                'graph': version.graph,
-                'tree': version.tree,
-                'table': version.table,
-                'created_at': version.created_at.isoformat() if version.created_at else None,
-                'updated_at': version.updated_at.isoformat() if version.updated_at else None
-            }), 200
+                'error': '参数验证失败',
+                'details': [f'不支持的字段: {field}' for field in invalid]
+            }), 400
+
+        version = OntologyVersion.get_by_id(id, fields=fields)
+        if version:
+            if 'owl_data' in fields or 'jsonld_data' in fields:
+                # 增量更新后OWL/JSON-LD数据过期，与下载一样按需重新转换
+                info = OntologyVersion.get_download_info(id)
+                if info and info['content_hash'] and info['formats_hash'] != info['content_hash']:
+                    formats = _load_download_formats(id)
+                    if formats:
+                        version.owl_data = formats['owl_data']
+                        version.jsonld_data = formats['jsonld_data']
+            return jsonify(_serialize_version(version, fields)), 200
         else:
             return jsonify({'error': 'Version not found'}), 404
 
     @app.route('/api/versions', methods=['POST'])
     def create_version():
-        data = request.get_json()
+        parser_backend, error = _parser_backend_arg()
+        if error:
+            return error
+        with span('json_decode'):
+            data = request.get_json()
 
         # 验证必填字段
         errors = []
@@ -74,27 +345,39 @@ def create_app():
                 'error': '参数验证失败',
                 'details': errors
             }), 400
-
-        # 生成可视化数据
-        try:
-            visualization_data = generate_visualization(data['ontology_data'])
-            if visualization_data is None:
+        parent_id, error = _parent_id_arg(data.get('parent_id'))
+        if error:
+            return error
+
+        if is_async_ingest():
+            # 先保存版本元数据和原始数据，产物由后台任务生成
+            version = OntologyVersion(
+                name=data['name'],
+                description=data.get('description', ''),
+                parent_id=parent_id,
+                ontology_data=data['ontology_data'],
+                owl_data=None,
+                jsonld_data=None,
+                graph=None,
+                tree=None,
+                table=None
+            )
+            try:
+                with span('db_write'):
+                    version.save()
+            except Exception as e:
                 return jsonify({
-                    'error': '生成可视化数据时发生错误',
-                    'details': ['无法解析ontology数据']
+                    'error': '保存版本时发生错误',
+                    'details': [str(e)]
                 }), 500
-            graph_data = visualization_data['graph']
-            tree_data = visualization_data['tree']
-            table_data = visualization_data['table']
-                        
-            # 检测数据类型并进行相应转换
-            data_type = detect_data_type(data['ontology_data'])
-            if data_type == "jsonld":
-                owl_data = convert_jsonld_to_owl(data['ontology_data'])
-                jsonld_data = data['ontology_data']
-            else:  # owl
-                owl_data = data['ontology_data']
-                jsonld_data = convert_owl_to_jsonld(data['ontology_data'])
+
+            job_id = get_job_queue().submit('create', version.id, ingest_version, version.id, data['ontology_data'],
+                                            None, parser_backend)
+            return _accepted_response(version, job_id)
+
+        # 同步模式：在请求线程中生成可视化数据和OWL/JSON-LD数据
+        try:
+            artifacts = build_artifacts(data['ontology_data'], parser_backend=parser_backend)
         except Exception as e:
             return jsonify({
                 'error': '生成可视化数据时发生错误',
@@ -105,16 +388,21 @@ def create_app():
         version = OntologyVersion(
             name=data['name'],
             description=data.get('description', ''),
+            parent_id=parent_id,
             ontology_data=data['ontology_data'],
-            owl_data=owl_data,
-            jsonld_data=jsonld_data,
-            graph=graph_data,
-            tree=tree_data,
-            table=table_data
+            owl_data=artifacts['owl_data'],
+            jsonld_data=artifacts['jsonld_data'],
+            graph=artifacts['graph'],
+            tree=artifacts['tree'],
+            table=artifacts['table'],
+            formats_hash=content_hash(data['ontology_data'])
         )
+        version.search_text = artifacts['search']
+        version.index = artifacts['index']
 
         try:
-            version.save()
+            with span('db_write'):
+                version.save()
         except Exception as e:
             return jsonify({
                 'error': '保存版本时发生错误',
@@ -131,6 +419,7 @@ def create_app():
             'id': version.id,
             'name': version.name,
             'description': version.description,
+            'parent_id': version.parent_id,
             'ontology_data': version.ontology_data,
             'owl_data': version.owl_data,
             'jsonld_data': version.jsonld_data,
@@ -141,49 +430,233 @@ def create_app():
             'updated_at': version.updated_at.isoformat()
         }), 201
 
+    @app.route('/api/versions/upload', methods=['POST'])
+    def upload_version():
+        # 上传本体文件创建版本：multipart/form-data的file字段（name、description、parent_id为表单字段），
+        # 或直接以请求体上传文件（name、description、parent_id为查询参数）。
+        # 文件分块写入磁盘临时文件后直接从文件解析，不在内存中保存整个请求体和JSON解码副本
+        parser_backend, error = _parser_backend_arg()
+        if error:
+            return error
+        max_bytes = get_max_upload_bytes()
+        if max_bytes is not None and request.content_length and request.content_length > max_bytes:
+            return jsonify({
+                'error': '上传文件过大',
+                'details': [f'上传文件超过大小限制（{max_bytes}字节）']
+            }), 413
+
+        if request.mimetype == 'multipart/form-data':
+            params = request.form
+            upload = request.files.get('file')
+            stream = upload.stream if upload else None
+            default_name = os.path.splitext(upload.filename or '')[0] if upload else ''
+        else:
+            params = request.args
+            stream = request.stream
+            default_name = ''
+
+        errors = []
+        name = params.get('name') or default_name
+        if not name:
+            errors.append('名称是必填项')
+        if stream is None:
+            errors.append('数据内容是必填项')
+        if errors:
+            return jsonify({
+                'error': '参数验证失败',
+                'details': errors
+            }), 400
+        parent_id, error = _parent_id_arg(params.get('parent_id'))
+        if error:
+            return error
+
+        try:
+            path, size = spool_upload(stream, max_bytes)
+        except UploadTooLarge as e:
+            return jsonify({
+                'error': '上传文件过大',
+                'details': [str(e)]
+            }), 413
+
+        data_type = sniff_data_type(path)
+        if size == 0:
+            errors.append('数据内容是必填项')
+        elif data_type not in ('owl', 'jsonld'):
+            errors.append('无法识别的文件格式，仅支持OWL(RDF/XML)和JSON-LD')
+        if errors:
+            discard_upload(path)
+            return jsonify({
+                'error': '参数验证失败',
+                'details': errors
+            }), 400
+
+        if is_async_ingest():
+            # 先保存版本元数据和原始数据，后台任务从临时文件解析并生成产物，完成后删除临时文件
+            try:
+                version = OntologyVersion(
+                    name=name,
+                    description=params.get('description', ''),
+                    parent_id=parent_id,
+                    ontology_data=read_upload_text(path),
+                    owl_data=None,
+                    jsonld_data=None,
+                    graph=None,
+                    tree=None,
+                    table=None
+                )
+                with span('db_write'):
+                    version.save()
+            except Exception as e:
+                discard_upload(path)
+                return jsonify({
+                    'error': '保存版本时发生错误',
+                    'details': [str(e)]
+                }), 500
+            version.ontology_data = None
+
+            job_id = get_job_queue().submit('create', version.id, ingest_upload, version.id, path, data_type,
+                                            parser_backend)
+            return _accepted_response(version, job_id)
+
+        # 同步模式：从临时文件解析后在请求线程中生成产物
+        try:
+            model, ontology_data = load_upload(path, data_type)
+            artifacts = build_artifacts(ontology_data, model, parser_backend)
+        except Exception as e:
+            return jsonify({
+                'error': '生成可视化数据时发生错误',
+                'details': [str(e)]
+            }), 500
+        finally:
+            discard_upload(path)
+
+        version = OntologyVersion(
+            name=name,
+            description=params.get('description', ''),
+            parent_id=parent_id,
+            ontology_data=ontology_data,
+            owl_data=artifacts['owl_data'],
+            jsonld_data=artifacts['jsonld_data'],
+            graph=artifacts['graph'],
+            tree=artifacts['tree'],
+            table=artifacts['table'],
+            formats_hash=content_hash(ontology_data)
+        )
+        version.search_text = artifacts['search']
+        version.index = artifacts['index']
+
+        try:
+            with span('db_write'):
+                version.save()
+        except Exception as e:
+            return jsonify({
+                'error': '保存版本时发生错误',
+                'details': [str(e)]
+            }), 500
+
+        # 只返回元数据，原始数据和产物通过版本详情、网络图和下载接口获取
+        response = jsonify(_serialize_version(version, fields=()))
+        response.status_code = 201
+        response.headers['Location'] = f'/api/versions/{version.id}'
+        return response
+
+    @app.route('/api/versions/<int:id>/graph', methods=['GET'])
+    def get_version_graph(id):
+        # 默认返回紧凑的节点/边数据，?format=html时渲染为独立的HTML页面
+        output_format = request.args.get('format', 'json')
+        if output_format not in ('json', 'html'):
+            return jsonify({
+                'error': '参数验证失败',
+                'details': [f'不支持的格式: {output_format}']
+            }), 400
+
+        try:
+            graph_data = _load_graph_data(id)
+        except Exception as e:
+            return jsonify({'error': f'Visualization generation failed: {str(e)}'}), 500
+        if graph_data is None:
+            return jsonify({'error': 'Version not found'}), 404
+        if not graph_data:
+            return jsonify({'error': 'Graph data is empty'}), 404
+
+        if output_format == 'html':
+            return Response(render_graph_html(graph_data), mimetype='text/html')
+        return jsonify(graph_data)
+
     @app.route('/api/versions/<int:id>', methods=['PUT'])
     def update_version(id):
-        version = OntologyVersion.get_by_id(id)
+        parser_backend, error = _parser_backend_arg()
+        if error:
+            return error
+        with span('json_decode'):
+            data = request.get_json()
+        # 异步模式下修改本体数据时，产物由后台任务重新生成（增量更新所需的旧产物由任务读取）；
+        # 同步修改本体数据时OWL/JSON-LD数据重新生成或视为过期，无需读取
+        async_ingest = 'ontology_data' in data and is_async_ingest()
+        if async_ingest:
+            fields = ('ontology_data',)
+        elif 'ontology_data' in data:
+            fields = ('ontology_data', 'graph', 'tree', 'table')
+        else:
+            # 只修改名称/描述时只读取元数据，保存时不重写原始数据和产物
+            fields = ()
+
+        with span('db_read'):
+            version = OntologyVersion.get_by_id(id, fields=fields)
         if not version:
             return jsonify({'error': 'Version not found'}), 404
 
-        data = request.get_json()
-
         # 更新字段
         if 'name' in data:
             version.name = data['name']
         if 'description' in data:
             version.description = data['description']
+        previous_data = version.ontology_data
+        unchanged = {}
         if 'ontology_data' in data:
             version.ontology_data = data['ontology_data']
-            # 重新生成可视化数据和OWL/JSON-LD数据
-            try:
-                visualization_data = generate_visualization(data['ontology_data'])
-                if visualization_data is None:
+            if not async_ingest:
+                # 重新生成可视化数据和OWL/JSON-LD数据，能增量更新时只修改变化的部分
+                with span('db_read'):
+                    previous = {'graph': version.graph, 'tree': version.tree, 'table': version.table,
+                                **OntologyVersion.get_artifacts(id, ('index',))}
+                try:
+                    artifacts = rebuild_artifacts(previous_data, data['ontology_data'], previous, parser_backend)
+                except Exception as e:
                     return jsonify({
                         'error': '生成可视化数据时发生错误',
-                        'details': ['无法解析ontology数据']
+                        'details': [str(e)]
                     }), 500
-                version.graph = visualization_data['graph']
-                version.tree = visualization_data['tree']
-                version.table = visualization_data['table']
-                                
-                # 检测数据类型并进行相应转换
-                data_type = detect_data_type(data['ontology_data'])
-                if data_type == "jsonld":
-                    version.owl_data = convert_jsonld_to_owl(data['ontology_data'])
-                    version.jsonld_data = data['ontology_data']
-                else:  # owl
-                    version.owl_data = data['ontology_data']
-                    version.jsonld_data = convert_owl_to_jsonld(data['ontology_data'])
-            except Exception as e:
-                return jsonify({
-                    'error': '生成可视化数据时发生错误',
-                    'details': [str(e)]
-                }), 500
+                for name in ('graph', 'tree', 'table'):
+                    if name in artifacts:
+                        setattr(version, name, artifacts[name])
+                    else:
+                        # 增量更新时未变化的产物不重新写入，保存后再恢复用于返回
+                        unchanged[name] = getattr(version, name)
+                        setattr(version, name, None)
+                version.search_text = artifacts.get('search')
+                version.index = artifacts['index']
+                version.owl_data = artifacts['owl_data']
+                version.jsonld_data = artifacts['jsonld_data']
+                version.formats_hash = content_hash(data['ontology_data'])
 
         version.updated_at = datetime.now()
-        version.save()
+        with span('db_write'):
+            version.save()
+        for name, value in unchanged.items():
+            setattr(version, name, value)
+
+        if async_ingest:
+            job_id = get_job_queue().submit('update', version.id, reingest_version, version.id, previous_data,
+                                            data['ontology_data'], parser_backend)
+            return _accepted_response(version, job_id)
+
+        if 'ontology_data' not in data:
+            # 保存后再读取原始数据和产物用于返回
+            with span('db_read'):
+                artifacts = OntologyVersion.get_artifacts(id, ('ontology_data',) + ARTIFACT_FIELDS)
+            for name in ('ontology_data',) + ARTIFACT_FIELDS:
+                setattr(version, name, artifacts.get(name, ''))
 
         # 返回更新后的版本详情信息
         # 确保graph、tree和table是字符串类型后再返回
@@ -195,6 +668,7 @@ def create_app():
             'id': version.id,
             'name': version.name,
             'description': version.description,
+            'parent_id': version.parent_id,
             'ontology_data': version.ontology_data,
             'owl_data': version.owl_data,
             'jsonld_data': version.jsonld_data,
@@ -207,7 +681,7 @@ def create_app():
 
     @app.route('/api/versions/<int:id>', methods=['DELETE'])
     def delete_version(id):
-        version = OntologyVersion.get_by_id(id)
+        version = OntologyVersion.get_by_id(id, fields=())
         if not version:
             return jsonify({'error': 'Version not found'}), 404
 
@@ -216,68 +690,57 @@ def create_app():
 
     @app.route('/api/versions/<int:id>/download', methods=['GET'])
     def download_version(id):
-        # 获取版本信息
-        version = OntologyVersion.get_by_id(id)
-        if not version:
+        # 指定?format=owl|jsonld|ttl|nt时只下载该格式的文件
+        response = _format_download(id)
+        if response is not None:
+            return response
+
+        # 读取已保存的两种格式数据，必要时才重新转换
+        formats = _load_download_formats(id)
+        if not formats:
             return jsonify({'error': 'Version not found'}), 404
 
-        # 获取ontology_data
-        ontology_data = version.ontology_data
-        
-        # 检测数据类型
-        data_type = detect_data_type(ontology_data)
-        
-        # 根据数据类型进行转换
-        if data_type == "owl":
-            # 如果是OWL格式，转换为JSON-LD
-            owl_data = ontology_data
-            jsonld_data = convert_owl_to_jsonld(owl_data)
-        else:
-            # 如果是JSON-LD格式，转换为OWL
-            jsonld_data = ontology_data
-            owl_data = convert_jsonld_to_owl(jsonld_data)
-        
         # 返回两种格式的数据
         return jsonify({
-            'name': version.name,
-            'owl_data': owl_data,
-            'jsonld_data': jsonld_data
+            'name': formats['name'],
+            'owl_data': formats['owl_data'],
+            'jsonld_data': formats['jsonld_data']
         })
 
     @app.route('/api/download/<int:id>', methods=['GET'])
     def download_ontology_version(id):
-        # 根据ID获取版本
-        version = OntologyVersion.get_by_id(id)
-        if not version:
+        # 指定?format=owl|jsonld|ttl|nt时只下载该格式的文件
+        response = _format_download(id)
+        if response is not None:
+            return response
+
+        # 读取已保存的两种格式数据，必要时才重新转换
+        formats = _load_download_formats(id)
+        if not formats:
             return jsonify({'error': 'Version not found'}), 404
 
-        # 获取本体数据
-        ontology_data = version.ontology_data
-        if not ontology_data:
+        if not formats['owl_data'] and not formats['jsonld_data']:
             return jsonify({'error': 'No data found in version'}), 400
 
-        # 检测数据类型
-        data_type = detect_data_type(ontology_data)
-
-        # 根据数据类型进行转换
-        if data_type == "owl":
-            # 如果是OWL格式，转换为JSON-LD
-            owl_data = ontology_data
-            jsonld_data = convert_owl_to_jsonld(owl_data)
-        else:
-            # 如果是JSON-LD格式，转换为OWL
-            jsonld_data = ontology_data
-            owl_data = convert_jsonld_to_owl(jsonld_data)
-
         # 返回两种格式的数据
         return jsonify({
-            'name': version.name,
-            'owl_data': owl_data,
-            'jsonld_data': jsonld_data
+            'name': formats['name'],
+            'owl_data': formats['owl_data'],
+            'jsonld_data': formats['jsonld_data']
         })
 
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        job = IngestJob.get_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
     @app.route('/api/visualize', methods=['POST'])
     def visualize():
+        parser_backend, error = _parser_backend_arg()
+        if error:
+            return error
         data = request.get_json()
 
         # 获取参数
@@ -290,7 +753,7 @@ def create_app():
 
         # 如果提供了version_id，则从数据库获取数据
         if version_id:
-            version = OntologyVersion.get_by_id(version_id)
+            version = OntologyVersion.get_by_id(version_id, fields=('ontology_data',))
             if not version:
                 return jsonify({'error': 'Version not found'}), 404
 
@@ -302,10 +765,14 @@ def create_app():
 
         # 生成可视化
         try:
-            visualization_data = generate_visualization(ontology_data)
+            visualization_data = generate_visualization(ontology_data, parser_backend=parser_backend)
             if not visualization_data:
                 return jsonify({'error': 'Failed to generate visualization'}), 500
-            return jsonify(visualization_data)
+            return jsonify({
+                'graph': visualization_data['graph'],
+                'tree': visualization_data['tree'],
+                'table': visualization_data['table']
+            })
         except Exception as e:
             return jsonify({'error': f'Visualization generation failed: {str(e)}'}), 500
 
@@ -1,9 +1,12 @@
 import os
 from dotenv import load_dotenv
 from api import create_app
+from log_config import configure_logging
 
 # 加载.env文件
 load_dotenv()
+# 按LOG_LEVEL/LOG_FORMAT配置日志
+configure_logging()
 
 app = create_app()
 
@@ -0,0 +1,125 @@
+"""
+网络图构建基准测试
+比较网络图数据生成和pyvis网络图构建在不同本体规模下的耗时，验证构建代价随实体数量近似线性增长
+
+用法（在backend目录下执行）:
+    python -m benchmarks.graph_build
+    python -m benchmarks.graph_build --sizes 1000 10000 100000 --baseline-max 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from rdflib import Graph, Literal, Namespace, OWL, RDF, RDFS
+from pyvis.network import Network
+
+from parsers import OWLParser
+from visualization import GRAPH_STYLES, build_graph_data, build_network
+
+EX = Namespace("http://example.org/synthetic#")
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def synthetic_graph(entities, branching=8):
+    """生成包含指定数量实体的合成本体图
+
+    实体中约80%为类（按branching叉树组织子类关系），数据属性和对象属性各约10%，
+    每个属性带有定义域和值域
+    """
+    graph = Graph()
+    class_count = max(1, entities * 8 // 10)
+    property_count = max(1, (entities - class_count) // 2)
+
+    for i in range(class_count):
+        cls = EX[f"Class{i}"]
+        graph.add((cls, RDF.type, OWL.Class))
+        graph.add((cls, RDFS.label, Literal(f"类{i}", lang='zh')))
+        if i > 0:
+            graph.add((cls, RDFS.subClassOf, EX[f"Class{(i - 1) // branching}"]))
+
+    for i in range(property_count):
+        for kind, prop_type in (('data', OWL.DatatypeProperty), ('object', OWL.ObjectProperty)):
+            prop = EX[f"{kind}Property{i}"]
+            graph.add((prop, RDF.type, prop_type))
+            graph.add((prop, RDFS.label, Literal(f"{kind} property {i}", lang='en')))
+            graph.add((prop, RDFS.domain, EX[f"Class{i % class_count}"]))
+            graph.add((prop, RDFS.range, EX[f"Class{(i * 7 + 1) % class_count}"]))
+    return graph
+
+
+def build_network_per_item(graph_data):
+    """逐个调用add_node/add_edge构建pyvis网络图（优化前的做法，作为对照）"""
+    net = Network(directed=True, font_color="black")
+    node_ids = [node['id'] for node in graph_data['nodes']]
+    for node in graph_data['nodes']:
+        options = {**GRAPH_STYLES.get(node['group'], {}), **node}
+        options.pop('group')
+        net.add_node(options.pop('id'), **options)
+    for edge in graph_data['edges']:
+        options = {**GRAPH_STYLES.get(edge['group'], {}), **edge}
+        options.pop('group')
+        net.add_edge(node_ids[options.pop('from')], node_ids[options.pop('to')], **options)
+    return net
+
+
+def _timed(func, *args):
+    """执行并返回(结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_case(name, graph, baseline):
+    parser = OWLParser(None, graph=graph)
+    _, parse_time = _timed(parser.parse)
+    graph_data, data_time = _timed(build_graph_data, parser)
+    _, network_time = _timed(build_network, graph_data)
+    baseline_time = _timed(build_network_per_item, graph_data)[1] if baseline else None
+
+    entities = len(graph_data['nodes'])
+    return {
+        'case': name,
+        'triples': len(graph),
+        'nodes': entities,
+        'edges': len(graph_data['edges']),
+        'parse': parse_time,
+        'graph_data': data_time,
+        'network': network_time,
+        'network_per_item': baseline_time,
+        'us_per_node': (data_time + network_time) / max(entities, 1) * 1e6
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='网络图构建基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='合成本体的实体数量')
+    parser.add_argument('--baseline-max', type=int, default=10000,
+                        help='实体数量不超过该值时同时测试逐个add_node/add_edge的对照耗时')
+    args = parser.parse_args(argv)
+
+    cases = []
+    rto_path = os.path.join(DATA_DIR, 'RTO-V4.owl')
+    if os.path.exists(rto_path):
+        graph = Graph()
+        graph.parse(rto_path, format='xml')
+        cases.append(('RTO-V4', graph, True))
+    for size in args.sizes:
+        cases.append((f'synthetic-{size}', synthetic_graph(size), size <= args.baseline_max))
+
+    header = f"{'case':<18}{'triples':>10}{'nodes':>9}{'edges':>9}{'parse(s)':>10}{'data(s)':>10}" \
+             f"{'network(s)':>12}{'per-item(s)':>13}{'us/node':>9}"
+    print(header)
+    for name, graph, baseline in cases:
+        result = run_case(name, graph, baseline)
+        per_item = f"{result['network_per_item']:.3f}" if result['network_per_item'] is not None else '-'
+        print(f"{result['case']:<18}{result['triples']:>10}{result['nodes']:>9}{result['edges']:>9}"
+              f"{result['parse']:>10.3f}{result['graph_data']:>10.3f}{result['network']:>12.3f}"
+              f"{per_item:>13}{result['us_per_node']:>9.1f}")
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+基准测试套件
+对RTO-V4示例本体和不同规模的合成本体测试解析、格式转换、可视化生成和API接口的耗时，
+结果保存为JSON文件，可与之前版本保存的结果对比
+
+用法（在backend目录下执行）:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --profiles small medium large --repeat 5 --label v1.2.0
+    python -m benchmarks.suite --cases parser convert --compare benchmarks/results/<之前的结果>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.synthetic import generate_ontology
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+# 合成本体的规模档位，参数含义见benchmarks.synthetic.generate_ontology
+PROFILES = {
+    'small': dict(classes=100, depth=4, fanout=2, restriction_density=0.1),
+    'medium': dict(classes=1000, depth=6, fanout=2, restriction_density=0.1),
+    'large': dict(classes=10000, depth=8, fanout=2, restriction_density=0.1),
+    'deep': dict(classes=1000, depth=1000, fanout=0, restriction_density=0),
+    'dense': dict(classes=1000, depth=4, fanout=8, restriction_density=0.5),
+}
+
+CASE_GROUPS = ('parser', 'convert', 'visualization', 'api')
+
+
+def load_datasets(profiles, include_sample=True):
+    """准备测试数据，返回[(名称, OWL数据, JSON-LD数据, 描述信息)]"""
+    from convert import OWLToJSONLDConverter
+
+    datasets = []
+    if include_sample:
+        owl_path = os.path.join(DATA_DIR, 'RTO-V4.owl')
+        jsonld_path = os.path.join(DATA_DIR, 'RTO-V4.json')
+        if os.path.exists(owl_path) and os.path.exists(jsonld_path):
+            with open(owl_path, encoding='utf-8') as f1, open(jsonld_path, encoding='utf-8') as f2:
+                datasets.append(('RTO-V4', f1.read(), f2.read(), {}))
+    for name in profiles:
+        params = PROFILES[name]
+        graph = generate_ontology(**params)
+        owl_data = graph.serialize(format='xml')
+        jsonld_data = OWLToJSONLDConverter().convert_triples(graph)
+        datasets.append((f'synthetic-{name}', owl_data, jsonld_data, dict(params, triples=len(graph))))
+    return datasets
+
+
+def _measure(func, repeat, warmup):
+    """执行warmup次预热后计时repeat次，返回(耗时列表, 最后一次的返回值)"""
+    result = None
+    for _ in range(warmup):
+        result = func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _peak_memory(func):
+    """单独执行一次并用tracemalloc统计Python对象的峰值内存（字节），不计入耗时"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _parse_server_timing(header):
+    """解析Server-Timing响应头，返回{阶段名: 毫秒数}"""
+    stages = {}
+    for entry in (header or '').split(','):
+        name, _, duration = entry.strip().partition(';dur=')
+        if name and duration:
+            stages[name] = float(duration)
+    return stages
+
+
+def parser_cases(owl_data, jsonld_data):
+    """每个解析器后端一个用例，rdflib后端沿用parser.parse的用例名，便于与之前的结果对比"""
+    from parsers import PARSER_BACKENDS
+
+    def parse_with(parser_class):
+        return lambda: parser_class(owl_data).parse()
+    return [('parser.parse' if name == 'rdflib' else f'parser.{name}', parse_with(parser_class))
+            for name, parser_class in PARSER_BACKENDS.items()]
+
+
+def convert_cases(owl_data, jsonld_data):
+    from convert import JSONLDToOWLConverter, OWLToJSONLDConverter
+    return [
+        ('convert.owl_to_jsonld', lambda: OWLToJSONLDConverter().convert(owl_data)),
+        ('convert.jsonld_to_owl', lambda: JSONLDToOWLConverter().convert(jsonld_data)),
+    ]
+
+
+def visualization_cases(owl_data, jsonld_data):
+    from visualization import generate_visualization
+    return [
+        ('visualization.owl', lambda: generate_visualization(owl_data, use_cache=False)),
+        ('visualization.jsonld', lambda: generate_visualization(jsonld_data, use_cache=False)),
+    ]
+
+
+def api_cases(client):
+    """返回生成API测试用例的函数，测试用例通过Flask测试客户端在进程内调用接口"""
+    def cases(owl_data, jsonld_data):
+        created = client.post('/api/versions', json={'name': 'benchmark', 'ontology_data': owl_data})
+        if created.status_code != 201:
+            raise RuntimeError(f'创建版本失败: {created.status_code} {created.get_data(as_text=True)[:200]}')
+        version_id = created.json['id']
+
+        def request(method, url, **kwargs):
+            def call():
+                response = client.open(url, method=method, **kwargs)
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{method} {url} 返回 {response.status_code}')
+                return response
+            return call
+
+        return [
+            ('api.create_version', request('POST', '/api/versions', json={'name': 'benchmark', 'ontology_data': owl_data})),
+            ('api.get_version', request('GET', f'/api/versions/{version_id}')),
+            ('api.get_graph', request('GET', f'/api/versions/{version_id}/graph')),
+            ('api.get_graph_html', request('GET', f'/api/versions/{version_id}/graph?format=html')),
+            ('api.download', request('GET', f'/api/download/{version_id}')),
+            ('api.visualize', request('POST', '/api/visualize', json={'ontology_data': jsonld_data})),
+        ]
+    return cases
+
+
+def _create_client(workdir):
+    """在临时数据库上创建同步导入、关闭可视化缓存的应用，使每次请求都执行完整流程"""
+    os.environ['ONTOLOGY_DB_PATH'] = os.path.join(workdir, 'benchmark.db')
+    os.environ['INGEST_MODE'] = 'sync'
+    os.environ['VIS_CACHE_SIZE'] = '0'
+    from api import create_app
+    return create_app().test_client()
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    import pyvis
+    import rdflib
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'rdflib': rdflib.__version__,
+        'pyvis': getattr(pyvis, '__version__', None),
+    }
+
+
+def run_suite(datasets, groups, repeat, warmup, client=None):
+    """执行基准测试，返回结果列表"""
+    factories = {
+        'parser': parser_cases,
+        'convert': convert_cases,
+        'visualization': visualization_cases,
+        'api': api_cases(client) if client is not None else None,
+    }
+    results = []
+    for dataset, owl_data, jsonld_data, _ in datasets:
+        for group in groups:
+            for case, func in factories[group](owl_data, jsonld_data):
+                times, last = _measure(func, repeat, warmup)
+                result = {
+                    'dataset': dataset,
+                    'case': case,
+                    'repeat': repeat,
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'mean': statistics.mean(times),
+                    'max': max(times),
+                }
+                if case.startswith('api.'):
+                    result['stages_ms'] = _parse_server_timing(last.headers.get('Server-Timing'))
+                if case.startswith('parser.'):
+                    result['peak_memory'] = _peak_memory(func)
+                results.append(result)
+                print(f"{dataset:<20}{case:<26}{result['median'] * 1000:>12.1f}{result['min'] * 1000:>12.1f}"
+                      f"{result['max'] * 1000:>12.1f}")
+                sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """与之前保存的结果按(数据集, 用例)对比中位数耗时，返回超过阈值的退化项数量"""
+    previous = {(r['dataset'], r['case']): r for r in baseline['results']}
+    print(f"\n与 {baseline['meta'].get('label') or baseline['meta'].get('revision')} 对比（中位数，毫秒）")
+    print(f"{'dataset':<20}{'case':<26}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    regressions = 0
+    for result in results:
+        old = previous.get((result['dataset'], result['case']))
+        if old is None:
+            continue
+        ratio = result['median'] / old['median'] if old['median'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  退化'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  提升'
+        print(f"{result['dataset']:<20}{result['case']:<26}{old['median'] * 1000:>12.1f}"
+              f"{result['median'] * 1000:>12.1f}{ratio:>9.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='基准测试套件')
+    parser.add_argument('--profiles', nargs='*', choices=sorted(PROFILES), default=['small', 'medium'],
+                        help='合成本体的规模档位')
+    parser.add_argument('--no-sample', action='store_true', help='不测试RTO-V4示例本体')
+    parser.add_argument('--cases', nargs='+', choices=CASE_GROUPS, default=list(CASE_GROUPS), help='测试的用例组')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例的计时次数')
+    parser.add_argument('--warmup', type=int, default=1, help='每个用例计时前的预热次数')
+    parser.add_argument('--label', help='结果标签，如发布版本号')
+    parser.add_argument('--output', help='结果文件路径，默认保存到benchmarks/results/目录')
+    parser.add_argument('--compare', help='与之前保存的结果文件对比')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定为退化的耗时增长比例')
+    parser.add_argument('--fail-on-regression', action='store_true', help='存在退化时以非零状态码退出')
+    args = parser.parse_args(argv)
+
+    datasets = load_datasets(args.profiles, include_sample=not args.no_sample)
+    with tempfile.TemporaryDirectory() as workdir:
+        client = _create_client(workdir) if 'api' in args.cases else None
+        print(f"{'dataset':<20}{'case':<26}{'median(ms)':>12}{'min(ms)':>12}{'max(ms)':>12}")
+        results = run_suite(datasets, args.cases, args.repeat, args.warmup, client)
+
+    revision = _git_revision()
+    report = {
+        'meta': {
+            'label': args.label,
+            'revision': revision,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'environment': _environment(),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+        },
+        'datasets': {name: dict(info, owl_bytes=len(owl_data.encode('utf-8')),
+                                jsonld_bytes=len(jsonld_data.encode('utf-8')))
+                     for name, owl_data, jsonld_data, info in datasets},
+        'results': results,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = args.label or f"{datetime.now():%Y%m%d-%H%M%S}-{revision or 'unknown'}"
+        output = os.path.join(RESULTS_DIR, f'{name}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+合成本体生成器
+按指定的类数量、层级深度、属性扇出和限制密度生成可复现的OWL本体，用于基准测试和大规模数据验证
+
+用法（在backend目录下执行）:
+    python -m benchmarks.synthetic --classes 1000 --depth 6 --fanout 2 --restrictions 0.1 -o data/synthetic.owl
+    python -m benchmarks.synthetic --classes 1000 --format jsonld -o data/synthetic.json
+"""
+
+import argparse
+import random
+
+from rdflib import BNode, Graph, Literal, Namespace, OWL, RDF, RDFS, URIRef, XSD
+
+from convert import OWLToJSONLDConverter
+
+EX = Namespace("http://example.org/synthetic#")
+ONTOLOGY = URIRef("http://example.org/synthetic")
+DATATYPES = (XSD.string, XSD.integer, XSD.decimal, XSD.boolean, XSD.dateTime)
+
+
+def _branching(classes, depth):
+    """计算使depth层的满树能容纳classes个类的最小分叉数"""
+    if depth <= 1 or classes <= 1:
+        return 0
+    branching = 1
+    while True:
+        capacity = depth if branching == 1 else (branching ** depth - 1) // (branching - 1)
+        if capacity >= classes:
+            return branching
+        branching += 1
+
+
+def generate_ontology(classes=1000, depth=6, fanout=2, restriction_density=0.1, seed=0):
+    """生成合成本体的RDF图
+
+    - classes: 类的数量，类按分叉数相同的树组织子类关系，树的层数不超过depth（depth为1时没有子类关系）
+    - fanout: 每个类作为定义域的属性数量，对象属性和数据属性交替生成
+    - restriction_density: 带有owl:Restriction父类（someValuesFrom/allValuesFrom）的类所占比例
+    - seed: 随机种子，相同参数和种子生成的本体完全相同
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    graph.bind('ex', EX)
+    graph.add((ONTOLOGY, RDF.type, OWL.Ontology))
+
+    branching = _branching(classes, depth)
+    class_uris = [EX[f"Class{i}"] for i in range(classes)]
+    for i, cls in enumerate(class_uris):
+        graph.add((cls, RDF.type, OWL.Class))
+        graph.add((cls, RDFS.label, Literal(f"类{i}", lang='zh')))
+        graph.add((cls, RDFS.label, Literal(f"Class {i}", lang='en')))
+        if i % 10 == 0:
+            graph.add((cls, RDFS.comment, Literal(f"合成本体中的第{i}个类", lang='zh')))
+        if branching and i > 0:
+            graph.add((cls, RDFS.subClassOf, class_uris[(i - 1) // branching]))
+
+    object_properties = []
+    for i, cls in enumerate(class_uris):
+        for j in range(fanout):
+            if j % 2 == 0:
+                prop = EX[f"hasPart{i}_{j}"]
+                graph.add((prop, RDF.type, OWL.ObjectProperty))
+                graph.add((prop, RDFS.range, rng.choice(class_uris)))
+                object_properties.append(prop)
+            else:
+                prop = EX[f"value{i}_{j}"]
+                graph.add((prop, RDF.type, OWL.DatatypeProperty))
+                graph.add((prop, RDFS.range, rng.choice(DATATYPES)))
+            graph.add((prop, RDFS.label, Literal(f"属性{i}_{j}", lang='zh')))
+            graph.add((prop, RDFS.domain, cls))
+
+    if object_properties and restriction_density > 0:
+        for cls in class_uris:
+            if rng.random() >= restriction_density:
+                continue
+            restriction = BNode()
+            graph.add((restriction, RDF.type, OWL.Restriction))
+            graph.add((restriction, OWL.onProperty, rng.choice(object_properties)))
+            quantifier = OWL.someValuesFrom if rng.random() < 0.7 else OWL.allValuesFrom
+            graph.add((restriction, quantifier, rng.choice(class_uris)))
+            graph.add((cls, RDFS.subClassOf, restriction))
+    return graph
+
+
+def generate_owl(**params):
+    """生成RDF/XML格式的合成本体，参数同generate_ontology"""
+    return generate_ontology(**params).serialize(format='xml')
+
+
+def generate_jsonld(**params):
+    """生成JSON-LD格式的合成本体（与系统导出的JSON-LD格式相同），参数同generate_ontology"""
+    return OWLToJSONLDConverter().convert_triples(generate_ontology(**params))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成合成本体')
+    parser.add_argument('--classes', type=int, default=1000, help='类的数量')
+    parser.add_argument('--depth', type=int, default=6, help='子类层级的最大深度')
+    parser.add_argument('--fanout', type=int, default=2, help='每个类作为定义域的属性数量')
+    parser.add_argument('--restrictions', type=float, default=0.1, help='带有限制的类所占比例')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--format', choices=('owl', 'jsonld'), default='owl', help='输出格式')
+    parser.add_argument('-o', '--output', required=True, help='输出文件路径')
+    args = parser.parse_args(argv)
+
+    params = dict(classes=args.classes, depth=args.depth, fanout=args.fanout,
+                  restriction_density=args.restrictions, seed=args.seed)
+    data = generate_owl(**params) if args.format == 'owl' else generate_jsonld(**params)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(data)
+
+
+if __name__ == '__main__':
+    main()
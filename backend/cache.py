@@ -0,0 +1,158 @@
+"""
+可视化结果缓存模块
+以规范化后的本体数据内容哈希为键缓存可视化结果，支持LRU淘汰和可选的磁盘缓存层
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_ontology_data(data):
+    """规范化本体数据：统一换行符并去除首尾空白"""
+    if data is None:
+        return ''
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return data.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def content_hash(data):
+    """计算规范化本体数据的SHA-256内容哈希"""
+    return hashlib.sha256(normalize_ontology_data(data).encode('utf-8')).hexdigest()
+
+
+class ArtifactCache:
+    """内容寻址的可视化结果缓存
+
+    内存层按LRU顺序淘汰，同时受条目数和总字节数限制；
+    若配置了disk_dir，则结果同时写入磁盘，内存未命中时从磁盘加载。
+    缓存中的值应视为只读，调用方不要原地修改。
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024, disk_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key):
+        """按内容哈希获取缓存结果，未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._load_from_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, len(json.dumps(value, ensure_ascii=False)))
+        return value
+
+    def put(self, key, value):
+        """写入缓存结果"""
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._store(key, value, len(serialized))
+        self._write_to_disk(key, serialized)
+
+    def clear(self):
+        """清空内存层缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _store(self, key, value, size):
+        """写入内存层并执行LRU淘汰，调用方需持有锁"""
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._total_bytes += size
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f'{key}.json')
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_to_disk(self, key, serialized):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        # 先写临时文件再原子替换，避免并发读到不完整的文件
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(serialized)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("写入磁盘缓存失败: %s", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_visualization_cache = None
+_visualization_cache_lock = threading.Lock()
+
+
+def get_visualization_cache():
+    """获取全局可视化结果缓存（首次调用时根据环境变量创建）
+
+    环境变量：
+    - VIS_CACHE_SIZE: 内存层最大条目数，默认64，设为0禁用缓存
+    - VIS_CACHE_MAX_BYTES: 内存层最大字节数，默认256MB
+    - VIS_CACHE_DIR: 磁盘缓存目录，未设置时不启用磁盘层
+    """
+    global _visualization_cache
+    if _visualization_cache is None:
+        with _visualization_cache_lock:
+            if _visualization_cache is None:
+                max_entries = int(os.environ.get('VIS_CACHE_SIZE', 64))
+                if max_entries <= 0:
+                    return None
+                _visualization_cache = ArtifactCache(
+                    max_entries=max_entries,
+                    max_bytes=int(os.environ.get('VIS_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+                    disk_dir=os.environ.get('VIS_CACHE_DIR') or None
+                )
+    return _visualization_cache
@@ -1,4 +1,6 @@
+import functools
 import json
+import os
 
 from rdflib import Graph, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, OWL
@@ -12,33 +14,39 @@ class JSONLDToOWLConverter:
     def convert(self, json_ld_data):
         """将JSON-LD数据转换为OWL格式"""
         try:
-            # 解析JSON-LD数据
-            if isinstance(json_ld_data, str):
-                data = json.loads(json_ld_data)
-            else:
-                data = json_ld_data
-
-            # 处理上下文
-            if '@context' in data:
-                self.context = data['@context']
-
-            # 处理@graph中的数据
-            if '@graph' in data:
-                graph_data = data['@graph']
-                if isinstance(graph_data, list):
-                    for item in graph_data:
-                        self._process_item(item)
-                else:
-                    self._process_item(graph_data)
-            else:
-                # 直接处理顶层对象
-                self._process_item(data)
+            self.build_graph(json_ld_data)
 
             # 返回OWL格式的字符串
             return self.graph.serialize(format='xml')
         except Exception as e:
             raise Exception(f"转换失败: {str(e)}")
 
+    def build_graph(self, json_ld_data):
+        """解析JSON-LD数据并构建RDF图，不做序列化"""
+        # 解析JSON-LD数据
+        if isinstance(json_ld_data, str):
+            data = json.loads(json_ld_data)
+        else:
+            data = json_ld_data
+
+        # 处理上下文
+        if '@context' in data:
+            self.context = data['@context']
+
+        # 处理@graph中的数据
+        if '@graph' in data:
+            graph_data = data['@graph']
+            if isinstance(graph_data, list):
+                for item in graph_data:
+                    self._process_item(item)
+            else:
+                self._process_item(graph_data)
+        else:
+            # 直接处理顶层对象
+            self._process_item(data)
+
+        return self.graph
+
     def _process_item(self, item):
         """处理单个JSON-LD项"""
         if not isinstance(item, dict):
@@ -91,10 +99,12 @@ class JSONLDToOWLConverter:
                 obj = URIRef(value['@id'])
                 self.graph.add((subject, predicate, obj))
             elif '@value' in value:
-                # 处理带类型的文字
+                # 处理带语言标签或类型的文字
                 literal_value = value['@value']
                 if literal_value is not None:
-                    if '@type' in value:
+                    if '@language' in value:
+                        obj = Literal(literal_value, lang=value['@language'])
+                    elif '@type' in value:
                         datatype = self._resolve_uri(value['@type'])
                         obj = Literal(literal_value, datatype=datatype)
                     else:
@@ -137,7 +147,14 @@ class JSONLDToOWLConverter:
 
 
 class OWLToJSONLDConverter:
-    def __init__(self):
+    """将RDF图转换为JSON-LD
+
+    输出按主体逐条生成@graph中的条目，可直接写入文件或响应流；属性名、rdf:type和文字的数据类型
+    按@context中的前缀压缩（如rdfs:label），主体和对象的IRI保持完整，与JSONLDToOWLConverter的解析方式一致。
+    pretty为None时读取环境变量JSONLD_PRETTY，默认输出不缩进的紧凑格式。
+    """
+
+    def __init__(self, pretty=None):
         self.graph = Graph()
         self.context = {
             "rdf": str(RDF),
@@ -145,57 +162,133 @@ class OWLToJSONLDConverter:
             "owl": str(OWL),
             "xsd": "http://www.w3.org/2001/XMLSchema#"
         }
+        if pretty is None:
+            pretty = os.environ.get('JSONLD_PRETTY', 'false').lower() in ('1', 'true', 'yes')
+        self.pretty = pretty
+        self._prefixes = {}
 
     def convert(self, owl_data):
-        """将OWL数据转换为JSON-LD格式"""
+        """将OWL数据转换为JSON-LD格式，owl_data为已解析的rdflib图时直接转换，不重复解析"""
         try:
             # 解析OWL数据
+            if isinstance(owl_data, Graph):
+                return self.convert_triples(owl_data)
             if isinstance(owl_data, str):
                 self.graph.parse(data=owl_data, format='xml')
             else:
                 # 假设owl_data是一个文件路径
                 self.graph.parse(owl_data, format='xml')
 
-            # 构建JSON-LD结构
-            json_ld = {
-                "@context": self.context,
-                "@graph": []
-            }
-
-            # 获取所有唯一的主体
-            subjects = set()
-            for s, p, o in self.graph:
-                subjects.add(s)
-
-            # 为每个主体构建条目
-            for subject in subjects:
-                entry = {"@id": str(subject)}
-
-                # 获取主体的所有属性和值
-                for p, o in self.graph.predicate_objects(subject):
-                    predicate = str(p)
-
-                    # 处理对象
-                    if isinstance(o, Literal):
-                        value = self._process_literal(o)
-                    else:
-                        value = str(o)
-
-                    # 添加到条目中
-                    if predicate in entry:
-                        # 如果属性已存在，转换为列表
-                        if not isinstance(entry[predicate], list):
-                            entry[predicate] = [entry[predicate]]
-                        entry[predicate].append(value)
-                    else:
-                        entry[predicate] = value
-
-                json_ld["@graph"].append(entry)
-
-            return json.dumps(json_ld, ensure_ascii=False, indent=2)
+            return self.convert_triples(self.graph)
         except Exception as e:
             raise Exception(f"转换失败: {str(e)}")
 
+    def convert_triples(self, triples):
+        """将三元组（rdflib图或(s, p, o)序列）转换为JSON-LD字符串"""
+        return ''.join(self.iter_jsonld(triples))
+
+    def write_jsonld(self, triples, fp):
+        """将三元组转换为JSON-LD并逐条写入文本文件对象"""
+        for chunk in self.iter_jsonld(triples):
+            fp.write(chunk)
+
+    def iter_jsonld(self, triples):
+        """逐条生成JSON-LD文本片段，每个@graph条目单独序列化，不在内存中构建完整的文档"""
+        self._prepare_context(triples)
+        if self.pretty:
+            dumps = functools.partial(json.dumps, ensure_ascii=False, indent=2)
+            # 与对整个文档json.dumps(indent=2)的结果相同：@context缩进2格，@graph条目缩进4格
+            yield '{\n  "@context": ' + dumps(self.context).replace('\n', '\n  ') + ',\n  "@graph": ['
+            separator, indent, closing, empty_closing = '\n    ', '\n    ', '\n  ]\n}', ']\n}'
+        else:
+            dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(',', ':'))
+            yield '{"@context":' + dumps(self.context) + ',"@graph":['
+            separator, indent, closing, empty_closing = '', None, ']}', ']}'
+
+        first = True
+        for subject, pairs in self._group_by_subject(triples):
+            text = dumps(self._build_entry(subject, pairs))
+            if indent:
+                text = text.replace('\n', indent)
+            yield (separator if first else ',' + separator) + text
+            first = False
+        yield empty_closing if first else closing
+
+    def _prepare_context(self, triples):
+        """将rdflib图中绑定且被属性或rdf:type用到的命名空间加入@context，建立命名空间到前缀的索引
+
+        @context需要在@graph条目之前输出，这里只遍历不重复的谓词和类型，不聚合条目
+        """
+        if isinstance(triples, Graph):
+            used = {self._namespace_of(p) for p in triples.predicates(unique=True)}
+            used.update(self._namespace_of(o) for o in set(triples.objects(None, RDF.type)))
+            for prefix, namespace in triples.namespaces():
+                namespace = str(namespace)
+                if prefix and namespace in used and prefix not in self.context \
+                        and namespace not in self.context.values():
+                    self.context[prefix] = namespace
+        self._prefixes = {namespace: prefix for prefix, namespace in self.context.items()
+                          if isinstance(namespace, str)}
+
+    @staticmethod
+    def _namespace_of(iri):
+        """取IRI最后一个'#'或'/'之前（含）的部分作为命名空间"""
+        iri = str(iri)
+        return iri[:max(iri.rfind('#'), iri.rfind('/')) + 1]
+
+    def _compact(self, iri):
+        """按@context中的前缀压缩IRI，没有对应前缀时返回完整IRI"""
+        iri = str(iri)
+        namespace = self._namespace_of(iri)
+        if namespace and len(namespace) < len(iri):
+            prefix = self._prefixes.get(namespace)
+            if prefix is not None:
+                return f'{prefix}:{iri[len(namespace):]}'
+        return iri
+
+    @staticmethod
+    def _group_by_subject(triples):
+        """按主体分组，生成(主体, [(谓词, 对象)])
+
+        rdflib图按主体逐个读取其属性，只记录已输出的主体；三元组序列需要先聚合，保持主体首次出现的顺序
+        """
+        if isinstance(triples, Graph):
+            seen = set()
+            for subject in triples.subjects():
+                if subject not in seen:
+                    seen.add(subject)
+                    yield subject, triples.predicate_objects(subject)
+            return
+
+        groups = {}
+        for s, p, o in triples:
+            groups.setdefault(s, []).append((p, o))
+        yield from groups.items()
+
+    def _build_entry(self, subject, pairs):
+        """构建单个主体的JSON-LD条目"""
+        entry = {"@id": str(subject)}
+        for p, o in pairs:
+            if p == RDF.type and isinstance(o, URIRef):
+                predicate, value = "@type", self._compact(o)
+            else:
+                predicate = self._compact(p)
+                # 处理对象
+                if isinstance(o, Literal):
+                    value = self._process_literal(o)
+                else:
+                    value = str(o)
+
+            # 添加到条目中
+            if predicate in entry:
+                # 如果属性已存在，转换为列表
+                if not isinstance(entry[predicate], list):
+                    entry[predicate] = [entry[predicate]]
+                entry[predicate].append(value)
+            else:
+                entry[predicate] = value
+        return entry
+
     def _process_literal(self, literal):
         """处理文字值，包括语言标签和数据类型"""
         value = str(literal)
@@ -211,7 +304,7 @@ class OWLToJSONLDConverter:
         if hasattr(literal, 'datatype') and literal.datatype:
             return {
                 "@value": value,
-                "@type": str(literal.datatype)
+                "@type": self._compact(literal.datatype)
             }
 
         return value
@@ -0,0 +1,152 @@
+"""
+数据库连接模块
+提供线程安全的SQLite连接池，连接启用WAL日志模式并调优PRAGMA参数
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = 'ontology.db'
+
+# 每个连接建立后执行的PRAGMA
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',  # WAL模式下NORMAL即可保证一致性
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',  # 约16MB页缓存
+    'PRAGMA mmap_size=134217728',  # 128MB内存映射
+    'PRAGMA foreign_keys=ON',
+)
+
+
+def get_db_path(db_path=None):
+    """获取数据库路径，未指定时读取环境变量ONTOLOGY_DB_PATH"""
+    return db_path or os.environ.get('ONTOLOGY_DB_PATH', DEFAULT_DB_PATH)
+
+
+class ConnectionPool:
+    """SQLite连接池
+
+    连接在线程间复用（check_same_thread=False），同一时刻只会被一个线程持有；
+    每个连接保留自己的预编译语句缓存，相同SQL重复执行时无需重新编译。
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=30.0, statement_cache_size=256):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.statement_cache_size = statement_cache_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _create_connection(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        conn.execute('PRAGMA journal_mode=WAL')
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """获取一个连接，池已满时阻塞等待其他线程归还"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f'获取数据库连接超时: {self.db_path}')
+
+    def release(self, conn):
+        """归还连接"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """以上下文管理器形式使用连接，正常退出时提交事务，异常时回滚"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    """获取指定数据库路径对应的连接池
+
+    进程fork后子进程不会复用父进程的连接，而是创建新的连接池。
+    """
+    path = get_db_path(db_path)
+    pool = _pools.get(path)
+    if pool is not None and pool._pid == os.getpid():
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None or pool._pid != os.getpid():
+            pool = ConnectionPool(path, max_size=int(os.environ.get('DB_POOL_SIZE', 8)))
+            _pools[path] = pool
+    return pool
+
+
+def connection(db_path=None):
+    """从连接池获取连接的上下文管理器"""
+    return get_pool(db_path).connection()
+
+
+def close_all_pools():
+    """关闭所有连接池中的空闲连接"""
+    with _pools_lock:
+        for pool in _pools.values():
+            if pool._pid == os.getpid():
+                pool.close()
+        _pools.clear()
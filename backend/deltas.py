@@ -0,0 +1,215 @@
+"""
+文本差异存储模块
+版本的原始数据和产物按父版本的同名数据保存为差异（复制/插入操作列表），读取时从完整数据（关键帧）逐级应用差异重建；
+重建结果按存储内容缓存，相邻版本的读取可以复用
+
+差异按行和JSON元素切分文本块后匹配：RDF/XML按行、单行JSON按数组元素和对象成员（含字符串值），
+先跳过公共前缀和后缀，只为中间变化部分建立文本块索引，耗时与修改量相关
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+# 文本块的结束位置：换行符，以及逗号分隔符（json.dumps默认的", "或紧凑的","）前的对象、数组和字符串结尾
+_CHUNK_END = re.compile(r'\n|[}\]"], ?')
+
+# 差异小于原文的该比例时直接采用，不再压缩完整数据比较大小
+SMALL_DELTA_RATIO = 1 / 64
+
+DEFAULT_KEYFRAME_INTERVAL = 16
+DEFAULT_MAX_DELTA_RATIO = 0.5
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def is_delta_storage_enabled():
+    """是否按差异保存版本数据，环境变量DELTA_STORAGE为false时总是保存完整数据"""
+    return os.environ.get('DELTA_STORAGE', 'true').lower() not in ('0', 'false', 'no')
+
+
+def get_keyframe_interval():
+    """差异链的最大长度：基准数据经过的差异超过该数量时保存完整数据（关键帧），环境变量DELTA_KEYFRAME_INTERVAL，默认16"""
+    return int(os.environ.get('DELTA_KEYFRAME_INTERVAL', DEFAULT_KEYFRAME_INTERVAL))
+
+
+def get_max_delta_ratio():
+    """差异压缩后超过完整数据压缩后大小的该比例时保存完整数据，环境变量DELTA_MAX_RATIO，默认0.5"""
+    return float(os.environ.get('DELTA_MAX_RATIO', DEFAULT_MAX_DELTA_RATIO))
+
+
+def common_prefix_length(a, b):
+    """两个字符串公共前缀的长度（二分比较子串，比较在C层完成）"""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix_length(a, b, limit):
+    """两个字符串公共后缀的长度，不超过limit"""
+    len_a, len_b = len(a), len(b)
+    lo, hi = 0, min(limit, len_a, len_b)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len_a - mid:len_a - lo] == b[len_b - mid:len_b - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _chunk_bounds(text, start, end):
+    """text[start:end]切分成的文本块边界[(块起点, 块终点)]"""
+    bounds = []
+    position = start
+    for match in _CHUNK_END.finditer(text, start, end):
+        bounds.append((position, match.end()))
+        position = match.end()
+    if position < end:
+        bounds.append((position, end))
+    return bounds
+
+
+def compute_delta(base, text):
+    """计算从base生成text的差异操作列表
+
+    操作为[起点, 长度]（复制base的一段）或字符串（插入的文本），相邻的复制合并为一个操作
+    """
+    prefix = common_prefix_length(base, text)
+    suffix = common_suffix_length(base, text, min(len(base), len(text)) - prefix)
+    base_end = len(base) - suffix
+    text_end = len(text) - suffix
+
+    ops = []
+    if prefix:
+        ops.append([0, prefix])
+    if text_end > prefix:
+        # 为base中间部分建立文本块索引，重复的文本块保留第一次出现的位置
+        index = {}
+        for chunk_start, chunk_end in _chunk_bounds(base, prefix, base_end):
+            index.setdefault(base[chunk_start:chunk_end], chunk_start)
+        inserted = []
+        copy_start = copy_end = None
+        for chunk_start, chunk_end in _chunk_bounds(text, prefix, text_end):
+            chunk = text[chunk_start:chunk_end]
+            # 优先延续当前的复制操作，使重复出现的文本块也能合并为连续复制
+            if copy_end is not None and base.startswith(chunk, copy_end):
+                copy_end += len(chunk)
+                continue
+            offset = index.get(chunk)
+            if offset is None:
+                if copy_end is not None:
+                    ops.append([copy_start, copy_end - copy_start])
+                    copy_start = copy_end = None
+                inserted.append(chunk)
+                continue
+            if inserted:
+                ops.append(''.join(inserted))
+                inserted = []
+            if copy_end is not None:
+                ops.append([copy_start, copy_end - copy_start])
+            copy_start, copy_end = offset, offset + len(chunk)
+        if copy_end is not None:
+            ops.append([copy_start, copy_end - copy_start])
+        if inserted:
+            ops.append(''.join(inserted))
+    if suffix:
+        ops.append([base_end, suffix])
+    return _merge_copies(ops)
+
+
+def _merge_copies(ops):
+    """合并首尾相接的复制操作"""
+    merged = []
+    for op in ops:
+        if merged and isinstance(op, list) and isinstance(merged[-1], list) and merged[-1][0] + merged[-1][1] == op[0]:
+            merged[-1] = [merged[-1][0], merged[-1][1] + op[1]]
+        else:
+            merged.append(op)
+    return merged
+
+
+def apply_delta(base, ops):
+    """在base上应用差异操作，返回生成的文本"""
+    return ''.join(base[op[0]:op[0] + op[1]] if isinstance(op, list) else op for op in ops)
+
+
+def encode_delta(base, ops):
+    """序列化并压缩差异，记录基准数据长度用于读取时校验"""
+    return zlib.compress(json.dumps({'base_length': len(base), 'ops': ops}, ensure_ascii=False).encode('utf-8'), 6)
+
+
+def decode_delta(data, base):
+    """解压差异并应用到base，基准数据长度与保存时不一致时抛出ValueError"""
+    delta = json.loads(zlib.decompress(data).decode('utf-8'))
+    if delta['base_length'] != len(base):
+        raise ValueError('差异的基准数据不一致')
+    return apply_delta(base, delta['ops'])
+
+
+def storage_key(data):
+    """按保存的内容（完整数据或差异）计算重建缓存的键"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class TextCache:
+    """重建文本的LRU缓存，按总字符数限制大小"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= len(old)
+            self._entries[key] = text
+            self._total += size
+            while self._total > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    """获取重建文本缓存（进程内单例），环境变量DELTA_CACHE_BYTES为最大字符数，默认256M，设为0禁用"""
+    global _text_cache
+    if _text_cache is None:
+        with _text_cache_lock:
+            if _text_cache is None:
+                max_bytes = int(os.environ.get('DELTA_CACHE_BYTES', DEFAULT_CACHE_BYTES))
+                if max_bytes <= 0:
+                    return None
+                _text_cache = TextCache(max_bytes)
+    return _text_cache
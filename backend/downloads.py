@@ -0,0 +1,137 @@
+"""
+本体文件下载模块
+按格式（owl/jsonld/ttl/nt）分块生成下载内容，支持ETag条件请求和gzip/brotli压缩
+
+OWL和JSON-LD读取保存的产物并逐块解压输出；Turtle和N-Triples从原始数据解析后生成。
+brotli为可选依赖，未安装时只提供gzip压缩。
+"""
+
+import zlib
+from urllib.parse import urljoin
+
+from rdflib import Literal, URIRef
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 每次输出的字节数
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 下载格式：MIME类型、文件扩展名，以及对应的已保存产物或rdflib序列化格式
+DOWNLOAD_FORMATS = {
+    'owl': {'mimetype': 'application/rdf+xml', 'extension': 'owl', 'artifact': 'owl_data'},
+    'jsonld': {'mimetype': 'application/ld+json', 'extension': 'jsonld', 'artifact': 'jsonld_data'},
+    'ttl': {'mimetype': 'text/turtle', 'extension': 'ttl', 'serializer': 'turtle'},
+    'nt': {'mimetype': 'application/n-triples', 'extension': 'nt', 'serializer': 'nt'},
+}
+
+
+def supported_encodings():
+    """服务端支持的内容编码，按优先级排列"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def download_etag(content_hash, data_format):
+    """生成下载内容的ETag响应头（W/"..."格式）
+
+    ETag由本体内容哈希和格式决定，同一内容在不同压缩方式或序列化顺序下语义相同，因此使用弱ETag
+    """
+    return f'W/"{content_hash}-{data_format}"'
+
+
+def iter_artifact(encoding, data, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """按块输出保存的产物（UTF-8字节），zlib压缩的产物逐块解压，不在内存中还原完整文本"""
+    if data is None:
+        return
+    if encoding == 'zlib':
+        decompressor = zlib.decompressobj()
+        pending = data
+        while pending:
+            chunk = decompressor.decompress(pending, chunk_size)
+            pending = decompressor.unconsumed_tail
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+        return
+    yield from iter_text(data, chunk_size)
+
+
+def iter_text(text, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """按块输出字符串或字节串"""
+    if isinstance(text, str):
+        for start in range(0, len(text), chunk_size):
+            yield text[start:start + chunk_size].encode('utf-8')
+    else:
+        for start in range(0, len(text), chunk_size):
+            yield text[start:start + chunk_size]
+
+
+def _nt_term(term, base):
+    """将RDF项格式化为N-Triples表示
+
+    文字中的换行和引号需要转义（n3()对多行文字使用Turtle的三引号）；
+    N-Triples只允许绝对IRI，相对IRI（如rdf:about=""的本体声明）按base解析
+    """
+    if isinstance(term, URIRef) and ':' not in term:
+        return f'<{urljoin(base, term)}>'
+    if isinstance(term, Literal):
+        value = str(term).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        if term.language:
+            return f'"{value}"@{term.language}'
+        if term.datatype:
+            return f'"{value}"^^<{term.datatype}>'
+        return f'"{value}"'
+    return term.n3()
+
+
+def iter_ntriples(graph, base, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """逐个三元组生成N-Triples，按块合并输出，相对IRI按base解析"""
+    lines = []
+    size = 0
+    for s, p, o in graph:
+        line = f'{_nt_term(s, base)} {_nt_term(p, base)} {_nt_term(o, base)} .\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines).encode('utf-8')
+            lines, size = [], 0
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+
+def iter_serialized(graph, data_format, base, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """生成rdflib图的指定格式下载内容，base为解析相对IRI的基准地址
+
+    N-Triples逐行生成；Turtle需要按主体分组和前缀整理，由rdflib一次性序列化后分块输出
+    """
+    serializer = DOWNLOAD_FORMATS[data_format]['serializer']
+    if serializer == 'nt':
+        yield from iter_ntriples(graph, base, chunk_size)
+    else:
+        yield from iter_text(graph.serialize(format=serializer, encoding='utf-8', base=base), chunk_size)
+
+
+def compress_chunks(chunks, content_encoding):
+    """按内容编码压缩输出块，content_encoding为None时原样输出"""
+    if content_encoding is None:
+        yield from chunks
+        return
+
+    if content_encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        # wbits=31输出gzip格式
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    data = finish()
+    if data:
+        yield data
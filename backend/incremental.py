@@ -0,0 +1,490 @@
+"""
+增量更新模块
+修改版本的本体数据时，只重新读取修改前后发生变化的顶层元素，按三元组差异更新提取索引，
+再只重新生成受影响实体的网络图节点和tree子树，其余节点和子树沿用修改前的产物，结果与完整生成相同（包括顺序）
+
+完整生成产物时，流式解析器读取的提取所需三元组（类型、标签、注释、定义域/值域、子类和限制三元组）
+按所在的顶层元素随版本保存为index产物；修改时比较新旧数据的公共前缀和后缀，定位包含修改的顶层元素，
+只读取新数据中的这段元素，替换index中对应元素的三元组后按文档顺序重建提取索引。
+无法增量更新时（JSON-LD数据、非流式解析器、修改了根元素或文档声明、修改范围过大等）返回None，由调用方完整生成。
+"""
+
+import bisect
+import logging
+import os
+from itertools import chain
+from xml.etree.ElementTree import ParseError
+
+from rdflib import Literal
+
+from cache import content_hash
+from convert import detect_data_type
+from deltas import common_prefix_length, common_suffix_length
+from metrics import span
+from parsers import (ENTITY_TYPES, INDEXED_PREDICATES, RDF_TYPE, RDFS_COMMENT, RDFS_LABEL, RDFS_SUBCLASS_OF,
+                     OWLParser, StreamingOWLParser, get_parser_backend, is_meaningless_node, make_text)
+from rdfxml import RDFXMLReader, scan_top_level, split_top_level
+from visualization import build_graph_edges, is_graph_data, make_graph_node, make_tree_node
+
+logger = logging.getLogger(__name__)
+
+# 提取索引产物的格式版本，格式变化时递增，旧格式的索引不再用于增量更新
+INDEX_FORMAT_VERSION = 3
+
+# 需要重新读取的内容超过文档的该比例时直接完整生成
+MAX_CHANGED_FRACTION = 0.5
+
+_CLASS, _DATATYPE_PROPERTY, _OBJECT_PROPERTY, _RESTRICTION = ENTITY_TYPES
+_RDF_TYPE = str(RDF_TYPE)
+_SUBCLASS_OF = str(RDFS_SUBCLASS_OF)
+# index产物中三元组的谓词按在该元组中的下标保存
+STATEMENT_PREDICATES = (_RDF_TYPE, _SUBCLASS_OF) + tuple(str(predicate) for predicate in INDEXED_PREDICATES)
+_PREDICATE_CODES = {predicate: code for code, predicate in enumerate(STATEMENT_PREDICATES)}
+_ENTITY_TYPE_URIS = frozenset(str(type_uri) for type_uri in ENTITY_TYPES)
+# 变化后需要重新生成检索文本的谓词和类型
+_SEARCH_PREDICATES = frozenset((_PREDICATE_CODES[str(RDFS_LABEL)], _PREDICATE_CODES[str(RDFS_COMMENT)]))
+_SEARCH_TYPES = frozenset((str(_CLASS), str(_DATATYPE_PROPERTY), str(_OBJECT_PROPERTY)))
+
+
+class IncrementalUpdateUnsupported(Exception):
+    """本次修改无法增量更新，需要完整生成"""
+
+
+def is_incremental_update_enabled():
+    """是否启用增量更新，环境变量INCREMENTAL_UPDATE为false时修改版本数据总是完整生成产物"""
+    return os.environ.get('INCREMENTAL_UPDATE', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _statement(subject, predicate, obj):
+    """index中保存的三元组(主体, 谓词下标, 宾语)：带语言标签的文字保存为(文本, 语言标签)，其余宾语为字符串
+
+    提取所需以外的三元组返回None
+    """
+    if predicate == _RDF_TYPE:
+        return (subject, 0, obj) if obj in _ENTITY_TYPE_URIS else None
+    code = _PREDICATE_CODES.get(predicate)
+    if code is None:
+        return None
+    if isinstance(obj, Literal) and obj.language and predicate != _SUBCLASS_OF:
+        return subject, code, (str(obj), obj.language)
+    return subject, code, str(obj)
+
+
+def make_index_artifact(parser, ontology_data):
+    """从流式解析器的读取结果生成index产物，不是流式解析器或数据不是RDF/XML字符串时返回空字符串
+
+    每个顶层元素记录为[与前一元素结尾的间隔, 长度, 起始空白节点编号, 结束空白节点编号, 三元组数量, 提取所需的三元组]，
+    顶层元素在文本中的位置在首次增量更新时才定位，此前间隔和长度为None
+    """
+    if not isinstance(parser, StreamingOWLParser) or not isinstance(ontology_data, str):
+        return ''
+    if parser.triple_count and not parser.top_level_bnodes:
+        # 根元素不是rdf:RDF
+        return ''
+    elements = []
+    statements = parser.statements
+    position = 0
+    bnode_start = triple_start = 0
+    for bnode_end, triple_end in zip(parser.top_level_bnodes, parser.top_level_triples):
+        element_statements = []
+        while position < len(statements) and statements[position][0] < triple_end:
+            element_statements.append(_statement(*statements[position][1:]))
+            position += 1
+        elements.append([None, None, bnode_start, bnode_end, triple_end - triple_start, element_statements])
+        bnode_start, triple_start = bnode_end, triple_end
+    return {
+        'version': INDEX_FORMAT_VERSION,
+        'hash': content_hash(ontology_data),
+        'triples': parser.triple_count,
+        'layout': None,
+        'next_bnode': bnode_start,
+        'elements': elements
+    }
+
+
+def build_index_artifact(ontology_data):
+    """只读取数据建立提取索引并生成index产物（不提取实体信息），数据不是RDF/XML字符串时返回空字符串"""
+    if not isinstance(ontology_data, str) or detect_data_type(ontology_data) != 'owl':
+        return ''
+    parser = StreamingOWLParser(ontology_data)
+    parser._index_triples()
+    return make_index_artifact(parser, ontology_data)
+
+
+def _pack_elements(elements):
+    """index产物中保存的顶层元素：位置记录为与前一元素结尾的间隔和长度
+
+    相对位置使修改只改变所在元素的记录，其后的元素不随偏移整体变化，index产物可以保存为较小的差异
+    """
+    packed = []
+    previous = 0
+    for start, end, *rest in elements:
+        if start is None:
+            packed.append([None, None, *rest])
+        else:
+            packed.append([start - previous, end - start, *rest])
+            previous = end
+    return packed
+
+
+def _unpack_elements(elements):
+    """将index产物中的顶层元素还原为[起点, 终点, 起始空白节点编号, 结束空白节点编号, 三元组数量, 三元组]"""
+    unpacked = []
+    previous = 0
+    for gap, length, bnode_start, bnode_end, triples, statements in elements:
+        for statement in statements:
+            # JSON中的(文本, 语言标签)为列表，转换为元组用作字典键
+            if isinstance(statement[2], list):
+                statement[2] = tuple(statement[2])
+        if gap is None:
+            unpacked.append([None, None, bnode_start, bnode_end, triples, statements])
+        else:
+            start = previous + gap
+            previous = start + length
+            unpacked.append([start, previous, bnode_start, bnode_end, triples, statements])
+    return unpacked
+
+
+def _load_index(artifact, ontology_data):
+    """读取index产物，还原顶层元素的位置，产物格式不同或与ontology_data不对应时抛出IncrementalUpdateUnsupported"""
+    if not isinstance(artifact, dict) or artifact.get('version') != INDEX_FORMAT_VERSION:
+        raise IncrementalUpdateUnsupported('没有可用的提取索引')
+    if artifact['hash'] != content_hash(ontology_data):
+        raise IncrementalUpdateUnsupported('提取索引与原数据不一致')
+    return dict(artifact, elements=_unpack_elements(artifact['elements']))
+
+
+class IndexedParser(OWLParser):
+    """从index产物的顶层元素三元组重建提取索引的解析器
+
+    按文档顺序重建的索引与完整读取相同，只为指定的实体提取信息，提取结果的结构与完整提取相同，
+    可直接用于生成网络图节点、三元组关系和tree节点
+    """
+
+    def __init__(self, elements, triple_count, layout=None, next_bnode=0):
+        super().__init__(None)
+        self.elements = elements
+        self.layout = layout
+        self.next_bnode = next_bnode
+        self._index_triple_stream((subject, STATEMENT_PREDICATES[code], obj)
+                                  for element in elements for subject, code, obj in element[5])
+        self.triple_count = triple_count
+        self._superclasses = {}
+        for subject, superclass in self._subclass_pairs:
+            self._superclasses.setdefault(subject, []).append(superclass)
+        self._class_infos = {}
+
+    def _objects(self, subject, predicate):
+        """索引中带语言标签的文字保存为(文本, 语言标签)，读取时转换为Literal"""
+        return [Literal(obj[0], lang=obj[1]) if isinstance(obj, tuple) else obj
+                for obj in self._index[predicate].get(str(subject), ())]
+
+    def to_artifact(self, content):
+        """生成content对应的index产物"""
+        return {
+            'version': INDEX_FORMAT_VERSION,
+            'hash': content_hash(content),
+            'triples': self.triple_count,
+            'layout': self.layout,
+            'next_bnode': self.next_bnode,
+            'elements': _pack_elements(self.elements)
+        }
+
+    def is_class(self, uri):
+        return uri in self._types[_CLASS]
+
+    def is_tree_root(self, uri):
+        """uri是否为tree的根节点：是类，且不是任何类的子类"""
+        classes = self._types[_CLASS]
+        return uri in classes and not any(superclass in classes for superclass in self._superclasses.get(uri, ()))
+
+    def tree_children(self):
+        """tree中各类的子类列表（按子类关系的顺序，只包含类）"""
+        classes = self._types[_CLASS]
+        children = {}
+        for subject, superclass in self._subclass_pairs:
+            if subject in classes and superclass in classes:
+                children.setdefault(superclass, []).append(subject)
+        return children
+
+    def tree_ancestors(self, uris):
+        """uris中的类及其在tree中的全部祖先"""
+        classes = self._types[_CLASS]
+        found = set()
+        pending = [uri for uri in uris if uri in classes]
+        while pending:
+            uri = pending.pop()
+            if uri in found:
+                continue
+            found.add(uri)
+            pending.extend(superclass for superclass in self._superclasses.get(uri, ()) if superclass in classes)
+        return found
+
+    def graph_node_ids(self):
+        """按build_graph_data的顺序列出网络图节点的URI：类、数据属性、对象属性中有意义的节点，以及全部限制"""
+        ids = {}
+        for type_uri in (_CLASS, _DATATYPE_PROPERTY, _OBJECT_PROPERTY):
+            for uri in self._types[type_uri]:
+                if not is_meaningless_node(uri):
+                    ids[uri] = None
+        ids.update(dict.fromkeys(self._types[_RESTRICTION]))
+        return ids
+
+    def class_info(self, uri):
+        info = self._class_infos.get(uri)
+        if info is None:
+            info = self._class_infos[uri] = self._class_info(uri)
+        return info
+
+    def extract(self, subjects):
+        """只提取subjects中各实体的信息，子类、定义域和值域关系全部提取"""
+        self.classes = {uri: self.class_info(uri) for uri in subjects if uri in self._types[_CLASS]}
+        self.datatype_properties = {uri: self._property_info(uri, 'DatatypeProperty')
+                                    for uri in subjects if uri in self._types[_DATATYPE_PROPERTY]}
+        self.object_properties = {uri: self._property_info(uri, 'ObjectProperty')
+                                  for uri in subjects if uri in self._types[_OBJECT_PROPERTY]}
+        self.restrictions = {uri: self._restriction_info(uri)
+                             for uri in subjects if uri in self._types[_RESTRICTION]}
+        self.subclass_relations = []
+        self.domain_range_relations = []
+        self._extract_relations()
+
+    def get_search_text(self):
+        """全部类和属性的检索文本"""
+        return self._search_text(chain(self._types[_CLASS], self._types[_DATATYPE_PROPERTY],
+                                       self._types[_OBJECT_PROPERTY]))
+
+    def _search_text(self, uris):
+        """与OWLParser._search_text相同，直接读取索引中保存的文本，不为每个标签构造Literal"""
+        labels = []
+        comments = []
+        label_values = self._index[RDFS_LABEL]
+        comment_values = self._index[RDFS_COMMENT]
+        for uri in uris:
+            labels.append(self._get_local_name(uri))
+            labels.extend(_text(obj) for obj in label_values.get(uri, ()))
+            comments.extend(_text(obj) for obj in comment_values.get(uri, ()))
+        return '\n'.join(labels), '\n'.join(comments)
+
+
+def _text(obj):
+    """索引中保存的宾语的文本"""
+    return obj[0] if isinstance(obj, tuple) else obj
+
+
+def _read_elements(text, head, tail, start, end, bnode_start):
+    """读取text[start:end]中的顶层元素（前后加上text[:head]和text[tail:]中的文档声明和根元素标签），返回(三元组列表, 读取器)"""
+    document = text[:head] + text[start:end] + text[tail:]
+    reader = RDFXMLReader(document, literal=make_text, bnode_start=bnode_start)
+    try:
+        triples = list(reader.triples())
+    except ParseError as e:
+        raise IncrementalUpdateUnsupported(f'无法读取修改的元素: {e}')
+    return triples, reader
+
+
+def _element_records(triples, reader, spans, bnode_start):
+    """按读取器记录的顶层元素边界将三元组分到各顶层元素，生成与index产物相同的顶层元素记录"""
+    records = []
+    previous_bnode = bnode_start
+    previous_triple = 0
+    for (start, end), bnode_end, triple_end in zip(spans, reader.top_level_bnodes, reader.top_level_triples):
+        statements = [statement for statement in (_statement(*triple) for triple in triples[previous_triple:triple_end])
+                      if statement is not None]
+        records.append([start, end, previous_bnode, bnode_end, triple_end - previous_triple, statements])
+        previous_bnode, previous_triple = bnode_end, triple_end
+    return records
+
+
+def _ensure_layout(index, text):
+    """首次增量更新时定位原数据各顶层元素的位置"""
+    if index['layout'] is not None:
+        return index['layout']
+    split = split_top_level(text)
+    if split is None or len(split[2]) != len(index['elements']):
+        raise IncrementalUpdateUnsupported('无法定位原数据的顶层元素')
+    head, tail, spans = split
+    for element, (start, end) in zip(index['elements'], spans):
+        element[0], element[1] = start, end
+    index['layout'] = {'head': head, 'tail': tail}
+    return index['layout']
+
+
+def _replace_elements(index, previous_data, ontology_data):
+    """比较新旧数据，重新读取变化的顶层元素，返回(修改后数据的解析器, 被替换的元素记录, 新读取的元素记录)"""
+    layout = _ensure_layout(index, previous_data)
+    head, tail, elements = layout['head'], layout['tail'], index['elements']
+
+    # 在根元素结束标签前插入内容时，公共前缀可能延伸到结束标签内，截断到结束标签之前
+    prefix = min(common_prefix_length(previous_data, ontology_data), tail)
+    suffix = common_suffix_length(previous_data, ontology_data, min(len(previous_data), len(ontology_data)) - prefix)
+    changed_end = len(previous_data) - suffix
+    if prefix < head or changed_end > tail:
+        raise IncrementalUpdateUnsupported('修改了文档声明或根元素')
+
+    # 包含修改的顶层元素为elements[first:last]，前后的元素在新数据中不变，其后的元素整体偏移delta
+    ends = [element[1] for element in elements]
+    starts = [element[0] for element in elements]
+    first = bisect.bisect_right(ends, prefix)
+    last = bisect.bisect_left(starts, changed_end)
+    start = elements[first - 1][1] if first else head
+    end = elements[last][0] if last < len(elements) else tail
+    delta = len(ontology_data) - len(previous_data)
+    if end - start > MAX_CHANGED_FRACTION * len(previous_data):
+        raise IncrementalUpdateUnsupported('修改范围过大')
+    if 'nodeID' in previous_data[start:end] or 'nodeID' in ontology_data[start:end + delta]:
+        # rdf:nodeID可在不同顶层元素间引用同一空白节点，不能单独读取
+        raise IncrementalUpdateUnsupported('修改的元素使用了rdf:nodeID')
+
+    new_spans = scan_top_level(ontology_data, start, end + delta)
+    if new_spans is None:
+        raise IncrementalUpdateUnsupported('无法定位修改后的顶层元素')
+
+    # 新元素优先沿用旧元素的空白节点编号（编号连续且数量足够时），否则从未使用的编号开始
+    next_bnode = index['next_bnode']
+    contiguous = last > first and all(elements[i][2] == elements[i - 1][3] for i in range(first + 1, last))
+    bnode_start = elements[first][2] if contiguous else next_bnode
+    triples, reader = _read_elements(ontology_data, head, tail + delta, start, end + delta, bnode_start)
+    if contiguous and reader.top_level_bnodes and reader.top_level_bnodes[-1] > elements[last - 1][3]:
+        bnode_start = next_bnode
+        triples, reader = _read_elements(ontology_data, head, tail + delta, start, end + delta, bnode_start)
+    if len(reader.top_level_bnodes) != len(new_spans):
+        raise IncrementalUpdateUnsupported('无法定位修改后的顶层元素')
+    if bnode_start == next_bnode and reader.top_level_bnodes:
+        next_bnode = reader.top_level_bnodes[-1]
+
+    removed = elements[first:last]
+    added = _element_records(triples, reader, new_spans, bnode_start)
+    shifted = [[element_start + delta, element_end + delta, *rest] for element_start, element_end, *rest in elements[last:]]
+    triple_count = index['triples'] + sum(record[4] for record in added) - sum(record[4] for record in removed)
+    edited = IndexedParser(elements[:first] + added + shifted, triple_count,
+                           {'head': head, 'tail': tail + delta}, next_bnode)
+    return edited, removed, added
+
+
+def apply_edit(previous_data, ontology_data, previous, parser_backend=None):
+    """根据修改前的数据和产物增量生成修改后的产物，无法增量更新时返回None
+
+    previous为修改前的graph、tree、table和index产物；返回的产物只包含发生变化的部分和新的index，
+    不包含OWL/JSON-LD格式数据（由pipeline.rebuild_artifacts另行生成）
+    """
+    if not is_incremental_update_enabled() or get_parser_backend(parser_backend) != 'stream':
+        return None
+    if not isinstance(previous_data, str) or not isinstance(ontology_data, str):
+        return None
+    try:
+        index = _load_index(previous.get('index'), previous_data)
+        if detect_data_type(ontology_data) != 'owl':
+            raise IncrementalUpdateUnsupported('只支持RDF/XML数据')
+        if not is_graph_data(previous.get('graph')) or not isinstance(previous.get('tree'), dict) \
+                or not isinstance(previous.get('table'), list):
+            raise IncrementalUpdateUnsupported('缺少可修改的产物')
+
+        with span('diff'):
+            parser, removed, added = _replace_elements(index, previous_data, ontology_data)
+        with span('patch'):
+            artifacts = _apply_changes(parser, removed, added, previous)
+    except IncrementalUpdateUnsupported as e:
+        logger.info("无法增量更新，完整生成产物: %s", e)
+        return None
+
+    artifacts['index'] = parser.to_artifact(ontology_data)
+    stats = {'elements': len(removed) + len(added),
+             'changed_triples': sum(len(record[5]) for record in chain(removed, added)),
+             'triples': parser.triple_count}
+    logger.info("增量更新完成: 重新读取 %(elements)s 个顶层元素, %(changed_triples)s 个三元组变化",
+                stats, extra={'fields': stats})
+    return artifacts
+
+
+def _apply_changes(parser, removed, added, previous):
+    """根据替换的顶层元素重新生成受影响的产物部分，parser为修改后数据的解析器"""
+    removed = [statement for record in removed for statement in record[5]]
+    added = [statement for record in added for statement in record[5]]
+    if removed == added:
+        return {}
+
+    # 信息需要重新生成的实体：三元组所在元素发生变化的主体，以及宾语顺序可能变化的主体
+    # （主体的宾语按宾语在该谓词下首次出现的位置排列，增删的宾语可能改变其他主体中这些宾语的顺序）
+    subjects = dict.fromkeys(subject for subject, _, _ in chain(removed, added))
+    touched = {}
+    for _, code, obj in chain(removed, added):
+        if code >= 2:
+            touched.setdefault(INDEXED_PREDICATES[code - 2], set()).add(obj)
+    for predicate, objects in touched.items():
+        for subject, values in parser._index[predicate].items():
+            if len(values) > 1 and subject not in subjects and not objects.isdisjoint(values):
+                subjects[subject] = None
+    parser.extract(subjects)
+
+    artifacts = {
+        'graph': _patch_graph(previous['graph'], parser, subjects),
+        'table': parser.get_all_relations(),
+        'tree': _patch_tree(previous['tree'], parser, subjects)
+    }
+    if any(code in _SEARCH_PREDICATES or (code == 0 and obj in _SEARCH_TYPES) for _, code, obj in chain(removed, added)):
+        labels, comments = parser.get_search_text()
+        artifacts['search'] = {'labels': labels, 'comments': comments}
+    return artifacts
+
+
+def _patch_graph(graph_data, parser, subjects):
+    """按完整生成的顺序排列节点，重新生成subjects的节点，其余节点沿用原节点；边按新的节点下标全部重新生成"""
+    stored = {node['id']: node for node in graph_data['nodes']}
+    nodes = []
+    for uri in parser.graph_node_ids():
+        node = make_graph_node(uri, parser) if uri in subjects else stored.get(uri)
+        if node is None:
+            raise IncrementalUpdateUnsupported('网络图与提取索引不一致')
+        nodes.append(node)
+    node_index = {node['id']: i for i, node in enumerate(nodes)}
+    return {**graph_data, 'nodes': nodes, 'edges': build_graph_edges(parser, node_index)}
+
+
+def _patch_tree(tree, parser, subjects):
+    """只重新生成tree中受影响的子树
+
+    信息变化的类（subjects中的类）和子类列表变化的类重新生成，其祖先重新组装子节点列表；
+    其余类的子树与修改前相同，沿用原节点
+    """
+    # 修改前tree中各类的节点（同一个类在多个父类下时子树相同）
+    stored = {}
+    pending = list(tree.get('children', []))
+    while pending:
+        node = pending.pop()
+        if node['id'] not in stored:
+            stored[node['id']] = node
+            pending.extend(node['children'])
+
+    classes = parser._types[_CLASS]
+    children = parser.tree_children()
+    info_changed = {uri for uri in subjects if uri in classes}
+    changed = set(info_changed)
+    changed.update(uri for uri, node in stored.items()
+                   if [child['id'] for child in node['children']] != children.get(uri, []))
+    changed.update(uri for uri in children if uri not in stored)
+    dirty = parser.tree_ancestors(changed)
+
+    patched = {}
+    building = set()
+
+    def build(uri):
+        node = patched.get(uri)
+        if node is not None:
+            return node
+        old_node = stored.get(uri)
+        if old_node is not None and uri not in dirty:
+            return old_node
+        if uri in building:
+            raise IncrementalUpdateUnsupported('子类关系存在循环')
+        building.add(uri)
+        node_children = [build(child) for child in children.get(uri, ())]
+        building.discard(uri)
+        if old_node is not None and uri not in info_changed:
+            node = {**old_node, 'children': node_children}
+        else:
+            node = make_tree_node(uri, parser.class_info(uri), node_children)
+        patched[uri] = node
+        return node
+
+    return {**tree, 'children': [build(uri) for uri in classes if parser.is_tree_root(uri)]}
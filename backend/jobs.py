@@ -0,0 +1,109 @@
+"""
+后台任务队列模块
+在本地线程池中执行本体导入任务，任务状态持久化到数据库，可通过任务ID查询；
+任务记录执行它的进程，进程重启或崩溃后遗留的未完成任务在下次启动时重新执行
+"""
+
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+
+def _process_start_time(pid):
+    """进程的启动时间（读取Linux的/proc，其他平台返回空字符串），与PID一起识别进程，避免PID被复用时误判"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ''
+
+
+def _current_owner():
+    """当前进程的任务owner标识：主机名:PID:启动时间"""
+    pid = os.getpid()
+    return f'{socket.gethostname()}:{pid}:{_process_start_time(pid)}'
+
+
+def _is_owner_alive(owner):
+    """owner对应的进程是否仍在运行；没有owner的任务（迁移前创建）视为已退出，其他主机上的进程无法判断，视为运行中"""
+    if not owner:
+        return False
+    host, pid, start_time = owner.rsplit(':', 2)
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    except (ValueError, OSError):
+        return False
+    return _process_start_time(pid) == start_time
+
+
+class JobQueue:
+    """基于线程池的本地任务队列"""
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ingest')
+        self._pid = os.getpid()
+        self.owner = _current_owner()
+
+    def submit(self, kind, version_id, func, *args):
+        """提交任务，返回任务ID"""
+        job_id = IngestJob.create(kind, version_id, self.owner)
+        self._executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    def recover(self, func):
+        """接管所属进程已退出的排队中/执行中任务，以func(version_id)重新执行，返回接管的任务ID列表
+
+        多个进程同时启动时每个任务只会被一个进程接管
+        """
+        recovered = []
+        for job_id, version_id, owner in IngestJob.get_unfinished():
+            if _is_owner_alive(owner) or not IngestJob.claim(job_id, owner, self.owner):
+                continue
+            logger.warning("任务 %s 所属进程已退出，重新执行版本 %s 的导入", job_id, version_id)
+            self._executor.submit(self._run, job_id, func, (version_id,))
+            recovered.append(job_id)
+        return recovered
+
+    def _run(self, job_id, func, args):
+        IngestJob.update_status(job_id, IngestJob.RUNNING)
+        try:
+            func(*args)
+        except Exception as e:
+            logger.exception("任务 %s 执行失败: %s", job_id, e)
+            IngestJob.update_status(job_id, IngestJob.FAILED, str(e))
+            return
+        IngestJob.update_status(job_id, IngestJob.SUCCEEDED)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """获取全局任务队列（首次调用时创建，工作线程数由环境变量INGEST_WORKERS指定，默认2）"""
+    global _job_queue
+    if _job_queue is None or _job_queue._pid != os.getpid():
+        with _job_queue_lock:
+            if _job_queue is None or _job_queue._pid != os.getpid():
+                _job_queue = JobQueue(max_workers=int(os.environ.get('INGEST_WORKERS', 2)))
+    return _job_queue
+
+
+def is_async_ingest():
+    """是否异步导入，默认在请求线程中同步处理；环境变量INGEST_MODE为async时在后台任务中处理，客户端需轮询任务状态"""
+    return os.environ.get('INGEST_MODE', 'sync').lower() == 'async'
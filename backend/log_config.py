@@ -0,0 +1,49 @@
+"""
+日志配置模块
+各模块通过logging.getLogger(__name__)获取日志记录器，由入口程序调用configure_logging统一设置级别和输出格式
+
+环境变量：
+- LOG_LEVEL: 日志级别（DEBUG/INFO/WARNING/ERROR），默认INFO；逐阶段的调试信息只在DEBUG级别输出
+- LOG_FORMAT: text（默认）或json，json时每条日志输出为一行JSON，便于日志系统采集
+"""
+
+import json
+import logging
+import os
+import sys
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON，extra={'fields': {...}}中的字段合并到输出中"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, log_format=None):
+    """配置根日志记录器，重复调用时替换之前配置的处理器"""
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    log_format = (log_format or os.environ.get('LOG_FORMAT', 'text')).lower()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler._ontology_handler = True
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if getattr(h, '_ontology_handler', False)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,128 @@
+"""
+性能指标模块
+记录导入流程各阶段和HTTP请求的耗时：
+- 每个阶段的耗时计入进程内的直方图，由/api/metrics以Prometheus文本格式输出
+- 在请求上下文中执行的阶段同时记录到当前请求，由API层写入Server-Timing响应头
+
+指标保存在当前进程内，多进程部署时各工作进程分别统计。
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# 直方图桶上限（秒），覆盖从毫秒级的小本体到分钟级的大本体
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 当前请求的阶段耗时列表[(阶段名, 秒数)]，不在请求中时为None
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """按标签分组的累积直方图（线程安全）"""
+
+    def __init__(self, name, documentation, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """记录一次观测值，label_values与label_names一一对应"""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """输出Prometheus文本格式的行列表"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total, count)
+                              for labels, (counts, total, count) in self._series.items())
+        for label_values, counts, total, count in snapshot:
+            labels = ','.join(f'{name}="{_escape_label(value)}"'
+                              for name, value in zip(self.label_names, label_values))
+            prefix = f'{labels},' if labels else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+STAGE_SECONDS = Histogram(
+    'ontology_stage_duration_seconds', '本体处理各阶段耗时', ('stage',))
+REQUEST_SECONDS = Histogram(
+    'ontology_http_request_duration_seconds', 'HTTP请求处理耗时', ('method', 'endpoint', 'status'))
+
+
+def record(stage, seconds, timings=None):
+    """记录一个阶段的耗时
+
+    timings为None时记录到当前请求（如有）；在其他线程中完成的阶段可传入提交时取得的请求耗时列表
+    """
+    STAGE_SECONDS.observe(seconds, stage)
+    if timings is None:
+        timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def span(stage):
+    """计时上下文，退出时（包括抛出异常时）记录阶段耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def current_timings():
+    """获取当前请求的阶段耗时列表，不在请求中时返回None"""
+    return _request_timings.get()
+
+
+def start_request():
+    """开始记录当前请求的阶段耗时，返回用于finish_request的令牌"""
+    return _request_timings.set([])
+
+
+def finish_request(token):
+    """结束当前请求的记录，返回[(阶段名, 秒数)]列表"""
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+def format_server_timing(timings, total=None):
+    """将阶段耗时格式化为Server-Timing响应头，同名阶段合并累加，耗时单位为毫秒"""
+    merged = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    entries = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in merged.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def render_prometheus(extra_lines=()):
+    """输出全部指标的Prometheus文本格式"""
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render()
+    lines.extend(extra_lines)
+    return '\n'.join(lines) + '\n'
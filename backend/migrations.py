@@ -0,0 +1,267 @@
+"""
+数据库结构迁移模块
+使用PRAGMA user_version记录结构版本，启动时只执行尚未应用的迁移，已有数据保持不变
+"""
+
+import json
+import logging
+import sqlite3
+import zlib
+
+from db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def _column_exists(conn, table, column):
+    """检查表中是否存在指定列"""
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info([{table}])'))
+
+
+def _create_versions_table(conn):
+    """创建版本表"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ontology_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            ontology_data TEXT,
+            owl_data TEXT,
+            jsonld_data TEXT,
+            graph TEXT,
+            tree TEXT,
+            [table] TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _add_content_hash_columns(conn):
+    """添加内容哈希列，用于判断OWL/JSON-LD格式数据是否过期"""
+    for column in ('content_hash', 'formats_hash'):
+        if not _column_exists(conn, 'ontology_versions', column):
+            conn.execute(f'ALTER TABLE ontology_versions ADD COLUMN {column} TEXT')
+
+
+def _split_artifacts(conn):
+    """将OWL/JSON-LD数据和可视化产物移到独立的ontology_artifacts表，版本表只保留元数据和原始数据"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ontology_artifacts (
+            version_id INTEGER NOT NULL REFERENCES ontology_versions(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            encoding TEXT NOT NULL DEFAULT 'raw',
+            data BLOB,
+            PRIMARY KEY (version_id, name)
+        )
+    ''')
+    for name in ('owl_data', 'jsonld_data', 'graph', 'tree', 'table'):
+        if not _column_exists(conn, 'ontology_versions', name):
+            continue
+        conn.execute(f'''
+            INSERT OR REPLACE INTO ontology_artifacts (version_id, name, encoding, data)
+            SELECT id, ?, 'raw', [{name}] FROM ontology_versions WHERE [{name}] IS NOT NULL
+        ''', (name,))
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            conn.execute(f'ALTER TABLE ontology_versions DROP COLUMN [{name}]')
+        else:
+            # 旧版SQLite不支持DROP COLUMN，清空该列释放空间
+            conn.execute(f'UPDATE ontology_versions SET [{name}]=NULL')
+
+
+def _add_listing_indexes(conn):
+    """添加列表排序索引和由触发器维护的版本计数表"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ontology_versions_updated
+        ON ontology_versions (updated_at DESC, id DESC)
+    ''')
+    # 单行统计表：total为版本总数，generation在版本增删或名称/描述变化时递增，用于使搜索计数缓存失效
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ontology_version_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL,
+            generation INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO ontology_version_stats (id, total, generation)
+        SELECT 1, COUNT(*), 0 FROM ontology_versions
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_versions_insert AFTER INSERT ON ontology_versions
+        BEGIN
+            UPDATE ontology_version_stats SET total = total + 1, generation = generation + 1 WHERE id = 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_versions_delete AFTER DELETE ON ontology_versions
+        BEGIN
+            UPDATE ontology_version_stats SET total = total - 1, generation = generation + 1 WHERE id = 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_versions_update AFTER UPDATE OF name, description ON ontology_versions
+        BEGIN
+            UPDATE ontology_version_stats SET generation = generation + 1 WHERE id = 1;
+        END
+    ''')
+
+
+def _collect_tree_text(node, labels, comments):
+    """从tree产物中收集类的名称、标签和注释"""
+    for child in node.get('children', []):
+        labels.extend(text for text in (child.get('name'), child.get('label')) if text)
+        if child.get('comment'):
+            comments.append(child['comment'])
+        _collect_tree_text(child, labels, comments)
+
+
+def _create_search_index(conn):
+    """创建FTS5全文检索表及同步触发器
+
+    使用trigram分词以支持中文子串检索；SQLite未编译FTS5时跳过，搜索退化为LIKE匹配。
+    已有版本的标签从tree产物中回填（仅包含类），属性标签在版本下次保存时写入。
+    """
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS ontology_search
+            USING fts5(name, description, labels, comments, tokenize='trigram')
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning("当前SQLite不支持FTS5 trigram分词，跳过全文检索索引: %s", e)
+        return
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_search_insert AFTER INSERT ON ontology_versions
+        BEGIN
+            INSERT INTO ontology_search (rowid, name, description, labels, comments)
+            VALUES (new.id, new.name, COALESCE(new.description, ''), '', '');
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_search_update AFTER UPDATE OF name, description ON ontology_versions
+        BEGIN
+            UPDATE ontology_search SET name = new.name, description = COALESCE(new.description, '')
+            WHERE rowid = new.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ontology_search_delete AFTER DELETE ON ontology_versions
+        BEGIN
+            DELETE FROM ontology_search WHERE rowid = old.id;
+        END
+    ''')
+
+    conn.execute('''
+        INSERT OR REPLACE INTO ontology_search (rowid, name, description, labels, comments)
+        SELECT id, name, COALESCE(description, ''), '', '' FROM ontology_versions
+    ''')
+    rows = conn.execute("SELECT version_id, encoding, data FROM ontology_artifacts WHERE name = 'tree'").fetchall()
+    for version_id, encoding, data in rows:
+        try:
+            if encoding == 'zlib':
+                data = zlib.decompress(data)
+            tree = json.loads(data)
+        except (zlib.error, ValueError, TypeError):
+            continue
+        if not isinstance(tree, dict):
+            continue
+        labels, comments = [], []
+        _collect_tree_text(tree, labels, comments)
+        conn.execute('UPDATE ontology_search SET labels = ?, comments = ? WHERE rowid = ?',
+                     ('\n'.join(labels), '\n'.join(comments), version_id))
+
+
+def _create_ingest_jobs_table(conn):
+    """创建后台导入任务表"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            version_id INTEGER,
+            status TEXT NOT NULL,
+            error TEXT,
+            created_at TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_ingest_jobs_version ON ingest_jobs (version_id)')
+
+
+def _add_delta_storage(conn):
+    """支持差异存储：产物表记录差异基准和差异链长度，版本表记录父版本，原始数据移到产物表
+
+    已有数据按完整数据迁移，下次写入时再保存为差异
+    """
+    for column, definition in (('base_version_id', 'INTEGER'), ('base_name', 'TEXT'),
+                               ('depth', 'INTEGER NOT NULL DEFAULT 0')):
+        if not _column_exists(conn, 'ontology_artifacts', column):
+            conn.execute(f'ALTER TABLE ontology_artifacts ADD COLUMN {column} {definition}')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ontology_artifacts_base ON ontology_artifacts (base_version_id, base_name)
+    ''')
+    if not _column_exists(conn, 'ontology_versions', 'parent_id'):
+        conn.execute('ALTER TABLE ontology_versions ADD COLUMN parent_id INTEGER')
+    if not _column_exists(conn, 'ontology_versions', 'ontology_data'):
+        return
+    conn.execute('''
+        INSERT OR REPLACE INTO ontology_artifacts (version_id, name, encoding, data)
+        SELECT id, 'ontology_data', 'raw', ontology_data FROM ontology_versions WHERE ontology_data IS NOT NULL
+    ''')
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute('ALTER TABLE ontology_versions DROP COLUMN ontology_data')
+    else:
+        # 旧版SQLite不支持DROP COLUMN，清空该列释放空间
+        conn.execute('UPDATE ontology_versions SET ontology_data=NULL')
+
+
+def _add_ingest_job_owner(conn):
+    """任务表记录执行任务的进程，进程退出后遗留的未完成任务在启动时重新执行"""
+    if not _column_exists(conn, 'ingest_jobs', 'owner'):
+        conn.execute('ALTER TABLE ingest_jobs ADD COLUMN owner TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs (status)')
+
+
+# 迁移列表：(版本号, 说明, 迁移函数)，版本号必须连续递增，已发布的迁移不能修改
+MIGRATIONS = [
+    (1, '创建ontology_versions表', _create_versions_table),
+    (2, '添加content_hash和formats_hash列', _add_content_hash_columns),
+    (3, '拆分产物数据到ontology_artifacts表', _split_artifacts),
+    (4, '添加列表排序索引和版本计数表', _add_listing_indexes),
+    (5, '创建全文检索索引', _create_search_index),
+    (6, '创建后台导入任务表', _create_ingest_jobs_table),
+    (7, '添加差异存储列并将原始数据移到ontology_artifacts表', _add_delta_storage),
+    (8, '任务表添加执行进程列', _add_ingest_job_owner),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(db_path=None):
+    """获取数据库当前的结构版本"""
+    with connection(db_path) as conn:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db_path=None):
+    """执行所有尚未应用的迁移，返回执行的迁移版本号列表
+
+    结构已是最新时只读取一次user_version；多个进程同时启动时，
+    通过BEGIN IMMEDIATE串行化，后获得写锁的进程会重新检查版本并跳过已完成的迁移。
+    """
+    with connection(db_path) as conn:
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= LATEST_VERSION:
+            return []
+
+        applied = []
+        conn.execute('BEGIN IMMEDIATE')
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        for version, description, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info("执行数据库迁移 %s: %s", version, description)
+            migration(conn)
+            conn.execute(f'PRAGMA user_version={version}')
+            applied.append(version)
+        return applied
@@ -1,138 +1,506 @@
-import sqlite3
 import json
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
 from datetime import datetime
 
+from cache import content_hash
+from db import connection, get_db_path
+from deltas import (SMALL_DELTA_RATIO, compute_delta, decode_delta, encode_delta, get_keyframe_interval,
+                    get_max_delta_ratio, get_text_cache, is_delta_storage_enabled, storage_key)
+from migrations import migrate
+
+# 版本元数据字段，读取版本时始终加载
+META_FIELDS = ('id', 'name', 'description', 'parent_id', 'created_at', 'updated_at')
+# 存放在ontology_artifacts表中的大字段
+ARTIFACT_FIELDS = ('owl_data', 'jsonld_data', 'graph', 'tree', 'table')
+# 只在服务端内部使用的产物：流式解析器的提取索引，用于增量更新（见incremental.py），不通过接口返回
+INTERNAL_ARTIFACT_FIELDS = ('index',)
+STORED_ARTIFACT_FIELDS = ARTIFACT_FIELDS + INTERNAL_ARTIFACT_FIELDS
+# ontology_artifacts表中保存的全部数据：原始数据和各产物，均可保存为相对其他版本的差异（见deltas.py）
+STORED_DATA_FIELDS = ('ontology_data',) + STORED_ARTIFACT_FIELDS
+# 读取时需要JSON解码的产物字段
+JSON_ARTIFACT_FIELDS = ('graph', 'tree', 'table', 'index')
+# 可按需选择的全部字段
+VERSION_FIELDS = META_FIELDS + ('ontology_data',) + ARTIFACT_FIELDS
+
+# 小于该字节数的产物不压缩，也不保存为差异
+COMPRESS_MIN_BYTES = 1024
+
+# 搜索计数缓存：(db_path, 搜索词, generation) -> 计数
+COUNT_CACHE_SIZE = 256
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+# 数据库路径 -> 是否存在全文检索表
+_search_index_cache = {}
+
+
+def _artifact_text(value):
+    """产物数据的文本形式"""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _encode_artifact(value):
+    """序列化产物数据，返回(encoding, data)
+
+    环境变量ARTIFACT_COMPRESSION为zlib（默认）时压缩较大的产物，为none时原样存储
+    """
+    text = _artifact_text(value)
+    if os.environ.get('ARTIFACT_COMPRESSION', 'zlib') == 'zlib' and len(text) >= COMPRESS_MIN_BYTES:
+        return 'zlib', zlib.compress(text.encode('utf-8'), 6)
+    return 'raw', text
+
+
+def _decode_text(encoding, data):
+    """解码完整保存的数据"""
+    if encoding == 'zlib':
+        return zlib.decompress(data).decode('utf-8')
+    if isinstance(data, bytes):
+        return data.decode('utf-8')
+    return data
+
+
+def _decode_artifact(name, data):
+    """反序列化产物数据"""
+    # 处理graph、tree和table字段，如果它们是字符串则转换为Python对象
+    if name in JSON_ARTIFACT_FIELDS and isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except json.JSONDecodeError:
+            pass  # 如果解析失败，保持原值
+    return data
+
+
+def _read_text(conn, version_id, name, db_path=None):
+    """读取保存的数据文本，不存在时返回None
+
+    差异从完整数据（关键帧）开始逐级应用重建，每一级的结果按保存内容缓存，读取相邻版本时从缓存的基准数据开始
+    """
+    cache = get_text_cache()
+    chain = []
+    key = (version_id, name)
+    while True:
+        row = conn.execute('''
+            SELECT encoding, data, base_version_id, base_name FROM ontology_artifacts WHERE version_id=? AND name=?
+        ''', key).fetchone()
+        if row is None or row[1] is None:
+            if chain:
+                raise ValueError(f'版本 {version_id} 的{name}数据缺少差异基准')
+            return None
+        encoding, data, base_version_id, base_name = row
+        cache_key = (get_db_path(db_path), key[0], key[1], storage_key(data))
+        text = cache.get(cache_key) if cache else None
+        if text is not None:
+            break
+        if encoding != 'delta':
+            text = _decode_text(encoding, data)
+            if cache and chain:
+                cache.put(cache_key, text)
+            break
+        chain.append((cache_key, data))
+        key = (base_version_id, base_name)
+    for cache_key, data in reversed(chain):
+        text = decode_delta(data, text)
+        if cache:
+            cache.put(cache_key, text)
+    return text
+
+
+def _delta_bases(conn, version_id, name, texts, db_path=None):
+    """保存数据时可作为差异基准的(版本ID, 名称)，按优先级排列
+
+    与同一版本原始数据相同的OWL/JSON-LD数据以原始数据为基准；其余数据优先沿用原有的基准，
+    其次为父版本的同名数据，没有父版本时为前一个版本的同名数据
+    """
+    bases = []
+    if name in ('owl_data', 'jsonld_data'):
+        source = texts.get('ontology_data')
+        if source is None:
+            source = _read_text(conn, version_id, 'ontology_data', db_path)
+        if source == texts[name]:
+            bases.append((version_id, 'ontology_data'))
+    row = conn.execute('''
+        SELECT base_version_id, base_name FROM ontology_artifacts WHERE version_id=? AND name=? AND base_version_id<>?
+    ''', (version_id, name, version_id)).fetchone()
+    if row is not None:
+        bases.append(tuple(row))
+    row = conn.execute('SELECT parent_id FROM ontology_versions WHERE id=?', (version_id,)).fetchone()
+    parent_id = row[0] if row else None
+    if parent_id is None:
+        parent_id = conn.execute('SELECT MAX(id) FROM ontology_versions WHERE id<?', (version_id,)).fetchone()[0]
+    if parent_id is not None and (parent_id, name) not in bases:
+        bases.append((parent_id, name))
+    return bases
+
+
+def _chain_contains(conn, start, key):
+    """start开始的差异链是否经过key（避免以依赖自身的数据为基准形成循环）"""
+    while start[0] is not None:
+        if start == key:
+            return True
+        row = conn.execute('''
+            SELECT base_version_id, base_name FROM ontology_artifacts WHERE version_id=? AND name=?
+        ''', start).fetchone()
+        if row is None:
+            return False
+        start = tuple(row)
+    return False
+
+
+def _update_depths(conn, version_id, name, depth):
+    """数据重新保存后更新以它为基准的各级数据记录的差异链长度"""
+    pending = [((version_id, name), depth)]
+    while pending:
+        (base_version_id, base_name), base_depth = pending.pop()
+        rows = conn.execute('''
+            SELECT version_id, name FROM ontology_artifacts WHERE base_version_id=? AND base_name=?
+        ''', (base_version_id, base_name)).fetchall()
+        for dependent_version_id, dependent in rows:
+            dependent_depth = base_depth + (0 if dependent_version_id == base_version_id else 1)
+            conn.execute('UPDATE ontology_artifacts SET depth=? WHERE version_id=? AND name=?',
+                         (dependent_depth, dependent_version_id, dependent))
+            pending.append(((dependent_version_id, dependent), dependent_depth))
+
+
+def _store_text(cursor, version_id, name, text, bases, db_path=None):
+    """保存数据文本
+
+    依次检查bases中的基准数据，取第一个存在且差异链不超过关键帧间隔的基准计算差异，差异足够小时保存为差异，
+    否则（或没有可用的基准时）保存完整数据
+    """
+    conn = cursor.connection
+    encoding = data = None
+    base_key, depth = (None, None), 0
+    if is_delta_storage_enabled() and len(text) >= COMPRESS_MIN_BYTES:
+        for candidate in bases:
+            row = conn.execute('SELECT depth FROM ontology_artifacts WHERE version_id=? AND name=?', candidate).fetchone()
+            if row is None or _chain_contains(conn, candidate, (version_id, name)):
+                continue
+            # 同一版本内的基准与数据相同，重建时直接复用基准数据，不计入差异链长度
+            candidate_depth = row[0] + (0 if candidate[0] == version_id else 1)
+            if candidate_depth > get_keyframe_interval():
+                continue
+            base_text = _read_text(conn, *candidate, db_path)
+            if base_text is None:
+                continue
+            delta = encode_delta(base_text, compute_delta(base_text, text))
+            if len(delta) > len(text) * SMALL_DELTA_RATIO:
+                # 差异较大时与压缩后的完整数据比较
+                encoding, data = _encode_artifact(text)
+                if len(delta) > len(data) * get_max_delta_ratio():
+                    break
+            encoding, data = 'delta', delta
+            base_key, depth = candidate, candidate_depth
+            break
+    if encoding is None:
+        encoding, data = _encode_artifact(text)
+    cursor.execute('''
+        INSERT OR REPLACE INTO ontology_artifacts (version_id, name, encoding, data, base_version_id, base_name, depth)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (version_id, name, encoding, data, base_key[0], base_key[1], depth))
+    _update_depths(conn, version_id, name, depth)
+    cache = get_text_cache()
+    if cache:
+        cache.put((get_db_path(db_path), version_id, name, storage_key(data)), text)
+
+
+def _search_index_available(conn, db_path=None):
+    """检查数据库中是否存在FTS5全文检索表（结果按数据库路径缓存）"""
+    key = get_db_path(db_path)
+    if key not in _search_index_cache:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ontology_search'").fetchone()
+        _search_index_cache[key] = row is not None
+    return _search_index_cache[key]
+
+
+def _write_search_text(cursor, id, search_text, db_path=None):
+    """写入版本的标签和注释检索文本
+
+    检索文本变化会改变搜索结果，同一事务中递增generation使按搜索词缓存的计数失效
+    （触发器只在版本增删和名称/描述变化时递增）
+    """
+    if not _search_index_available(cursor.connection, db_path):
+        return
+    cursor.execute('UPDATE ontology_search SET labels=?, comments=? WHERE rowid=?',
+                   (search_text.get('labels', ''), search_text.get('comments', ''), id))
+    cursor.execute('UPDATE ontology_version_stats SET generation = generation + 1 WHERE id = 1')
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
 
 class OntologyVersion:
-    def __init__(self, name, description='', ontology_data='', owl_data='', jsonld_data='', graph='', tree='', table='', id=None):
+    def __init__(self, name, description='', ontology_data='', owl_data='', jsonld_data='', graph='', tree='', table='', id=None,
+                 formats_hash=None, parent_id=None):
         self.id = id
         self.name = name
         self.description = description
+        # 父版本ID，版本数据优先保存为相对父版本的差异
+        self.parent_id = parent_id
         self.ontology_data = ontology_data
         self.owl_data = owl_data
         self.jsonld_data = jsonld_data
         self.graph = graph
         self.tree = tree
         self.table = table
+        # owl_data和jsonld_data所对应的ontology_data内容哈希，与当前内容哈希不一致时说明格式数据已过期
+        self.formats_hash = formats_hash
+        # 全文检索文本{'labels': ..., 'comments': ...}，为None时保存不会修改已有的检索文本
+        self.search_text = None
+        # 提取索引，为None时保存不会修改已有的索引
+        self.index = None
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
 
     @staticmethod
-    def init_db(db_path='ontology.db'):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        # 删除现有表（如果存在）
-        cursor.execute('DROP TABLE IF EXISTS ontology_versions')
-        # 创建新表
-        cursor.execute('''
-            CREATE TABLE ontology_versions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                ontology_data TEXT,
-                owl_data TEXT,
-                jsonld_data TEXT,
-                graph TEXT,
-                tree TEXT,
-                [table] TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-        conn.close()
-
-    def save(self, db_path='ontology.db'):
-        # 确保graph、tree和table是字符串类型
-        graph_str = self.graph if isinstance(self.graph, str) else json.dumps(self.graph)
-        tree_str = self.tree if isinstance(self.tree, str) else json.dumps(self.tree)
-        table_str = self.table if isinstance(self.table, str) else json.dumps(self.table)
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        if self.id is None:
-            cursor.execute('''
-                INSERT INTO ontology_versions (name, description, ontology_data, owl_data, jsonld_data, graph, tree, [table], created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (self.name, self.description, self.ontology_data, self.owl_data, self.jsonld_data, graph_str, tree_str, table_str, self.created_at, self.updated_at))
-            self.id = cursor.lastrowid
-        else:
-            cursor.execute('''
-                UPDATE ontology_versions
-                SET name=?, description=?, ontology_data=?, owl_data=?, jsonld_data=?, graph=?, tree=?, [table]=?, updated_at=?
-                WHERE id=?
-            ''', (self.name, self.description, self.ontology_data, self.owl_data, self.jsonld_data, graph_str, tree_str, table_str, self.updated_at, self.id))
-        conn.commit()
-        conn.close()
-
-    @staticmethod
-    def get_by_id(id, db_path='ontology.db'):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM ontology_versions WHERE id=?', (id,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            # 将row转换为列表以便修改
-            row_list = list(row)
-            # 将created_at和updated_at转换为datetime对象
-            if len(row_list) > 9 and row_list[9]:
-                row_list[9] = datetime.fromisoformat(row_list[9])
-            if len(row_list) > 10 and row_list[10]:
-                row_list[10] = datetime.fromisoformat(row_list[10])
-            
-            # 处理graph、tree和table字段，如果它们是字符串则转换为Python对象
-            if isinstance(row_list[6], str):
-                try:
-                    row_list[6] = json.loads(row_list[6])
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-            
-            if isinstance(row_list[7], str):
-                try:
-                    row_list[7] = json.loads(row_list[7])
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-                    
-            if isinstance(row_list[8], str):
-                try:
-                    row_list[8] = json.loads(row_list[8])
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-            
-            # 重新构造参数列表，适应新的构造函数
-            version = OntologyVersion(row_list[1], row_list[2], row_list[3], row_list[4], row_list[5], row_list[6], row_list[7], row_list[8], row_list[0])
-            # 设置created_at和updated_at字段
-            version.created_at = row_list[9] if len(row_list) > 9 else None
-            version.updated_at = row_list[10] if len(row_list) > 10 else None
-            return version
-        return None
-
-    @staticmethod
-    def get_all_basic(page=1, page_size=20, search_term='', db_path='ontology.db'):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        offset = (page - 1) * page_size
-
-        if search_term:
-            query = '''
-                SELECT id, name, description, created_at, updated_at FROM ontology_versions
-                WHERE name LIKE ? OR description LIKE ?
-                ORDER BY updated_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            search_pattern = f'%{search_term}%'
-            cursor.execute(query, (search_pattern, search_pattern, page_size, offset))
-        else:
-            query = '''
-                SELECT id, name, description, created_at, updated_at FROM ontology_versions
-                ORDER BY updated_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, (page_size, offset))
-
-        rows = cursor.fetchall()
-        conn.close()
+    def init_db(db_path=None):
+        """初始化数据库结构，只执行尚未应用的迁移，不会删除已有数据"""
+        migrate(db_path)
+
+    def save(self, db_path=None):
+        """保存版本，值为None的字段（按需加载时未读取的字段）保持数据库中的原值"""
+        with connection(db_path) as conn:
+            cursor = conn.cursor()
+            if self.id is None:
+                cursor.execute('''
+                    INSERT INTO ontology_versions (name, description, parent_id, created_at, updated_at, content_hash, formats_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (self.name, self.description, self.parent_id, self.created_at, self.updated_at,
+                      content_hash(self.ontology_data), self.formats_hash))
+                self.id = cursor.lastrowid
+            elif self.ontology_data is not None:
+                cursor.execute('''
+                    UPDATE ontology_versions
+                    SET name=?, description=?, updated_at=?, content_hash=?, formats_hash=?
+                    WHERE id=?
+                ''', (self.name, self.description, self.updated_at,
+                      content_hash(self.ontology_data), self.formats_hash, self.id))
+            else:
+                cursor.execute('''
+                    UPDATE ontology_versions SET name=?, description=?, updated_at=?, formats_hash=? WHERE id=?
+                ''', (self.name, self.description, self.updated_at, self.formats_hash, self.id))
+
+            artifacts = {name: getattr(self, name) for name in STORED_DATA_FIELDS if getattr(self, name) is not None}
+            OntologyVersion._write_artifacts(cursor, self.id, artifacts, db_path)
+
+            # 名称和描述由触发器同步到检索表，这里只需写入本体的标签和注释
+            if self.search_text is not None:
+                _write_search_text(cursor, self.id, self.search_text, db_path)
+
+    @staticmethod
+    def _write_artifacts(cursor, id, artifacts, db_path=None):
+        """写入原始数据和产物数据，优先保存为差异
+
+        其他数据以被覆盖的数据为差异基准时，先按原基准重建，写入后再以新数据为基准重新保存
+        """
+        conn = cursor.connection
+        texts = {name: _artifact_text(value) for name, value in artifacts.items()}
+        dependents = {}
+        for name in texts:
+            rows = conn.execute('''
+                SELECT version_id, name FROM ontology_artifacts WHERE base_version_id=? AND base_name=?
+            ''', (id, name)).fetchall()
+            dependents[name] = [(version_id, dependent, _read_text(conn, version_id, dependent, db_path))
+                                for version_id, dependent in rows if version_id != id or dependent not in texts]
+
+        # 先写入原始数据，同一版本中与原始数据相同的OWL/JSON-LD数据以它为基准；
+        # 每写入一项立即重新保存依赖它的数据，使后续计算差异时读取的基准数据保持一致
+        for name in sorted(texts, key=lambda name: name != 'ontology_data'):
+            _store_text(cursor, id, name, texts[name], _delta_bases(conn, id, name, texts, db_path), db_path)
+            for version_id, dependent, text in dependents[name]:
+                _store_text(cursor, version_id, dependent, text, [(id, name)], db_path)
+
+    @staticmethod
+    def save_artifacts(id, artifacts, expected_hash, db_path=None):
+        """写入后台生成的产物，仅当版本当前内容哈希等于expected_hash时写入，返回是否写入
+
+        artifacts中的search为检索文本，其余键为产物字段；不包含OWL/JSON-LD数据时不修改formats_hash，
+        格式数据保持过期状态，读取和下载时按需重新转换
+        """
+        with connection(db_path) as conn:
+            cursor = conn.cursor()
+            if 'owl_data' in artifacts and 'jsonld_data' in artifacts:
+                cursor.execute('''
+                    UPDATE ontology_versions SET formats_hash=? WHERE id=? AND content_hash=?
+                ''', (expected_hash, id, expected_hash))
+                applied = cursor.rowcount > 0
+            else:
+                applied = cursor.execute('''
+                    SELECT 1 FROM ontology_versions WHERE id=? AND content_hash=?
+                ''', (id, expected_hash)).fetchone() is not None
+            if not applied:
+                return False
+            OntologyVersion._write_artifacts(
+                cursor, id, {name: value for name, value in artifacts.items() if name in STORED_ARTIFACT_FIELDS}, db_path)
+            if artifacts.get('search') is not None:
+                _write_search_text(cursor, id, artifacts['search'], db_path)
+        return True
+
+    @staticmethod
+    def get_artifacts(id, names=ARTIFACT_FIELDS, db_path=None):
+        """读取并解码指定的数据（原始数据或产物），返回{name: value}，保存为差异的数据在读取时重建"""
+        names = [name for name in names if name in STORED_DATA_FIELDS]
+        if not names:
+            return {}
+        placeholders = ', '.join('?' * len(names))
+        with connection(db_path) as conn:
+            rows = conn.execute(f'''
+                SELECT name, encoding, data FROM ontology_artifacts WHERE version_id=? AND name IN ({placeholders})
+            ''', (id, *names)).fetchall()
+            texts = {name: _read_text(conn, id, name, db_path) if encoding == 'delta' else _decode_text(encoding, data)
+                     for name, encoding, data in rows}
+        return {name: _decode_artifact(name, text) for name, text in texts.items()}
+
+    @staticmethod
+    def get_by_id(id, fields=None, db_path=None):
+        """按ID获取版本
+
+        fields为需要加载的字段集合，None表示加载全部字段；元数据字段始终加载，
+        未加载的字段值为None，保存时不会覆盖数据库中的原值。
+        """
+        fields = set(VERSION_FIELDS if fields is None else fields)
+        load_data = 'ontology_data' in fields
+        with connection(db_path) as conn:
+            row = conn.execute('''
+                SELECT id, name, description, created_at, updated_at, formats_hash, parent_id
+                FROM ontology_versions WHERE id=?
+            ''', (id,)).fetchone()
+        if not row:
+            return None
+
+        artifacts = OntologyVersion.get_artifacts(id, [name for name in STORED_DATA_FIELDS if name in fields], db_path)
+        version = OntologyVersion(row[1], row[2], artifacts.get('ontology_data') if load_data else None, id=row[0],
+                                  formats_hash=row[5], parent_id=row[6])
+        for name in ARTIFACT_FIELDS:
+            setattr(version, name, artifacts.get(name, '') if name in fields else None)
+        version.created_at = _parse_timestamp(row[3])
+        version.updated_at = _parse_timestamp(row[4])
+        return version
+
+    @staticmethod
+    def get_formats(id, db_path=None):
+        """获取下载所需的OWL/JSON-LD数据及内容哈希，不加载可视化数据"""
+        info = OntologyVersion.get_download_info(id, db_path)
+        if info is None:
+            return None
+        artifacts = OntologyVersion.get_artifacts(id, ('owl_data', 'jsonld_data'), db_path)
+        info['owl_data'] = artifacts.get('owl_data')
+        info['jsonld_data'] = artifacts.get('jsonld_data')
+        return info
+
+    @staticmethod
+    def get_download_info(id, db_path=None):
+        """获取下载所需的版本名称和内容哈希，版本不存在时返回None"""
+        with connection(db_path) as conn:
+            row = conn.execute('''
+                SELECT name, content_hash, formats_hash FROM ontology_versions WHERE id=?
+            ''', (id,)).fetchone()
+        if not row:
+            return None
+        return {'name': row[0], 'content_hash': row[1], 'formats_hash': row[2]}
+
+    @staticmethod
+    def get_encoded_artifact(id, name, db_path=None):
+        """读取未解码的产物数据，返回(encoding, data)，不存在时返回None；用于分块解压输出
+
+        保存为差异的产物重建后返回('raw', 文本)
+        """
+        with connection(db_path) as conn:
+            row = conn.execute('''
+                SELECT encoding, data FROM ontology_artifacts WHERE version_id=? AND name=?
+            ''', (id, name)).fetchone()
+            if row is not None and row[0] == 'delta':
+                return 'raw', _read_text(conn, id, name, db_path)
+        return row
+
+    @staticmethod
+    def get_ontology_data(id, db_path=None):
+        """获取版本的原始本体数据"""
+        with connection(db_path) as conn:
+            return _read_text(conn, id, 'ontology_data', db_path)
+
+    @staticmethod
+    def update_formats(id, owl_data, jsonld_data, formats_hash, db_path=None):
+        """回写重新转换得到的OWL/JSON-LD数据"""
+        with connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE ontology_versions SET formats_hash=? WHERE id=?', (formats_hash, id))
+            OntologyVersion._write_artifacts(cursor, id, {'owl_data': owl_data, 'jsonld_data': jsonld_data}, db_path)
+
+    @staticmethod
+    def update_artifacts(id, artifacts, expected_hash, db_path=None):
+        """回写按需重新生成的产物，版本数据已被修改时不写入，返回是否写入
+
+        早期版本没有记录内容哈希，此时直接写入
+        """
+        with connection(db_path) as conn:
+            cursor = conn.cursor()
+            row = cursor.execute('''
+                SELECT 1 FROM ontology_versions WHERE id=? AND (content_hash=? OR content_hash IS NULL)
+            ''', (id, expected_hash)).fetchone()
+            if row is None:
+                return False
+            OntologyVersion._write_artifacts(cursor, id, artifacts, db_path)
+        return True
+
+    @staticmethod
+    def _search_clause(conn, search_term, db_path=None):
+        """构造搜索条件，返回(FROM子句, WHERE条件, 参数, 是否按相关度排序)
+
+        存在FTS5索引且每个检索词不少于3个字符时使用MATCH检索并按bm25排序
+        （名称、描述、标签、注释的权重依次降低）；较短的检索词无法使用trigram索引，
+        退化为在索引文本上做LIKE匹配；没有FTS5时只匹配名称和描述。
+        """
+        pattern = f'%{search_term}%'
+        if not _search_index_available(conn, db_path):
+            return 'ontology_versions v', '(v.name LIKE ? OR v.description LIKE ?)', [pattern, pattern], False
+
+        source = 'ontology_search s JOIN ontology_versions v ON v.id = s.rowid'
+        terms = search_term.split()
+        if terms and all(len(term) >= 3 for term in terms):
+            match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            return source, 'ontology_search MATCH ?', [match], True
+        condition = '(s.name LIKE ? OR s.description LIKE ? OR s.labels LIKE ? OR s.comments LIKE ?)'
+        return source, condition, [pattern] * 4, False
+
+    @staticmethod
+    def get_all_basic(page=1, page_size=20, search_term='', db_path=None, after=None):
+        """获取版本列表（仅元数据），默认按(updated_at, id)倒序
+
+        after为上一页最后一条记录的(updated_at, id)，指定时使用键集分页，
+        通过索引直接定位起始位置，忽略page参数；否则按page使用OFFSET分页。
+        全文检索结果按相关度排序，只支持page分页。
+        """
+        with connection(db_path) as conn:
+            source = 'ontology_versions v'
+            conditions = []
+            params = []
+            ranked = False
+            if search_term:
+                source, condition, search_params, ranked = OntologyVersion._search_clause(conn, search_term, db_path)
+                conditions.append(condition)
+                params.extend(search_params)
+            if after is not None and not ranked:
+                conditions.append('(v.updated_at, v.id) < (?, ?)')
+                params.extend(after)
+
+            query = f'SELECT v.id, v.name, v.description, v.created_at, v.updated_at FROM {source}'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            if ranked:
+                query += ' ORDER BY bm25(ontology_search, 10.0, 5.0, 2.0, 1.0), v.id DESC LIMIT ?'
+            else:
+                query += ' ORDER BY v.updated_at DESC, v.id DESC LIMIT ?'
+            params.append(page_size)
+            if after is None or ranked:
+                query += ' OFFSET ?'
+                params.append((page - 1) * page_size)
+
+            rows = conn.execute(query, params).fetchall()
 
         versions = []
         for row in rows:
@@ -146,95 +514,141 @@ class OntologyVersion:
         return versions
 
     @staticmethod
-    def get_all(page=1, page_size=20, search_term='', db_path='ontology.db'):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        offset = (page - 1) * page_size
-
-        if search_term:
-            query = '''
-                SELECT id, name, description, ontology_data, graph, tree, [table], created_at, updated_at FROM ontology_versions
-                WHERE name LIKE ? OR description LIKE ?
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            search_pattern = f'%{search_term}%'
-            cursor.execute(query, (search_pattern, search_pattern, page_size, offset))
-        else:
-            query = '''
-                SELECT id, name, description, ontology_data, graph, tree, [table], created_at, updated_at FROM ontology_versions
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, (page_size, offset))
-
-        rows = cursor.fetchall()
-        conn.close()
-
+    def get_all(page=1, page_size=20, search_term='', db_path=None):
+        """获取版本列表及全部字段"""
         versions = []
-        for row in rows:
-            # 处理graph、tree和table字段，如果它们是字符串则转换为Python对象
-            graph_data = row[6]
-            tree_data = row[7]
-            table_data = row[8]
-            
-            if isinstance(graph_data, str):
-                try:
-                    graph_data = json.loads(graph_data)
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-            
-            if isinstance(tree_data, str):
-                try:
-                    tree_data = json.loads(tree_data)
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-                    
-            if isinstance(table_data, str):
-                try:
-                    table_data = json.loads(table_data)
-                except json.JSONDecodeError:
-                    pass  # 如果解析失败，保持原值
-            
-            versions.append({
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'ontology_data': row[3],
-                'owl_data': row[4],
-                'jsonld_data': row[5],
-                'graph': graph_data,
-                'tree': tree_data,
-                'table': table_data,
-                'created_at': row[9],
-                'updated_at': row[10]
-            })
-
+        for basic in OntologyVersion.get_all_basic(page, page_size, search_term, db_path):
+            version = OntologyVersion.get_by_id(basic['id'], db_path=db_path)
+            if version is None:
+                continue
+            record = dict(basic)
+            record['ontology_data'] = version.ontology_data
+            for name in ARTIFACT_FIELDS:
+                record[name] = getattr(version, name)
+            versions.append(record)
         return versions
 
     @staticmethod
-    def count_all(search_term='', db_path='ontology.db'):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+    def count_all(search_term='', db_path=None):
+        """获取版本总数
+
+        无搜索条件时直接读取触发器维护的计数；有搜索条件时按(搜索词, generation)缓存计数结果，
+        版本增删、名称/描述变化或写入检索文本后generation递增，缓存随之失效。
+        """
+        with connection(db_path) as conn:
+            total, generation = conn.execute(
+                'SELECT total, generation FROM ontology_version_stats WHERE id = 1').fetchone()
+            if not search_term:
+                return total
 
-        if search_term:
-            query = 'SELECT COUNT(*) FROM ontology_versions WHERE name LIKE ? OR description LIKE ?'
-            search_pattern = f'%{search_term}%'
-            cursor.execute(query, (search_pattern, search_pattern))
-        else:
-            query = 'SELECT COUNT(*) FROM ontology_versions'
-            cursor.execute(query)
+            key = (get_db_path(db_path), search_term, generation)
+            with _count_cache_lock:
+                if key in _count_cache:
+                    _count_cache.move_to_end(key)
+                    return _count_cache[key]
 
-        count = cursor.fetchone()[0]
-        conn.close()
+            source, condition, params, _ = OntologyVersion._search_clause(conn, search_term, db_path)
+            count = conn.execute(f'SELECT COUNT(*) FROM {source} WHERE {condition}', params).fetchone()[0]
+
+        with _count_cache_lock:
+            _count_cache[key] = count
+            while len(_count_cache) > COUNT_CACHE_SIZE:
+                _count_cache.popitem(last=False)
         return count
 
-    def delete(self, db_path='ontology.db'):
+    def delete(self, db_path=None):
         if self.id is not None:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM ontology_versions WHERE id=?', (self.id,))
-            conn.commit()
-            conn.close()
+            with connection(db_path) as conn:
+                cursor = conn.cursor()
+                # 其他版本以该版本为差异基准时，改为以被删除数据的基准重新保存，没有基准时保存完整数据
+                rows = cursor.execute('''
+                    SELECT version_id, name, base_name FROM ontology_artifacts WHERE base_version_id=? AND version_id<>?
+                ''', (self.id, self.id)).fetchall()
+                dependents = []
+                for version_id, name, base_name in rows:
+                    base = (self.id, base_name)
+                    while base[0] == self.id:
+                        row = cursor.execute('''
+                            SELECT base_version_id, base_name FROM ontology_artifacts WHERE version_id=? AND name=?
+                        ''', base).fetchone()
+                        base = tuple(row) if row else (None, None)
+                    text = _read_text(conn, version_id, name, db_path)
+                    dependents.append((version_id, name, text, [base] if base[0] is not None else []))
+                row = cursor.execute('SELECT parent_id FROM ontology_versions WHERE id=?', (self.id,)).fetchone()
+                cursor.execute('UPDATE ontology_versions SET parent_id=? WHERE parent_id=?',
+                               (row[0] if row else None, self.id))
+                cursor.execute('DELETE FROM ontology_artifacts WHERE version_id=?', (self.id,))
+                cursor.execute('DELETE FROM ontology_versions WHERE id=?', (self.id,))
+                for version_id, name, text, bases in dependents:
+                    _store_text(cursor, version_id, name, text, bases, db_path)
             return True
         return False
+
+
+class IngestJob:
+    """后台导入任务记录"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    @staticmethod
+    def create(kind, version_id, owner=None, db_path=None):
+        """创建排队中的任务，返回任务ID；owner标识执行任务的进程（见jobs.py）"""
+        job_id = uuid.uuid4().hex
+        with connection(db_path) as conn:
+            conn.execute('''
+                INSERT INTO ingest_jobs (id, kind, version_id, status, created_at, owner) VALUES (?, ?, ?, ?, ?, ?)
+            ''', (job_id, kind, version_id, IngestJob.QUEUED, datetime.now(), owner))
+        return job_id
+
+    @staticmethod
+    def get_unfinished(db_path=None):
+        """获取排队中和执行中的任务，返回[(任务ID, 版本ID, owner)]"""
+        with connection(db_path) as conn:
+            return conn.execute('''
+                SELECT id, version_id, owner FROM ingest_jobs WHERE status IN (?, ?) ORDER BY created_at
+            ''', (IngestJob.QUEUED, IngestJob.RUNNING)).fetchall()
+
+    @staticmethod
+    def claim(id, previous_owner, owner, db_path=None):
+        """将未完成的任务转给owner重新排队，任务已被其他进程接管或已结束时返回False"""
+        with connection(db_path) as conn:
+            cursor = conn.execute('''
+                UPDATE ingest_jobs SET owner=?, status=?, started_at=NULL
+                WHERE id=? AND owner IS ? AND status IN (?, ?)
+            ''', (owner, IngestJob.QUEUED, id, previous_owner, IngestJob.QUEUED, IngestJob.RUNNING))
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def update_status(id, status, error=None, db_path=None):
+        """更新任务状态，并记录开始或结束时间"""
+        now = datetime.now()
+        with connection(db_path) as conn:
+            if status == IngestJob.RUNNING:
+                conn.execute('UPDATE ingest_jobs SET status=?, started_at=? WHERE id=?', (status, now, id))
+            else:
+                conn.execute('UPDATE ingest_jobs SET status=?, error=?, finished_at=? WHERE id=?',
+                             (status, error, now, id))
+
+    @staticmethod
+    def get_by_id(id, db_path=None):
+        """按ID获取任务信息"""
+        with connection(db_path) as conn:
+            row = conn.execute('''
+                SELECT id, kind, version_id, status, error, created_at, started_at, finished_at
+                FROM ingest_jobs WHERE id=?
+            ''', (id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'version_id': row[2],
+            'status': row[3],
+            'error': row[4],
+            'created_at': row[5],
+            'started_at': row[6],
+            'finished_at': row[7]
+        }
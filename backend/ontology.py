@@ -0,0 +1,118 @@
+"""
+本体内存模型模块
+将OWL(RDF/XML)或JSON-LD数据解析为rdflib图，在解析器、可视化和格式转换之间共享，每份数据只解析一次
+
+OWL数据的RDF图在首次使用时才构建：流式解析器直接从原始数据提取可视化数据，只生成可视化时不需要构建RDF图
+"""
+
+import json
+
+from rdflib import Graph
+
+from convert import detect_data_type, JSONLDToOWLConverter, OWLToJSONLDConverter
+from metrics import span
+from parsers import OWLParser, PARSER_BACKENDS, get_parser_backend
+
+
+class OntologyModel:
+    """解析后的本体内存模型
+
+    JSON-LD数据直接构建为RDF图，不经过RDF/XML字符串中转；
+    原始数据对应的格式直接返回原文，另一种格式从同一个图序列化得到。
+    OWL数据保存原始数据（source）或文件路径（path），RDF图在首次访问graph时解析。
+    """
+
+    def __init__(self, graph, data_type, source=None, path=None):
+        self._graph = graph
+        self.data_type = data_type
+        self.source = source
+        self.path = path
+        self._parsers = {}
+
+    @classmethod
+    def parse(cls, data, data_type=None):
+        """解析本体数据，data_type为None时自动识别；OWL数据的RDF图延迟到首次使用时构建"""
+        if data_type is None:
+            with span('detect'):
+                data_type = detect_data_type(data)
+        if data_type == "jsonld":
+            with span('parse'):
+                graph = JSONLDToOWLConverter().build_graph(data)
+            return cls(graph, data_type, data)
+        if data_type == "owl":
+            return cls(None, data_type, data)
+        raise ValueError(f"不支持的数据类型: {data_type}")
+
+    @classmethod
+    def parse_file(cls, path, data_type):
+        """从文件解析本体数据，rdflib、json和流式解析器直接读取文件，不需要先把整个文件读入为字符串"""
+        if data_type == "jsonld":
+            with span('parse'), open(path, 'rb') as f:
+                graph = JSONLDToOWLConverter().build_graph(json.load(f))
+            return cls(graph, data_type)
+        if data_type == "owl":
+            return cls(None, data_type, path=path)
+        raise ValueError(f"不支持的数据类型: {data_type}")
+
+    @property
+    def graph(self):
+        """本体的rdflib图，OWL数据在首次访问时解析"""
+        if self._graph is None:
+            with span('parse'):
+                graph = Graph()
+                if self.path is not None:
+                    with open(self.path, 'rb') as f:
+                        graph.parse(f, format='xml')
+                else:
+                    graph.parse(data=self.source, format='xml')
+            self._graph = graph
+        return self._graph
+
+    def has_graph(self):
+        """RDF图是否已经构建"""
+        return self._graph is not None
+
+    def __len__(self):
+        """三元组数量：RDF图尚未构建时使用已提取的解析器读取的三元组数，不为计数而解析RDF图"""
+        if self._graph is None:
+            for parser in self._parsers.values():
+                return parser.triple_count
+        return len(self.graph)
+
+    def get_parser(self, backend=None):
+        """获取提取完成的解析器（每个后端首次调用时提取，之后复用）
+
+        backend为None时使用PARSER_BACKEND配置；rdflib后端直接从本模型的RDF图提取，
+        其他后端读取原始RDF/XML数据或文件，数据为JSON-LD时使用rdflib后端
+        """
+        backend = get_parser_backend(backend)
+        if backend != 'rdflib' and self.data_type != "owl":
+            backend = 'rdflib'
+        parser = self._parsers.get(backend)
+        if parser is None:
+            if backend == 'rdflib':
+                parser = OWLParser(None, graph=self.graph)
+                with span('extract'):
+                    parser.parse()
+            elif self.path is not None:
+                with span('extract'), open(self.path, 'rb') as f:
+                    parser = PARSER_BACKENDS[backend](f)
+                    parser.parse()
+            else:
+                parser = PARSER_BACKENDS[backend](self.source)
+                with span('extract'):
+                    parser.parse()
+            self._parsers[backend] = parser
+        return parser
+
+    def to_owl(self):
+        """获取RDF/XML格式数据"""
+        if self.data_type == "owl" and isinstance(self.source, str):
+            return self.source
+        return self.graph.serialize(format='xml')
+
+    def to_jsonld(self):
+        """获取JSON-LD格式数据"""
+        if self.data_type == "jsonld" and isinstance(self.source, str):
+            return self.source
+        return OWLToJSONLDConverter().convert_triples(self.graph)
@@ -1,195 +1,370 @@
 """
 OWL解析器模块
-包含OWLParser和OWLReady2Parser类，用于解析OWL本体数据
+包含OWLParser、OWLReady2Parser和StreamingOWLParser类，用于从OWL本体数据中提取类、属性、限制和关系
+
+三个解析器提取结果的结构相同，区别在于读取三元组的方式，按名称注册在PARSER_BACKENDS中：
+- rdflib: 解析为rdflib图后按谓词索引读取
+- owlready2: 加载到owlready2的内存四元组存储后读取
+- stream: 流式读取RDF/XML，只保留提取所需的三元组，不构建RDF图（默认）；
+  按rdflib图的读取顺序建立索引，输出的节点、边、表格行和tree节点顺序与rdflib后端相同，只有空白节点的编号不同
 """
 
+import io
 import os
 import json
-import tempfile
-import traceback
+import logging
+import re
+from functools import lru_cache
 
-from owlready2 import get_ontology
-from rdflib import Graph, Namespace, RDFS
+from owlready2 import World
+from rdflib import BNode, Graph, Literal, Namespace, RDFS
 from pyvis.network import Network
 from convert import convert_jsonld_to_owl, convert_owl_to_jsonld
+from rdfxml import RDFXMLReader
 
 # OWL命名空间
 OWL_NS = Namespace("http://www.w3.org/2002/07/owl#")
 RDF_NS = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
 RDFS_NS = Namespace("http://www.w3.org/2000/01/rdf-schema#")
 
+# 常用术语（Namespace每次属性访问都会新建URIRef，提取时使用预先创建的常量）
+RDF_TYPE = RDF_NS.type
+RDFS_LABEL = RDFS_NS.label
+RDFS_COMMENT = RDFS_NS.comment
+RDFS_DOMAIN = RDFS_NS.domain
+RDFS_RANGE = RDFS_NS.range
+RDFS_SUBCLASS_OF = RDFS_NS.subClassOf
+OWL_ON_PROPERTY = OWL_NS.onProperty
+OWL_SOME_VALUES_FROM = OWL_NS.someValuesFrom
+OWL_ALL_VALUES_FROM = OWL_NS.allValuesFrom
+OWL_HAS_VALUE = OWL_NS.hasValue
+
+# OWLParser提取的实体类型
+ENTITY_TYPES = (OWL_NS.Class, OWL_NS.DatatypeProperty, OWL_NS.ObjectProperty, OWL_NS.Restriction)
+# OWLParser建立索引的谓词（rdf:type和rdfs:subClassOf单独处理）
+INDEXED_PREDICATES = (RDFS_LABEL, RDFS_COMMENT, RDFS_DOMAIN, RDFS_RANGE,
+                      OWL_ON_PROPERTY, OWL_SOME_VALUES_FROM, OWL_ALL_VALUES_FROM, OWL_HAS_VALUE)
+
+logger = logging.getLogger(__name__)
+
+# 意义不明的节点ID：rdflib生成的UUID格式空白节点（如N018b698f83194c0b83c046e2697f22aa）、
+# 自动生成的ID（genid123）和匿名节点（_1a2b）
+MEANINGLESS_NODE_PATTERN = re.compile(r'^(?:N[0-9a-f]{32}|genid[0-9]+|_[0-9a-f]+)$')
+
+# URI解析结果缓存的最大条目数
+URI_CACHE_SIZE = int(os.environ.get('URI_CACHE_SIZE', 131072))
+
+# OWLReady2Parser从内存加载本体时使用的基准IRI
+OWLREADY2_BASE_IRI = 'http://localhost/ontology.owl#'
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def resolve_uri(uri):
+    """解析URI字符串，返回(本地名称, 是否为意义不明的节点)
+
+    同一URI在类、属性、边和提示文本中会被反复解析，结果按URI缓存（LRU，容量由URI_CACHE_SIZE指定）
+    """
+    if MEANINGLESS_NODE_PATTERN.match(uri):
+        return "Unknown_Node", True
+    if '#' in uri:
+        return uri.rpartition('#')[2], False
+    if '/' in uri:
+        return uri.rpartition('/')[2], False
+    return uri, False
+
+
+def get_local_name(uri):
+    """获取URI的本地名称，意义不明的节点返回Unknown_Node"""
+    if not uri:
+        return "Unknown"
+    return resolve_uri(str(uri))[0]
+
+
+def is_meaningless_node(uri):
+    """检查是否是意义不明的节点URI（如UUID格式）"""
+    return resolve_uri(str(uri))[1]
+
 
 class OWLParser:
     """OWL本体解析器，正确解析OWL核心概念"""
 
-    def __init__(self, owl_data):
+    def __init__(self, owl_data, graph=None):
+        """owl_data为RDF/XML字符串；传入已解析的graph时直接从该图中提取，不再重复解析"""
         self.owl_data = owl_data
-        self.graph = Graph()
+        self.graph = graph if graph is not None else Graph()
+        self._preparsed = graph is not None
         self.classes = {}
         self.datatype_properties = {}
         self.object_properties = {}
         self.restrictions = {}
         self.subclass_relations = []
         self.domain_range_relations = []
+        self.triple_count = 0
+        self._types = {}
+        self._index = {predicate: {} for predicate in INDEXED_PREDICATES}
+        self._subclass_pairs = []
 
     def parse(self):
         """解析OWL数据"""
         try:
-            print(f"[DEBUG] 开始解析OWL数据，数据长度: {len(self.owl_data)} 字符")
-            # 直接解析原始OWL数据，不进行清理
-            self.graph.parse(data=self.owl_data, format='xml')
-            print(f"[DEBUG] OWL图解析完成，包含 {len(self.graph)} 个三元组")
-
-            # 提取OWL核心概念
+            # 单次遍历三元组建立索引，再从索引中提取OWL核心概念
+            self._index_triples()
             self._extract_classes()
             self._extract_properties()
             self._extract_restrictions()
             self._extract_relations()
 
-            print(
-                f"[DEBUG] OWL解析完成: {len(self.classes)} 个类, {len(self.datatype_properties)} 个数据属性, {len(self.object_properties)} 个对象属性, {len(self.restrictions)} 个限制")
+            self._log_summary()
             return True
         except Exception as e:
-            print(f"[ERROR] OWL解析错误: {e}")
-            traceback.print_exc()
+            logger.exception("OWL解析错误: %s", e)
             raise
 
+    def _log_summary(self):
+        """每次解析输出一条汇总日志，意义不明的节点只计数，不逐个输出"""
+        entities = (self.classes, self.datatype_properties, self.object_properties)
+        stats = {
+            'triples': self.triple_count,
+            'classes': len(self.classes),
+            'datatype_properties': len(self.datatype_properties),
+            'object_properties': len(self.object_properties),
+            'restrictions': len(self.restrictions),
+            'subclass_relations': len(self.subclass_relations),
+            'domain_range_relations': len(self.domain_range_relations),
+            'meaningless_nodes': sum(1 for uris in entities for uri in uris if is_meaningless_node(uri))
+        }
+        logger.info("OWL解析完成: %(triples)s 个三元组, %(classes)s 个类, %(datatype_properties)s 个数据属性, "
+                    "%(object_properties)s 个对象属性, %(restrictions)s 个限制, %(meaningless_nodes)s 个意义不明的节点",
+                    stats, extra={'fields': stats})
+
+    def __getstate__(self):
+        """序列化时只保留提取结果，不包含原始数据和RDF图，便于传给其他进程生成可视化"""
+        state = self.__dict__.copy()
+        state['owl_data'] = None
+        state['graph'] = None
+        state['_types'] = {}
+        state['_subclass_pairs'] = []
+        return state
+
+    def _index_triples(self):
+        """读取三元组建立索引（rdflib后端：解析为RDF图后从图中读取），子类按各自的读取方式重写"""
+        if not self._preparsed:
+            logger.debug("开始解析OWL数据，数据长度: %s 字符", len(self.owl_data))
+            # 直接解析原始OWL数据，不进行清理
+            self.graph.parse(data=self.owl_data, format='xml')
+        self.triple_count = len(self.graph)
+        logger.debug("OWL图解析完成，包含 %s 个三元组", self.triple_count)
+        self._index_graph(self.graph)
+
+    def _index_graph(self, graph):
+        """遍历一次提取所需的三元组，建立索引
+
+        按谓词从rdflib的谓词索引中读取三元组，每个相关三元组只访问一次，
+        之后的提取只查询这里建立的字典，不再查询RDF图：
+        - self._types: 类型URI -> {主体: None}（保持主体出现顺序的有序集合）
+        - self._index: 谓词 -> {主体: [宾语, ...]}
+        - self._subclass_pairs: (子类, 父类)列表
+        主体统一使用字符串作为键
+        """
+        types = {type_uri: {} for type_uri in ENTITY_TYPES}
+        for subj, obj in graph.subject_objects(RDF_TYPE):
+            subjects = types.get(obj)
+            if subjects is not None:
+                subjects[str(subj)] = None
+
+        subclass_pairs = [(str(subj), str(obj)) for subj, obj in graph.subject_objects(RDFS_SUBCLASS_OF)]
+
+        index = {}
+        for predicate in INDEXED_PREDICATES:
+            values = index[predicate] = {}
+            for subj, obj in graph.subject_objects(predicate):
+                values.setdefault(str(subj), []).append(obj)
+
+        self._types = types
+        self._index = index
+        self._subclass_pairs = subclass_pairs
+
+    def _index_triple_stream(self, triples, statements=None):
+        """从(主体, 谓词, 宾语)三元组流建立与_index_graph相同的索引，用于不构建rdflib图的后端
+
+        主体和谓词为字符串，宾语为字符串或rdflib Literal；只保留提取所需的三元组，
+        重复的三元组只记录一次（与RDF图的集合语义一致）。statements不为None时，
+        提取所需的每个三元组（包括重复出现的）按顺序以(三元组序号, 主体, 谓词, 宾语)追加到statements中。
+        三元组按文档顺序给出时，索引的顺序与rdflib后端相同：rdflib按谓词读取时先按宾语首次出现的顺序、
+        再按主体的加入顺序列出三元组，因此子类关系按父类分组，主体的多个宾语按宾语在该谓词下首次出现的顺序排列
+        """
+        types = {type_uri: {} for type_uri in ENTITY_TYPES}
+        types_by_uri = {str(type_uri): types[type_uri] for type_uri in ENTITY_TYPES}
+        index = {predicate: {} for predicate in INDEXED_PREDICATES}
+        index_by_uri = {str(predicate): index[predicate] for predicate in INDEXED_PREDICATES}
+        # 各谓词下宾语首次出现的序号
+        ranks = {predicate: {} for predicate in INDEXED_PREDICATES}
+        ranks_by_uri = {str(predicate): ranks[predicate] for predicate in INDEXED_PREDICATES}
+        rdf_type = str(RDF_TYPE)
+        subclass_of = str(RDFS_SUBCLASS_OF)
+        # 父类 -> {子类: None}
+        subclasses = {}
+
+        count = 0
+        for subj, predicate, obj in triples:
+            count += 1
+            if predicate == rdf_type:
+                subjects = types_by_uri.get(obj)
+                if subjects is None:
+                    continue
+                subjects[subj] = None
+            elif predicate == subclass_of:
+                obj = str(obj)
+                subclasses.setdefault(obj, {})[subj] = None
+            else:
+                values = index_by_uri.get(predicate)
+                if values is None:
+                    continue
+                object_ranks = ranks_by_uri[predicate]
+                if obj not in object_ranks:
+                    object_ranks[obj] = len(object_ranks)
+                objects = values.setdefault(subj, [])
+                if obj not in objects:
+                    objects.append(obj)
+            if statements is not None:
+                statements.append((count - 1, subj, predicate, obj))
+
+        for predicate, values in index.items():
+            object_ranks = ranks[predicate]
+            for objects in values.values():
+                if len(objects) > 1:
+                    objects.sort(key=object_ranks.__getitem__)
+
+        self.triple_count = count
+        self._types = types
+        self._index = index
+        self._subclass_pairs = [(subj, obj) for obj, children in subclasses.items() for subj in children]
+
+    def _objects(self, subject, predicate):
+        """从索引中获取主体在指定谓词下的全部宾语"""
+        return self._index[predicate].get(str(subject), ())
+
     def _extract_classes(self):
         """提取OWL类"""
-        print(f"[DEBUG] 开始提取OWL类信息")
+        logger.debug("开始提取OWL类信息")
         class_count = 0
-        for class_uri in self.graph.subjects(RDF_NS.type, OWL_NS.Class):
-            class_name = self._get_local_name(class_uri)
-            class_info = {
-                'uri': str(class_uri),
-                'name': class_name,
-                'label': self._get_label(class_uri),
-                'comment': self._get_comment(class_uri),
-                'type': 'Class'
-            }
-            self.classes[str(class_uri)] = class_info
+        for class_uri in self._types[OWL_NS.Class]:
+            self.classes[class_uri] = self._class_info(class_uri)
             class_count += 1
-        print(f"[DEBUG] 提取完成: 共找到 {class_count} 个类")
+        logger.debug("提取完成: 共找到 %s 个类", class_count)
 
     def _extract_properties(self):
         """提取OWL属性（数据属性和对象属性）"""
-        print(f"[DEBUG] 开始提取OWL属性信息")
+        logger.debug("开始提取OWL属性信息")
         datatype_prop_count = 0
         object_prop_count = 0
 
         # 提取数据属性
-        for prop_uri in self.graph.subjects(RDF_NS.type, OWL_NS.DatatypeProperty):
-            prop_name = self._get_local_name(prop_uri)
-            prop_info = {
-                'uri': str(prop_uri),
-                'name': prop_name,
-                'label': self._get_label(prop_uri),
-                'comment': self._get_comment(prop_uri),
-                'type': 'DatatypeProperty',
-                'domain': self._get_domain(prop_uri),
-                'range': self._get_range(prop_uri)
-            }
-            self.datatype_properties[str(prop_uri)] = prop_info
+        for prop_uri in self._types[OWL_NS.DatatypeProperty]:
+            self.datatype_properties[prop_uri] = self._property_info(prop_uri, 'DatatypeProperty')
             datatype_prop_count += 1
 
         # 提取对象属性
-        for prop_uri in self.graph.subjects(RDF_NS.type, OWL_NS.ObjectProperty):
-            prop_name = self._get_local_name(prop_uri)
-            prop_info = {
-                'uri': str(prop_uri),
-                'name': prop_name,
-                'label': self._get_label(prop_uri),
-                'comment': self._get_comment(prop_uri),
-                'type': 'ObjectProperty',
-                'domain': self._get_domain(prop_uri),
-                'range': self._get_range(prop_uri)
-            }
-            self.object_properties[str(prop_uri)] = prop_info
+        for prop_uri in self._types[OWL_NS.ObjectProperty]:
+            self.object_properties[prop_uri] = self._property_info(prop_uri, 'ObjectProperty')
             object_prop_count += 1
 
-        print(f"[DEBUG] 属性提取完成: {datatype_prop_count} 个数据属性, {object_prop_count} 个对象属性")
+        logger.debug("属性提取完成: %s 个数据属性, %s 个对象属性", datatype_prop_count, object_prop_count)
 
     def _extract_restrictions(self):
         """提取OWL限制"""
-        print(f"[DEBUG] 开始提取OWL限制信息")
+        logger.debug("开始提取OWL限制信息")
         restriction_count = 0
-        for restriction_uri in self.graph.subjects(RDF_NS.type, OWL_NS.Restriction):
-            restriction_info = {
-                'uri': str(restriction_uri),
-                'type': 'Restriction',
-                'onProperty': self._get_on_property(restriction_uri),
-                'someValuesFrom': self._get_some_values_from(restriction_uri),
-                'allValuesFrom': self._get_all_values_from(restriction_uri),
-                'hasValue': self._get_has_value(restriction_uri)
-            }
-            self.restrictions[str(restriction_uri)] = restriction_info
+        for restriction_uri in self._types[OWL_NS.Restriction]:
+            self.restrictions[restriction_uri] = self._restriction_info(restriction_uri)
             restriction_count += 1
-        print(f"[DEBUG] 限制提取完成: 共找到 {restriction_count} 个限制")
+        logger.debug("限制提取完成: 共找到 %s 个限制", restriction_count)
+
+    def _class_info(self, class_uri):
+        """从索引生成单个类的信息"""
+        return {
+            'uri': class_uri,
+            'name': self._get_local_name(class_uri),
+            'label': self._get_label(class_uri),
+            'comment': self._get_comment(class_uri),
+            'type': 'Class'
+        }
+
+    def _property_info(self, prop_uri, prop_type):
+        """从索引生成单个属性的信息，prop_type为DatatypeProperty或ObjectProperty"""
+        return {
+            'uri': prop_uri,
+            'name': self._get_local_name(prop_uri),
+            'label': self._get_label(prop_uri),
+            'comment': self._get_comment(prop_uri),
+            'type': prop_type,
+            'domain': self._get_domain(prop_uri),
+            'range': self._get_range(prop_uri)
+        }
+
+    def _restriction_info(self, restriction_uri):
+        """从索引生成单个限制的信息"""
+        return {
+            'uri': restriction_uri,
+            'type': 'Restriction',
+            'onProperty': self._get_on_property(restriction_uri),
+            'someValuesFrom': self._get_some_values_from(restriction_uri),
+            'allValuesFrom': self._get_all_values_from(restriction_uri),
+            'hasValue': self._get_has_value(restriction_uri)
+        }
 
     def _extract_relations(self):
         """提取关系"""
-        print(f"[DEBUG] 开始提取OWL关系信息")
+        logger.debug("开始提取OWL关系信息")
         subclass_count = 0
         domain_range_count = 0
 
         # 提取subClassOf关系
-        for subj, obj in self.graph.subject_objects(RDFS.subClassOf):
-            if str(obj) in self.classes:  # 确保目标是有效的类
+        classes = self._types[OWL_NS.Class]
+        for subj, obj in self._subclass_pairs:
+            if obj in classes:  # 确保目标是有效的类
                 relation = {
                     'type': 'subClassOf',
-                    'subclass': str(subj),
-                    'superclass': str(obj)
+                    'subclass': subj,
+                    'superclass': obj
                 }
                 self.subclass_relations.append(relation)
                 subclass_count += 1
 
-        # 提取domain和range关系
-        for prop_type in [OWL_NS.DatatypeProperty, OWL_NS.ObjectProperty]:
-            for prop_uri in self.graph.subjects(RDF_NS.type, prop_type):
+        # 提取domain和range关系（按索引中的属性，只提取了部分实体的信息时也得到全部关系）
+        for prop_type in (OWL_NS.DatatypeProperty, OWL_NS.ObjectProperty):
+            for prop_uri in self._types[prop_type]:
                 # 提取domain
-                for domain_class in self.graph.objects(prop_uri, RDFS_NS.domain):
+                for domain_class in self._get_domain(prop_uri):
                     relation = {
                         'type': 'domain',
-                        'property': str(prop_uri),
-                        'class': str(domain_class)
+                        'property': prop_uri,
+                        'class': domain_class
                     }
                     self.domain_range_relations.append(relation)
                     domain_range_count += 1
 
                 # 提取range
-                for range_class in self.graph.objects(prop_uri, RDFS_NS.range):
+                for range_class in self._get_range(prop_uri):
                     relation = {
                         'type': 'range',
-                        'property': str(prop_uri),
-                        'class': str(range_class)
+                        'property': prop_uri,
+                        'class': range_class
                     }
                     self.domain_range_relations.append(relation)
                     domain_range_count += 1
 
-        print(f"[DEBUG] 关系提取完成: {subclass_count} 个子类关系, {domain_range_count} 个domain/range关系")
+        logger.debug("关系提取完成: %s 个子类关系, %s 个domain/range关系", subclass_count, domain_range_count)
 
     def _get_local_name(self, uri):
         """获取URI的本地名称"""
-        if not uri:
-            return "Unknown"
-        uri_str = str(uri)
-
-        # 检查是否是意义不明的UUID格式节点
-        if self._is_meaningless_node(uri_str):
-            print(f"警告: 发现意义不明的节点URI: {uri_str}")
-            return "Unknown_Node"
-
-        if '#' in uri_str:
-            return uri_str.split('#')[-1]
-        elif '/' in uri_str:
-            return uri_str.split('/')[-1]
-        return uri_str
+        return get_local_name(uri)
 
     def _get_label(self, uri):
         """获取RDFS标签，优先选择中文标签"""
         # 收集所有标签及其语言
         labels = []
-        for label in self.graph.objects(uri, RDFS_NS.label):
+        for label in self._objects(uri, RDFS_LABEL):
             labels.append((str(label), getattr(label, 'language', None)))
         
         # 优先选择中文标签
@@ -211,64 +386,51 @@ class OWLParser:
 
     def _get_comment(self, uri):
         """获取RDFS注释"""
-        for comment in self.graph.objects(uri, RDFS_NS.comment):
+        for comment in self._objects(uri, RDFS_COMMENT):
             return str(comment)
         return ""
 
     def _get_domain(self, uri):
         """获取属性的domain"""
         domains = []
-        for domain in self.graph.objects(uri, RDFS_NS.domain):
+        for domain in self._objects(uri, RDFS_DOMAIN):
             domains.append(str(domain))
         return domains
 
     def _get_range(self, uri):
         """获取属性的range"""
         ranges = []
-        for range_uri in self.graph.objects(uri, RDFS_NS.range):
+        for range_uri in self._objects(uri, RDFS_RANGE):
             ranges.append(str(range_uri))
         return ranges
 
     def _get_on_property(self, restriction_uri):
         """获取限制的onProperty"""
-        for prop in self.graph.objects(restriction_uri, OWL_NS.onProperty):
+        for prop in self._objects(restriction_uri, OWL_ON_PROPERTY):
             return str(prop)
         return None
 
     def _get_some_values_from(self, restriction_uri):
         """获取限制的someValuesFrom"""
-        for value in self.graph.objects(restriction_uri, OWL_NS.someValuesFrom):
+        for value in self._objects(restriction_uri, OWL_SOME_VALUES_FROM):
             return str(value)
         return None
 
     def _get_all_values_from(self, restriction_uri):
         """获取限制的allValuesFrom"""
-        for value in self.graph.objects(restriction_uri, OWL_NS.allValuesFrom):
+        for value in self._objects(restriction_uri, OWL_ALL_VALUES_FROM):
             return str(value)
         return None
 
     def _get_has_value(self, restriction_uri):
         """获取限制的hasValue"""
-        for value in self.graph.objects(restriction_uri, OWL_NS.hasValue):
+        for value in self._objects(restriction_uri, OWL_HAS_VALUE):
             return str(value)
         return None
 
     def _is_meaningless_node(self, uri):
         """检查是否是意义不明的节点URI（如UUID格式）"""
-        import re
-        # 匹配UUID格式的节点ID，如N018b698f83194c0b83c046e2697f22aa
-        uuid_pattern = r'^N[0-9a-f]{32}$'
-        if re.match(uuid_pattern, uri):
-            return True
-        # 匹配其他可能的无意义节点格式
-        meaningless_patterns = [
-            r'^genid[0-9]+$',  # 自动生成的ID
-            r'^_[0-9a-f]+$',  # 匿名节点
-        ]
-        for pattern in meaningless_patterns:
-            if re.match(pattern, uri):
-                return True
-        return False
+        return is_meaningless_node(uri)
 
     def get_classes(self):
         """获取所有类"""
@@ -294,6 +456,24 @@ class OWLParser:
         """获取domain和range关系"""
         return self.domain_range_relations
 
+    def get_search_text(self):
+        """获取用于全文检索的类和属性文本，返回(标签文本, 注释文本)
+
+        标签文本包含本地名称及所有语言的rdfs:label（不只是界面显示的首选标签）
+        """
+        return self._search_text(uri for entities in (self.classes, self.datatype_properties, self.object_properties)
+                                 for uri in entities)
+
+    def _search_text(self, uris):
+        """生成指定类和属性的检索文本，返回(标签文本, 注释文本)"""
+        labels = []
+        comments = []
+        for uri in uris:
+            labels.append(self._get_local_name(uri))
+            labels.extend(str(label) for label in self._objects(uri, RDFS_LABEL))
+            comments.extend(str(comment) for comment in self._objects(uri, RDFS_COMMENT))
+        return '\n'.join(labels), '\n'.join(comments)
+
     def get_all_relations(self):
         """获取所有三元组关系，按source聚类"""
         # 获取所有三元组
@@ -347,179 +527,91 @@ class OWLParser:
         return result
 
 
-class OWLReady2Parser:
-    """使用owlready2库解析OWL本体数据，返回结构化JSON"""
-
-    def __init__(self, owl_data):
-        self.owl_data = owl_data
-        self.ontology = None
-        self.result = {
-            'classes': [],
-            'properties': [],
-            'individuals': [],
-            'hierarchy': []
-        }
-
-    def parse(self):
-        """解析OWL数据并返回结构化JSON"""
-        try:
-            print(f"[DEBUG] OWLReady2Parser开始解析OWL数据，数据长度: {len(self.owl_data)} 字符")
-            # 创建临时文件来加载OWL数据
-            temp_file = 'temp_ontology.owl'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(str(self.owl_data))
-            print(f"[DEBUG] 临时文件创建完成: {temp_file}")
-
-            # 使用owlready2加载本体
-            self.ontology = get_ontology(temp_file).load()
-            print(f"[DEBUG] 本体加载完成，类数量: {len(list(self.ontology.classes()))}")
-
-            # 解析各类信息
-            self._extract_classes()
-            self._extract_properties()
-            self._extract_individuals()
-            self._extract_hierarchy()
-
-            # 清理临时文件
-            os.remove(temp_file)
-            print(f"[DEBUG] 临时文件已清理")
-
-            print(
-                f"[DEBUG] OWLReady2解析完成: {len(self.result['classes'])} 个类, {len(self.result['properties'])} 个属性, {len(self.result['individuals'])} 个个体")
-            return self.result
-
-        except Exception as e:
-            print(f"[ERROR] OWLReady2解析错误: {e}")
-            traceback.print_exc()
-            # 清理临时文件
-            if os.path.exists('temp_ontology.owl'):
-                os.remove('temp_ontology.owl')
-                print(f"[DEBUG] 错误后清理临时文件")
-            raise
+def _owlready2_node(node):
+    """转换owlready2图中的节点：空白节点以存储ID命名，转换为"_<ID>"格式，使其按意义不明的节点处理"""
+    if isinstance(node, BNode):
+        return f'_{node}'
+    return node if isinstance(node, Literal) else str(node)
 
-    def _extract_classes(self):
-        """提取类信息"""
-        print(f"[DEBUG] 开始提取类信息")
-        class_count = 0
-        for cls in self.ontology.classes():
-            class_info = {
-                'uri': str(cls.iri),
-                'name': cls.name,
-                'label': self._get_label(cls),
-                'comment': self._get_comment(cls),
-                'type': 'Class'
-            }
-            self.result['classes'].append(class_info)
-            class_count += 1
-        print(f"[DEBUG] 类信息提取完成: {class_count} 个类")
 
-    def _extract_properties(self):
-        """提取属性信息"""
-        print(f"[DEBUG] 开始提取属性信息")
-        data_prop_count = 0
-        object_prop_count = 0
+class OWLReady2Parser(OWLParser):
+    """使用owlready2加载OWL数据的解析器，提取结果与OWLParser相同
 
-        # 数据属性
-        for prop in self.ontology.data_properties():
-            # 处理数据类型属性的范围
-            range_info = None
-            if prop.range:
-                if hasattr(prop.range, 'iri'):
-                    range_info = str(prop.range.iri)
-                elif isinstance(prop.range, list) and len(prop.range) > 0:
-                    # 如果范围是一个列表，取第一个元素
-                    range_item = prop.range[0]
-                    if hasattr(range_item, 'iri'):
-                        range_info = str(range_item.iri)
-            
-            prop_info = {
-                'uri': str(prop.iri),
-                'name': prop.name,
-                'label': self._get_label(prop),
-                'comment': self._get_comment(prop),
-                'type': 'DatatypeProperty',
-                'domain': [str(d.iri) for d in prop.domain] if prop.domain else [],
-                'range': range_info
-            }
-            self.result['properties'].append(prop_info)
-            data_prop_count += 1
-
-        # 对象属性
-        for prop in self.ontology.object_properties():
-            # 处理对象属性的范围
-            range_info = None
-            if prop.range:
-                if hasattr(prop.range, 'iri'):
-                    range_info = str(prop.range.iri)
-                elif isinstance(prop.range, list) and len(prop.range) > 0:
-                    # 如果范围是一个列表，取第一个元素
-                    range_item = prop.range[0]
-                    if hasattr(range_item, 'iri'):
-                        range_info = str(range_item.iri)
-            
-            prop_info = {
-                'uri': str(prop.iri),
-                'name': prop.name,
-                'label': self._get_label(prop),
-                'comment': self._get_comment(prop),
-                'type': 'ObjectProperty',
-                'domain': [str(d.iri) for d in prop.domain] if prop.domain else [],
-                'range': range_info
-            }
-            self.result['properties'].append(prop_info)
-            object_prop_count += 1
+    每次解析在独立的内存World中加载本体，读取完成后关闭World释放其四元组存储：
+    不写临时文件，也不会在owlready2默认World中累积已加载的本体，可在多个线程中同时使用
+    """
 
-        print(f"[DEBUG] 属性信息提取完成: {data_prop_count} 个数据属性, {object_prop_count} 个对象属性")
-
-    def _extract_individuals(self):
-        """提取个体信息"""
-        print(f"[DEBUG] 开始提取个体信息")
-        indiv_count = 0
-        for indiv in self.ontology.individuals():
-            indiv_info = {
-                'uri': str(indiv.iri),
-                'name': indiv.name,
-                'label': self._get_label(indiv),
-                'comment': self._get_comment(indiv),
-                'type': 'Individual',
-                'classes': [str(cls.iri) for cls in indiv.is_a]
-            }
-            self.result['individuals'].append(indiv_info)
-            indiv_count += 1
-        print(f"[DEBUG] 个体信息提取完成: {indiv_count} 个个体")
-
-    def _extract_hierarchy(self):
-        """提取类层次结构"""
-        print(f"[DEBUG] 开始提取层次结构信息")
-        hierarchy_count = 0
-        for cls in self.ontology.classes():
-            for parent in cls.is_a:
-                if hasattr(parent, 'iri'):  # 确保是类而不是其他类型
-                    hierarchy_info = {
-                        'child': str(cls.iri),
-                        'parent': str(parent.iri),
-                        'relation': 'subClassOf'
-                    }
-                    self.result['hierarchy'].append(hierarchy_info)
-                    hierarchy_count += 1
-        print(f"[DEBUG] 层次结构提取完成: {hierarchy_count} 个关系")
-
-    def _get_label(self, entity):
-        """获取实体的标签"""
-        if hasattr(entity, 'label') and entity.label:
-            label = str(entity.label[0]) if entity.label else entity.name
-            # 移除引号
-            if label and isinstance(label, str):
-                label = label.strip('"\'')
-            return label
-        return entity.name
-
-    def _get_comment(self, entity):
-        """获取实体的注释"""
-        if hasattr(entity, 'comment') and entity.comment:
-            comment = str(entity.comment[0]) if entity.comment else ""
-            # 移除引号
-            if comment and isinstance(comment, str):
-                comment = comment.strip('"\'')
-            return comment
-        return ""
\ No newline at end of file
+    def _index_triples(self):
+        logger.debug("OWLReady2Parser开始解析OWL数据")
+        world = World()
+        try:
+            # 从内存或已打开的文件加载本体，基准IRI只用于解析文档中的相对IRI，本体声明的IRI会覆盖它
+            if hasattr(self.owl_data, 'read'):
+                fileobj = self.owl_data
+            elif isinstance(self.owl_data, bytes):
+                fileobj = io.BytesIO(self.owl_data)
+            else:
+                fileobj = io.BytesIO(str(self.owl_data).encode('utf-8'))
+            world.get_ontology(OWLREADY2_BASE_IRI).load(fileobj=fileobj)
+            # 通过rdflib接口按谓词查询四元组存储
+            graph = world.as_rdflib_graph()
+            self._index_triple_stream(
+                (_owlready2_node(subj), str(predicate), _owlready2_node(obj))
+                for predicate in (RDF_TYPE, RDFS_SUBCLASS_OF) + INDEXED_PREDICATES
+                for subj, obj in graph.subject_objects(predicate))
+            self.triple_count = len(graph)
+        finally:
+            world.close()
+
+
+def make_text(value, lang=None, datatype=None):
+    """流式后端的文字构造函数：提取只用到文字的文本和语言标签，只有带语言标签的文字构造为Literal"""
+    return Literal(value, lang=lang) if lang else value
+
+
+class StreamingOWLParser(OWLParser):
+    """流式读取RDF/XML的解析器，提取结果与OWLParser相同
+
+    使用iterparse按文档顺序读取三元组，只在索引中保留提取所需的类型、标签、注释、
+    定义域/值域、子类和限制三元组，不构建RDF图；owl_data可以是RDF/XML字符串或已打开的二进制文件。
+    statements为提取所需的三元组，top_level_bnodes和top_level_triples为读取每个顶层元素后的空白节点编号和三元组数量，
+    用于按顶层元素保存提取索引，增量更新时只重新读取修改的顶层元素（见incremental.py）
+    """
+
+    def __init__(self, owl_data, graph=None):
+        super().__init__(owl_data, graph)
+        self.statements = []
+        self.top_level_bnodes = []
+        self.top_level_triples = []
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['statements'] = []
+        state['top_level_bnodes'] = []
+        state['top_level_triples'] = []
+        return state
+
+    def _index_triples(self):
+        logger.debug("StreamingOWLParser开始解析OWL数据")
+        reader = RDFXMLReader(self.owl_data, literal=make_text)
+        self.statements = []
+        self._index_triple_stream(reader.triples(), self.statements)
+        self.top_level_bnodes = reader.top_level_bnodes
+        self.top_level_triples = reader.top_level_triples
+
+
+# 解析器后端注册表：名称 -> 解析器类，解析器类以RDF/XML数据构造，parse()后通过get_*方法读取提取结果
+PARSER_BACKENDS = {
+    'rdflib': OWLParser,
+    'owlready2': OWLReady2Parser,
+    'stream': StreamingOWLParser,
+}
+DEFAULT_PARSER_BACKEND = 'stream'
+
+
+def get_parser_backend(name=None):
+    """获取解析器后端名称，name为空时使用环境变量PARSER_BACKEND（默认stream），不支持的名称抛出ValueError"""
+    name = name or os.environ.get('PARSER_BACKEND') or DEFAULT_PARSER_BACKEND
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"不支持的解析器后端: {name}，可选: {', '.join(PARSER_BACKENDS)}")
+    return name
@@ -0,0 +1,274 @@
+"""
+本体导入处理模块
+解析本体数据并生成版本的全部产物：可视化图、tree层级结构、table三元组、检索文本以及OWL/JSON-LD两种格式
+
+每次导入只解析一次本体数据，可视化和跨格式序列化都基于同一个RDF图；使用流式解析器提取可视化数据时，
+OWL数据的RDF图只用于格式序列化。本体规模较大时，相互独立的网络图生成和格式序列化阶段分发到进程池并行执行，
+此时若RDF图尚未构建，则由子进程直接解析原始数据，主进程不构建RDF图。
+
+修改已有版本的数据时优先增量更新（见incremental.py），只重新读取变化的部分，无法增量更新时完整生成。
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from rdflib import Graph
+
+from cache import content_hash, get_visualization_cache
+from convert import OWLToJSONLDConverter, detect_data_type
+from incremental import apply_edit, build_index_artifact, make_index_artifact
+from metrics import current_timings, record, span
+from models import OntologyVersion
+from ontology import OntologyModel
+from parsers import get_parser_backend
+from uploads import discard_upload, read_upload_text
+from visualization import build_graph_data, build_structure_data, make_visualization_result, visualization_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 三元组数量达到该值时才使用进程池，规模较小时进程间传输的开销大于并行收益
+DEFAULT_PARALLEL_MIN_TRIPLES = 50000
+
+_process_pool = None
+_process_pool_pid = None
+_process_pool_lock = threading.Lock()
+
+
+def convert_formats(ontology_data):
+    """检测数据类型并生成OWL和JSON-LD两种格式的数据"""
+    model = OntologyModel.parse(ontology_data)
+    return model.to_owl(), model.to_jsonld()
+
+
+def serialize_other_format(triples, data_type, namespaces=()):
+    """将三元组序列化为与输入不同的另一种格式（可在进程池中执行）
+
+    输入为JSON-LD时生成RDF/XML，输入为OWL时生成JSON-LD；
+    在进程池中执行时triples为三元组列表，namespaces为原图绑定的(前缀, 命名空间)，用于重建相同的前缀；
+    triples为字符串时为原始RDF/XML数据，在本函数中解析
+    """
+    if isinstance(triples, Graph):
+        graph = triples
+    elif isinstance(triples, str):
+        graph = Graph()
+        graph.parse(data=triples, format='xml')
+    else:
+        graph = Graph()
+        for prefix, namespace in namespaces:
+            graph.bind(prefix, namespace, override=False)
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+    if data_type == "jsonld":
+        return graph.serialize(format='xml')
+    return OWLToJSONLDConverter().convert_triples(graph)
+
+
+def _get_process_pool(triple_count):
+    """按本体规模获取进程池，规模较小或未启用时返回None
+
+    环境变量：
+    - PIPELINE_PROCESSES: 进程池大小，默认为min(4, CPU核数)，设为0或1禁用
+    - PIPELINE_PARALLEL_MIN_TRIPLES: 使用进程池的最小三元组数量，默认50000
+    """
+    global _process_pool, _process_pool_pid
+    workers = int(os.environ.get('PIPELINE_PROCESSES', min(4, os.cpu_count() or 1)))
+    min_triples = int(os.environ.get('PIPELINE_PARALLEL_MIN_TRIPLES', DEFAULT_PARALLEL_MIN_TRIPLES))
+    if workers <= 1 or triple_count < min_triples:
+        return None
+
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_pid != os.getpid():
+            # 使用spawn启动子进程，避免在多线程的服务进程中fork
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _process_pool_pid = os.getpid()
+    return _process_pool
+
+
+def _timed_call(func, *args):
+    """执行阶段函数并返回(结果, 耗时秒数)，在进程池中执行时由主进程记录耗时"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _run_stage(pool, stage, func, *args):
+    """有进程池时提交到进程池，否则在当前线程执行，统一返回Future
+
+    阶段耗时按stage名称记录；进程池中执行的阶段在结果返回后记录到提交时所在的请求
+    """
+    future = Future()
+    if pool is None:
+        try:
+            with span(stage):
+                future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    timings = current_timings()
+
+    def _done(stage_future):
+        try:
+            result, elapsed = stage_future.result()
+        except Exception as e:
+            future.set_exception(e)
+            return
+        # 先记录耗时再设置结果，保证等待结果的请求线程能读到本阶段的耗时
+        record(stage, elapsed, timings)
+        future.set_result(result)
+
+    pool.submit(_timed_call, func, *args).add_done_callback(_done)
+    return future
+
+
+def load_upload(path, data_type):
+    """从上传的临时文件解析本体，返回(模型, 原始数据字符串)，无法解析时抛出ValueError
+
+    OWL文件在提取可视化数据或构建RDF图时才读取解析，解析错误由build_artifacts抛出
+    """
+    try:
+        model = OntologyModel.parse_file(path, data_type)
+    except Exception as e:
+        raise ValueError(f'无法解析ontology数据: {e}')
+    return model, read_upload_text(path)
+
+
+def build_artifacts(ontology_data, model=None, parser_backend=None):
+    """生成版本的全部产物，无法解析时抛出ValueError
+
+    传入已解析的model（如从上传文件解析得到）时不再重复解析ontology_data；
+    parser_backend指定提取可视化数据的解析器后端，为None时使用PARSER_BACKEND配置
+    """
+    if model is None:
+        try:
+            model = OntologyModel.parse(ontology_data)
+        except Exception as e:
+            raise ValueError(f'无法解析ontology数据: {e}')
+    data_type = model.data_type
+
+    cache = get_visualization_cache()
+    key = visualization_cache_key(ontology_data, parser_backend)
+    visualization_data = cache.get(key) if cache else None
+    # 先提取可视化数据：流式解析器提取后即可得到三元组数量，不需要为选择进程池而构建RDF图
+    parser = None
+    if visualization_data is None:
+        try:
+            parser = model.get_parser(parser_backend)
+        except Exception as e:
+            raise ValueError(f'无法解析ontology数据: {e}')
+
+    pool = _get_process_pool(len(model))
+    if pool is not None and not model.has_graph() and data_type == "owl":
+        # RDF图尚未构建：子进程直接解析原始数据并序列化
+        formats_args = (ontology_data, data_type)
+    elif pool is not None:
+        # 进程池中无法直接共享rdflib图，只传输三元组
+        formats_args = (list(model.graph), data_type, list(model.graph.namespaces()))
+    else:
+        formats_args = (model.graph, data_type)
+    formats_future = _run_stage(pool, 'formats', serialize_other_format, *formats_args)
+
+    if visualization_data is None:
+        graph_future = _run_stage(pool, 'graph', build_graph_data, parser)
+        with span('structure'):
+            tree_data, triple_relations, search_text = build_structure_data(parser)
+        visualization_data = make_visualization_result(graph_future.result(), tree_data, triple_relations, search_text)
+        # index随可视化结果一起缓存，命中缓存时仍可增量更新
+        visualization_data['index'] = make_index_artifact(parser, ontology_data)
+        if cache:
+            cache.put(key, visualization_data)
+    index = visualization_data.get('index')
+    if index is None:
+        # 缓存结果由generate_visualization写入，没有index，只读取数据建立索引
+        index = build_index_artifact(ontology_data) if get_parser_backend(parser_backend) == 'stream' else ''
+
+    other_format = formats_future.result()
+    if data_type == "jsonld":
+        owl_data, jsonld_data = other_format, ontology_data
+    else:
+        owl_data, jsonld_data = ontology_data, other_format
+
+    return {
+        'graph': visualization_data['graph'],
+        'tree': visualization_data['tree'],
+        'table': visualization_data['table'],
+        'owl_data': owl_data,
+        'jsonld_data': jsonld_data,
+        'search': visualization_data.get('search'),
+        'index': index
+    }
+
+
+def rebuild_artifacts(previous_data, ontology_data, previous, parser_backend=None):
+    """修改版本数据后重新生成产物，无法解析时抛出ValueError
+
+    previous为修改前的graph、tree、table和index产物，能增量更新时只返回发生变化的产物、新的index
+    和OWL/JSON-LD数据，否则完整生成全部产物。增量更新只修改可视化产物，JSON-LD数据仍需完整序列化，
+    规模较大时在进程池中与增量更新并行执行
+    """
+    index = previous.get('index')
+    is_rdfxml = isinstance(index, dict) and isinstance(ontology_data, str) and detect_data_type(ontology_data) == 'owl'
+    pool = _get_process_pool(index.get('triples') or 0) if is_rdfxml else None
+    formats_future = _run_stage(pool, 'formats', serialize_other_format, ontology_data, 'owl') if pool else None
+    try:
+        artifacts = apply_edit(previous_data, ontology_data, previous, parser_backend)
+    except Exception as e:
+        logger.exception("增量更新失败，完整生成产物: %s", e)
+        artifacts = None
+    if artifacts is None:
+        return build_artifacts(ontology_data, parser_backend=parser_backend)
+
+    # 只有RDF/XML数据能增量更新，OWL数据即原始数据
+    if formats_future is None:
+        formats_future = _run_stage(None, 'formats', serialize_other_format, ontology_data, 'owl')
+    artifacts['owl_data'] = ontology_data
+    artifacts['jsonld_data'] = formats_future.result()
+    return artifacts
+
+
+def ingest_version(version_id, ontology_data, model=None, parser_backend=None):
+    """为已保存的版本生成产物并写回数据库
+
+    写回时校验版本当前的内容哈希，若版本在处理期间又被修改，则放弃本次结果，
+    由后续任务写入。返回是否写入成功。
+    """
+    with span('ingest'):
+        artifacts = build_artifacts(ontology_data, model, parser_backend)
+        with span('db_write'):
+            applied = OntologyVersion.save_artifacts(version_id, artifacts, content_hash(ontology_data))
+    if not applied:
+        logger.info("版本 %s 的数据已被修改或删除，丢弃本次生成的产物", version_id)
+    return applied
+
+
+def recover_version(version_id):
+    """重新执行中断的导入任务：从保存的原始数据完整生成产物"""
+    ontology_data = OntologyVersion.get_ontology_data(version_id)
+    if ontology_data is None:
+        raise ValueError(f'版本 {version_id} 不存在或没有原始数据')
+    return ingest_version(version_id, ontology_data)
+
+
+def reingest_version(version_id, previous_data, ontology_data, parser_backend=None):
+    """修改版本数据后在后台重新生成产物并写回数据库，previous_data为修改前的数据，返回是否写入成功"""
+    with span('ingest'):
+        with span('db_read'):
+            previous = OntologyVersion.get_artifacts(version_id, ('graph', 'tree', 'table', 'index'))
+        artifacts = rebuild_artifacts(previous_data, ontology_data, previous, parser_backend)
+        with span('db_write'):
+            applied = OntologyVersion.save_artifacts(version_id, artifacts, content_hash(ontology_data))
+    if not applied:
+        logger.info("版本 %s 的数据已被修改或删除，丢弃本次生成的产物", version_id)
+    return applied
+
+
+def ingest_upload(version_id, path, data_type, parser_backend=None):
+    """从上传的临时文件为版本生成产物并写回数据库，完成后删除临时文件"""
+    try:
+        model, ontology_data = load_upload(path, data_type)
+        return ingest_version(version_id, ontology_data, model, parser_backend)
+    finally:
+        discard_upload(path)
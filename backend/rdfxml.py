@@ -0,0 +1,392 @@
+"""
+RDF/XML流式解析模块
+使用xml.etree.ElementTree.iterparse逐个元素读取RDF/XML并按RDF/XML语法生成三元组，不构建RDF图，
+元素处理完后立即清除，内存占用与文档的嵌套深度相关，而与文档大小无关
+
+生成的三元组为(主体, 谓词, 宾语)：URI为字符串，空白节点为"_<十六进制序号>"格式的字符串，
+文字默认为rdflib Literal，也可以指定其他构造函数（如只需要文本和语言标签时避免构造Literal的开销）。
+支持rdf:about/rdf:ID/rdf:nodeID、xml:base、xml:lang、rdf:datatype、属性特性（property attributes）、
+rdf:parseType="Resource"/"Collection"/"Literal"，容器成员rdf:li按出现顺序编号为rdf:_n。
+
+split_top_level/scan_top_level不解析XML，只按标签定位rdf:RDF下各顶层元素在文本中的位置，
+用于只重新读取修改前后发生变化的顶层元素（见incremental.py）。
+"""
+
+import io
+import re
+from urllib.parse import urljoin
+from xml.etree.ElementTree import iterparse, tostring
+
+from rdflib import Literal, URIRef
+
+RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+XML = 'http://www.w3.org/XML/1998/namespace'
+
+RDF_TYPE = RDF + 'type'
+RDF_FIRST = RDF + 'first'
+RDF_REST = RDF + 'rest'
+RDF_NIL = RDF + 'nil'
+RDF_XML_LITERAL = RDF + 'XMLLiteral'
+
+_RDF_RDF = '{%s}RDF' % RDF
+_RDF_DESCRIPTION = '{%s}Description' % RDF
+_RDF_LI = '{%s}li' % RDF
+_RDF_ABOUT = '{%s}about' % RDF
+_RDF_ID = '{%s}ID' % RDF
+_RDF_NODE_ID = '{%s}nodeID' % RDF
+_RDF_RESOURCE = '{%s}resource' % RDF
+_RDF_DATATYPE = '{%s}datatype' % RDF
+_RDF_PARSE_TYPE = '{%s}parseType' % RDF
+_RDF_TYPE_ATTR = '{%s}type' % RDF
+_XML_BASE = '{%s}base' % XML
+_XML_LANG = '{%s}lang' % XML
+_XML_PREFIX = '{%s}' % XML
+
+# 不作为属性特性处理的语法属性
+_SYNTAX_ATTRIBUTES = frozenset((_RDF_ABOUT, _RDF_ID, _RDF_NODE_ID, _RDF_RESOURCE, _RDF_DATATYPE,
+                                _RDF_PARSE_TYPE, '{%s}bagID' % RDF, '{%s}aboutEach' % RDF))
+
+_ABSOLUTE_IRI = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+# 定位顶层元素时识别的标记：结束标签、开始标签（含空元素标签）、注释、CDATA、处理指令和文档类型声明，
+# 其他位置出现的"<"说明文本不是格式良好的XML
+_MARKUP = re.compile(r'''
+    (?P<end></[^\s>]+\s*>)
+  | (?P<start><[^\s/>!?]+(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*(?P<empty>/)?>)
+  | <!--.*?-->
+  | <!\[CDATA\[.*?\]\]>
+  | <\?.*?\?>
+  | <!DOCTYPE(?:[^\[>]|\[.*?\])*>
+  | (?P<error><)
+''', re.S | re.X)
+
+# 元素在文档中的角色
+_ROOT, _NODE, _PROPERTY, _SKIP = range(4)
+# 属性元素的宾语形式
+_OBJECT_PENDING, _OBJECT_SET, _OBJECT_COLLECTION, _OBJECT_LITERAL = range(4)
+
+
+def _resolve(base, ref):
+    """按xml:base解析相对IRI"""
+    if not base or _ABSOLUTE_IRI.match(ref):
+        return ref
+    return urljoin(base, ref)
+
+
+def make_literal(value, lang=None, datatype=None):
+    """默认的文字构造函数，生成rdflib Literal"""
+    if datatype is not None:
+        return Literal(value, datatype=URIRef(datatype))
+    return Literal(value, lang=lang)
+
+
+def _tag_uri(tag):
+    """将ElementTree的{命名空间}本地名转换为URI"""
+    if tag[0] == '{':
+        namespace, _, local = tag[1:].partition('}')
+        return namespace + local
+    return tag
+
+
+class _Frame:
+    """元素栈中的一层：记录元素的角色、作用域内的xml:base/xml:lang以及主体或谓词"""
+
+    __slots__ = ('role', 'elem', 'base', 'lang', 'subject', 'predicate', 'datatype', 'state', 'items', 'li')
+
+    def __init__(self, role, elem, base, lang, subject=None, predicate=None):
+        self.role = role
+        self.elem = elem
+        self.base = base
+        self.lang = lang
+        self.subject = subject
+        self.predicate = predicate
+        self.datatype = None
+        self.state = _OBJECT_PENDING
+        self.items = None
+        self.li = 0
+
+
+class RDFXMLReader:
+    """RDF/XML流式读取器，每次调用triples()重新读取数据源"""
+
+    def __init__(self, source, base='', literal=make_literal, bnode_start=0):
+        """source为RDF/XML字符串、字节串或已打开的二进制文件；base为解析相对IRI的文档基准地址；
+        literal为文字构造函数literal(值, 语言标签, 数据类型URI)；bnode_start为空白节点编号的起始值
+
+        读取后top_level_bnodes依次为每个顶层节点元素读取完成时的空白节点编号，
+        top_level_triples依次为每个顶层节点元素读取完成时已生成的三元组数量
+        """
+        self.source = source
+        self.base = base
+        self.literal = literal
+        self.bnode_start = bnode_start
+        self.top_level_bnodes = []
+        self.top_level_triples = []
+        self._bnode_count = bnode_start
+        self._emitted = 0
+        self._node_ids = {}
+        self._tag_uris = {}
+        self._out = []
+
+    def _open(self):
+        if isinstance(self.source, str):
+            return io.BytesIO(self.source.encode('utf-8'))
+        if isinstance(self.source, bytes):
+            return io.BytesIO(self.source)
+        return self.source
+
+    def _new_bnode(self):
+        self._bnode_count += 1
+        return '_%x' % self._bnode_count
+
+    def _uri(self, tag):
+        """元素或属性名对应的URI，同一文档中的名称大量重复，按名称缓存"""
+        uri = self._tag_uris.get(tag)
+        if uri is None:
+            uri = self._tag_uris[tag] = _tag_uri(tag)
+        return uri
+
+    def _named_bnode(self, node_id):
+        """rdf:nodeID在同一文档内指向同一个空白节点"""
+        bnode = self._node_ids.get(node_id)
+        if bnode is None:
+            bnode = self._node_ids[node_id] = self._new_bnode()
+        return bnode
+
+    def triples(self):
+        """按文档顺序生成三元组
+
+        各元素的处理函数将三元组追加到缓冲列表，每个事件处理完后统一输出，避免为每个元素创建生成器
+        """
+        self._bnode_count = self.bnode_start
+        self._node_ids = {}
+        self.top_level_bnodes = []
+        self.top_level_triples = []
+        self._emitted = 0
+        out = self._out = []
+        stack = []
+        start, end = self._start, self._end
+        for event, elem in iterparse(self._open(), events=('start', 'end')):
+            if event == 'start':
+                start(stack, elem)
+            else:
+                end(stack, elem)
+            if out:
+                self._emitted += len(out)
+                yield from out
+                out.clear()
+
+    def _start(self, stack, elem):
+        parent = stack[-1] if stack else None
+        if parent is None:
+            base, lang = self.base, None
+        else:
+            base, lang = parent.base, parent.lang
+        if _XML_BASE in elem.attrib:
+            base = _resolve(base, elem.attrib[_XML_BASE])
+        lang = elem.attrib.get(_XML_LANG, lang)
+
+        if parent is None:
+            if elem.tag == _RDF_RDF:
+                stack.append(_Frame(_ROOT, elem, base, lang))
+                return
+            role = _NODE
+        elif parent.role == _ROOT:
+            role = _NODE
+        elif parent.role == _NODE:
+            role = _PROPERTY
+        elif parent.role == _PROPERTY and parent.state != _OBJECT_LITERAL:
+            role = _NODE
+        else:
+            stack.append(_Frame(_SKIP, elem, base, lang))
+            return
+
+        if role == _NODE:
+            self._start_node(stack, parent, elem, base, lang)
+        else:
+            self._start_property(stack, parent, elem, base, lang)
+
+    def _start_node(self, stack, parent, elem, base, lang):
+        attrib = elem.attrib
+        if _RDF_ABOUT in attrib:
+            subject = _resolve(base, attrib[_RDF_ABOUT])
+        elif _RDF_ID in attrib:
+            subject = _resolve(base, '#' + attrib[_RDF_ID])
+        elif _RDF_NODE_ID in attrib:
+            subject = self._named_bnode(attrib[_RDF_NODE_ID])
+        else:
+            subject = self._new_bnode()
+
+        # 节点作为外层属性元素的宾语
+        if parent is not None and parent.role == _PROPERTY:
+            if parent.state == _OBJECT_COLLECTION:
+                parent.items.append(subject)
+            else:
+                parent.state = _OBJECT_SET
+                self._out.append((parent.subject, parent.predicate, subject))
+
+        if elem.tag != _RDF_DESCRIPTION:
+            self._out.append((subject, RDF_TYPE, self._uri(elem.tag)))
+        if attrib:
+            self._property_attributes(subject, attrib, base, lang)
+        stack.append(_Frame(_NODE, elem, base, lang, subject=subject))
+
+    def _start_property(self, stack, parent, elem, base, lang):
+        attrib = elem.attrib
+        if elem.tag == _RDF_LI:
+            parent.li += 1
+            predicate = '%s_%d' % (RDF, parent.li)
+        else:
+            predicate = self._uri(elem.tag)
+        subject = parent.subject
+        frame = _Frame(_PROPERTY, elem, base, lang, subject=subject, predicate=predicate)
+
+        parse_type = attrib.get(_RDF_PARSE_TYPE)
+        if parse_type == 'Resource':
+            # 属性元素的内容是一个空白节点的属性
+            obj = self._new_bnode()
+            self._out.append((subject, predicate, obj))
+            stack.append(_Frame(_NODE, elem, base, lang, subject=obj))
+            return
+        if parse_type == 'Collection':
+            frame.state = _OBJECT_COLLECTION
+            frame.items = []
+        elif parse_type is not None:
+            frame.state = _OBJECT_LITERAL
+        elif _RDF_RESOURCE in attrib or _RDF_NODE_ID in attrib or self._has_property_attributes(attrib):
+            # 空属性元素：宾语为rdf:resource/rdf:nodeID指定的节点或新的空白节点，其余属性特性作用于宾语
+            if _RDF_RESOURCE in attrib:
+                obj = _resolve(base, attrib[_RDF_RESOURCE])
+            elif _RDF_NODE_ID in attrib:
+                obj = self._named_bnode(attrib[_RDF_NODE_ID])
+            else:
+                obj = self._new_bnode()
+            frame.state = _OBJECT_SET
+            self._out.append((subject, predicate, obj))
+            self._property_attributes(obj, attrib, base, lang)
+        else:
+            frame.datatype = attrib.get(_RDF_DATATYPE)
+        stack.append(frame)
+
+    @staticmethod
+    def _is_property_attribute(name):
+        return name[0] == '{' and name not in _SYNTAX_ATTRIBUTES and not name.startswith(_XML_PREFIX)
+
+    def _has_property_attributes(self, attrib):
+        return any(self._is_property_attribute(name) for name in attrib)
+
+    def _property_attributes(self, subject, attrib, base, lang):
+        """属性特性：节点元素或空属性元素上的其他属性表示以字符串文字（rdf:type为URI）为宾语的三元组"""
+        for name, value in attrib.items():
+            if not self._is_property_attribute(name):
+                continue
+            if name == _RDF_TYPE_ATTR:
+                self._out.append((subject, RDF_TYPE, _resolve(base, value)))
+            else:
+                self._out.append((subject, self._uri(name), self.literal(value, lang)))
+
+    def _end(self, stack, elem):
+        frame = stack.pop()
+        if frame.role == _SKIP:
+            return
+        if frame.role == _PROPERTY:
+            if frame.state == _OBJECT_PENDING:
+                text = elem.text or ''
+                if frame.datatype is not None:
+                    obj = self.literal(text, None, _resolve(frame.base, frame.datatype))
+                else:
+                    obj = self.literal(text, frame.lang)
+                self._out.append((frame.subject, frame.predicate, obj))
+            elif frame.state == _OBJECT_COLLECTION:
+                self._collection(frame)
+            elif frame.state == _OBJECT_LITERAL:
+                content = (elem.text or '') + ''.join(tostring(child, encoding='unicode') for child in elem)
+                self._out.append((frame.subject, frame.predicate, self.literal(content, None, RDF_XML_LITERAL)))
+
+        # 已处理完的元素不再需要，清除其属性和子元素；顶层节点处理完后同时从根元素中移除
+        elem.clear()
+        if stack and stack[-1].role == _ROOT:
+            stack[-1].elem.clear()
+            if frame.role == _NODE:
+                self.top_level_bnodes.append(self._bnode_count)
+                self.top_level_triples.append(self._emitted + len(self._out))
+
+    def _collection(self, frame):
+        """rdf:parseType="Collection"生成rdf:first/rdf:rest列表"""
+        out = self._out
+        if not frame.items:
+            out.append((frame.subject, frame.predicate, RDF_NIL))
+            return
+        nodes = [self._new_bnode() for _ in frame.items]
+        out.append((frame.subject, frame.predicate, nodes[0]))
+        for i, (node, item) in enumerate(zip(nodes, frame.items)):
+            out.append((node, RDF_FIRST, item))
+            out.append((node, RDF_REST, nodes[i + 1] if i + 1 < len(nodes) else RDF_NIL))
+
+
+def iter_rdfxml_triples(source, base='', literal=make_literal):
+    """流式读取RDF/XML数据，按文档顺序生成(主体, 谓词, 宾语)三元组"""
+    return RDFXMLReader(source, base, literal).triples()
+
+
+def split_top_level(text):
+    """定位RDF/XML文本中根元素的开始标签结束位置、结束标签起始位置，以及根元素下各顶层元素的(起始, 结束)位置
+
+    返回(head, tail, spans)，text[:head]和text[tail:]为包含根元素标签的文档首尾，标签不配对或无法识别时返回None
+    """
+    head = tail = None
+    spans = []
+    depth = 0
+    element_start = 0
+    for match in _MARKUP.finditer(text):
+        kind = match.lastgroup
+        if kind == 'start':
+            empty = match.group('empty')
+            if depth == 0:
+                if head is not None or empty:
+                    return None
+                head = match.end()
+            elif depth == 1:
+                element_start = match.start()
+                if empty:
+                    spans.append((element_start, match.end()))
+            if not empty:
+                depth += 1
+        elif kind == 'end':
+            depth -= 1
+            if depth == 1:
+                spans.append((element_start, match.end()))
+            elif depth == 0:
+                tail = match.start()
+            elif depth < 0:
+                return None
+        elif kind == 'error':
+            return None
+    if head is None or tail is None or depth:
+        return None
+    return head, tail, spans
+
+
+def scan_top_level(text, start, end):
+    """定位text[start:end]中各个完整元素的(起始, 结束)位置，用于根元素内的一段内容，标签不配对或无法识别时返回None"""
+    spans = []
+    depth = 0
+    element_start = start
+    for match in _MARKUP.finditer(text, start, end):
+        kind = match.lastgroup
+        if kind == 'start':
+            if depth == 0:
+                element_start = match.start()
+            if not match.group('empty'):
+                depth += 1
+            elif depth == 0:
+                spans.append((element_start, match.end()))
+        elif kind == 'end':
+            depth -= 1
+            if depth == 0:
+                spans.append((element_start, match.end()))
+            elif depth < 0:
+                return None
+        elif kind == 'error':
+            return None
+    return spans if depth == 0 else None
@@ -0,0 +1,65 @@
+"""
+测试公共夹具
+每个测试使用临时目录中的独立SQLite数据库，通过Flask测试客户端调用接口
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_OWL_PATH = os.path.join(BACKEND_DIR, 'data', 'RTO-V4.owl')
+
+_BNODE_ID = re.compile(r'(?<=")(?:N[0-9a-f]{32}|_[0-9a-f]+)(?=")')
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ontology.db')
+    monkeypatch.setenv('ONTOLOGY_DB_PATH', path)
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    from api import create_app
+    app = create_app()
+    app.testing = True
+    return app.test_client()
+
+
+@pytest.fixture
+def sample_owl():
+    with open(SAMPLE_OWL_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def wait_for_job(client):
+    """等待202响应对应的后台任务结束，返回任务状态"""
+    def wait(response, timeout=60):
+        assert response.status_code == 202, response.get_json()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = client.get(response.headers['Location']).get_json()
+            if job['status'] in ('succeeded', 'failed'):
+                return job
+            time.sleep(0.05)
+        raise AssertionError('后台任务超时')
+    return wait
+
+
+@pytest.fixture
+def canonical():
+    """可视化产物的JSON，空白节点ID按出现顺序统一编号（各后端、各次读取的空白节点编号不同）"""
+    def dump(result):
+        text = json.dumps(result, ensure_ascii=False)
+        ids = {}
+        return _BNODE_ID.sub(lambda match: ids.setdefault(match.group(0), f'b{len(ids)}'), text)
+    return dump
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from rdflib import OWL, RDF, RDFS
+from rdflib.compare import isomorphic
+
+from benchmarks.suite import compare, load_datasets, main, run_suite
+from benchmarks.synthetic import generate_ontology
+
+
+def _depth(graph, cls):
+    depth = 1
+    while True:
+        parents = [parent for parent in graph.objects(cls, RDFS.subClassOf) if (parent, RDF.type, OWL.Class) in graph]
+        if not parents:
+            return depth
+        cls, depth = parents[0], depth + 1
+
+
+def test_synthetic_ontology_parameters():
+    """合成本体的类数量、层级深度、属性扇出和限制数量符合参数，相同参数和种子结果相同"""
+    graph = generate_ontology(classes=50, depth=3, fanout=3, restriction_density=0.5, seed=1)
+    classes = list(graph.subjects(RDF.type, OWL.Class))
+    assert len(classes) == 50
+    assert max(_depth(graph, cls) for cls in classes) == 3
+    properties = set(graph.subjects(RDF.type, OWL.ObjectProperty)) | set(graph.subjects(RDF.type, OWL.DatatypeProperty))
+    assert len(properties) == 150
+    assert 10 <= len(list(graph.subjects(RDF.type, OWL.Restriction))) <= 40
+
+    assert isomorphic(graph, generate_ontology(classes=50, depth=3, fanout=3, restriction_density=0.5, seed=1))
+    assert not isomorphic(graph, generate_ontology(classes=50, depth=3, fanout=3, restriction_density=0.5, seed=2))
+    flat = generate_ontology(classes=20, depth=1, fanout=0, restriction_density=0)
+    assert not list(flat.triples((None, RDFS.subClassOf, None)))
+
+
+def test_run_suite_reports_each_case(capsys):
+    datasets = load_datasets(['small'], include_sample=False)
+    results = run_suite(datasets, ['parser', 'visualization'], repeat=1, warmup=0)
+    cases = {result['case'] for result in results}
+    assert {'parser.parse', 'parser.stream'} <= cases
+    for result in results:
+        assert result['dataset'] == 'synthetic-small'
+        assert 0 < result['min'] <= result['median'] <= result['max']
+        assert ('peak_memory' in result) == result['case'].startswith('parser.')
+    assert 'synthetic-small' in capsys.readouterr().out
+
+
+def test_compare_flags_regressions(capsys):
+    baseline = {'meta': {'label': 'v1'}, 'results': [
+        {'dataset': 'd', 'case': 'a', 'median': 1.0},
+        {'dataset': 'd', 'case': 'b', 'median': 1.0},
+        {'dataset': 'd', 'case': 'c', 'median': 1.0}]}
+    results = [{'dataset': 'd', 'case': 'a', 'median': 1.2},
+               {'dataset': 'd', 'case': 'b', 'median': 1.05},
+               {'dataset': 'd', 'case': 'c', 'median': 0.5},
+               {'dataset': 'd', 'case': 'new', 'median': 9.0}]
+    assert compare(results, baseline, 0.1) == 1
+    output = capsys.readouterr().out
+    assert '退化' in output and '提升' in output
+
+
+def test_main_saves_results(tmp_path, capsys):
+    output = tmp_path / 'result.json'
+    main(['--profiles', 'small', '--no-sample', '--cases', 'convert', '--repeat', '1', '--warmup', '0',
+          '--label', 'test', '--output', str(output)])
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['meta']['label'] == 'test'
+    assert {result['case'] for result in report['results']} >= {'convert.owl_to_jsonld'}
+    with pytest.raises(SystemExit) as exit_info:
+        main(['--profiles', 'small', '--no-sample', '--cases', 'convert', '--repeat', '1', '--warmup', '0',
+              '--compare', str(output), '--threshold', '-1', '--fail-on-regression',
+              '--output', str(tmp_path / 'again.json')])
+    assert exit_info.value.code
@@ -0,0 +1,74 @@
+import pytest
+
+import cache
+from cache import ArtifactCache, content_hash
+from visualization import generate_visualization, visualization_cache_key
+
+
+@pytest.fixture
+def visualization_cache(monkeypatch):
+    """独立的全局可视化缓存，统计不受其他测试影响"""
+    instance = ArtifactCache()
+    monkeypatch.setattr(cache, '_visualization_cache', instance)
+    return instance
+
+
+def test_content_hash_ignores_line_endings_and_outer_whitespace():
+    assert content_hash('a\r\nb\n') == content_hash('  a\nb') == content_hash(b'a\rb')
+    assert content_hash('a b') != content_hash('a\nb')
+
+
+def test_hit_miss_and_lru_eviction():
+    store = ArtifactCache(max_entries=2)
+    assert store.get('a') is None
+    store.put('a', {'v': 1})
+    store.put('b', {'v': 2})
+    assert store.get('a') == {'v': 1}  # a成为最近使用
+    store.put('c', {'v': 3})  # 淘汰最久未使用的b
+    assert store.get('b') is None
+    assert store.get('c') == {'v': 3}
+    assert store.stats() == {'entries': 2, 'bytes': store.stats()['bytes'], 'hits': 2, 'misses': 2}
+
+
+def test_byte_limit_evicts_and_skips_oversized_values():
+    store = ArtifactCache(max_bytes=30)
+    store.put('a', 'x' * 10)
+    store.put('b', 'y' * 10)
+    store.put('c', 'z' * 10)  # 总字节数超过上限，淘汰a
+    assert store.get('a') is None
+    store.put('big', 'w' * 100)  # 单个结果超过上限时不缓存
+    assert store.get('big') is None
+    assert store.stats()['bytes'] <= 30
+
+
+def test_disk_layer_survives_new_instance(tmp_path):
+    ArtifactCache(disk_dir=str(tmp_path)).put('abcdef', {'graph': [1, 2]})
+    reloaded = ArtifactCache(disk_dir=str(tmp_path))
+    assert reloaded.get('abcdef') == {'graph': [1, 2]}
+    assert reloaded.stats()['hits'] == 1 and reloaded.stats()['entries'] == 1
+
+
+def test_visualization_cache_hit_and_invalidation(visualization_cache, sample_owl):
+    """相同内容（忽略换行符差异）命中缓存，内容或解析器后端变化时重新生成"""
+    first = generate_visualization(sample_owl)
+    assert visualization_cache.stats()['misses'] == 1
+
+    again = generate_visualization(sample_owl.replace('\n', '\r\n'))
+    assert again == first
+    assert visualization_cache.stats()['hits'] == 1
+    again['graph'] = None  # 返回的是副本，修改不影响缓存
+    assert generate_visualization(sample_owl)['graph'] == first['graph']
+
+    edited = sample_owl.replace('<rdfs:label xml:lang="zh">化学物质</rdfs:label>',
+                                '<rdfs:label xml:lang="zh">化学品</rdfs:label>', 1)
+    assert '化学品' in str(generate_visualization(edited)['tree'])
+    assert visualization_cache_key(sample_owl, 'rdflib') != visualization_cache_key(sample_owl, 'stream')
+    generate_visualization(sample_owl, parser_backend='rdflib')
+    assert visualization_cache.stats()['misses'] == 3
+
+
+def test_cache_disabled(monkeypatch, sample_owl):
+    monkeypatch.setattr(cache, '_visualization_cache', None)
+    monkeypatch.setenv('VIS_CACHE_SIZE', '0')
+    assert cache.get_visualization_cache() is None
+    assert generate_visualization(sample_owl)['tree']['children']
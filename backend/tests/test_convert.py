@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+from rdflib import RDFS, Graph
+from rdflib.compare import isomorphic
+
+from convert import OWLToJSONLDConverter, convert_jsonld_to_owl, convert_owl_to_jsonld
+
+LABELED_OWL = '''<?xml version="1.0"?>
+<rdf:RDF xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+         xmlns:xsd="http://www.w3.org/2001/XMLSchema#">
+    <owl:Class rdf:about="http://example.org/chemical#ChemicalSubstance">
+        <rdfs:label xml:lang="zh">化学物质</rdfs:label>
+        <rdfs:label xml:lang="en">Chemical Substance</rdfs:label>
+        <rdfs:comment>无语言标签的注释</rdfs:comment>
+    </owl:Class>
+    <owl:Class rdf:about="http://example.org/chemical#Catalyst">
+        <rdfs:subClassOf rdf:resource="http://example.org/chemical#ChemicalSubstance"/>
+        <rdfs:label xml:lang="zh">催化剂</rdfs:label>
+    </owl:Class>
+    <owl:DatatypeProperty rdf:about="http://example.org/chemical#purity">
+        <rdfs:domain rdf:resource="http://example.org/chemical#ChemicalSubstance"/>
+        <rdfs:range rdf:resource="http://www.w3.org/2001/XMLSchema#float"/>
+        <rdfs:label xml:lang="en">purity</rdfs:label>
+    </owl:DatatypeProperty>
+    <rdf:Description rdf:about="http://example.org/chemical#Catalyst">
+        <owl:versionInfo rdf:datatype="http://www.w3.org/2001/XMLSchema#int">2</owl:versionInfo>
+    </rdf:Description>
+</rdf:RDF>
+'''
+
+
+def test_owl_jsonld_round_trip_keeps_language_tags():
+    """OWL转换为JSON-LD再转换回OWL后三元组不变，文字的语言标签和数据类型保留"""
+    original = Graph().parse(data=LABELED_OWL, format='xml')
+    restored = Graph().parse(data=convert_jsonld_to_owl(convert_owl_to_jsonld(LABELED_OWL)), format='xml')
+    assert isomorphic(original, restored)
+    languages = {str(label): label.language for label in restored.objects(predicate=RDFS.label)}
+    assert languages == {'化学物质': 'zh', 'Chemical Substance': 'en', '催化剂': 'zh', 'purity': 'en'}
+
+
+@pytest.mark.parametrize('pretty', [False, True])
+def test_streamed_jsonld_matches_document_dump(pretty):
+    """逐条生成的JSON-LD与对整个文档json.dumps的结果相同（缩进格式下同样如此），空图也是合法的JSON"""
+    graph = Graph().parse(data=LABELED_OWL, format='xml')
+    converter = OWLToJSONLDConverter(pretty=pretty)
+    chunks = list(converter.iter_jsonld(graph))
+    assert len(chunks) == len(set(graph.subjects())) + 2
+    text = ''.join(chunks)
+    document = json.loads(text)
+    if pretty:
+        assert text == json.dumps(document, ensure_ascii=False, indent=2)
+    else:
+        assert text == json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+    assert {entry['@id'] for entry in document['@graph']} == {str(subject) for subject in graph.subjects()}
+
+    output = io.StringIO()
+    OWLToJSONLDConverter(pretty=pretty).write_jsonld(graph, output)
+    assert output.getvalue() == text
+    assert json.loads(OWLToJSONLDConverter(pretty=pretty).convert_triples(Graph())) == {
+        '@context': document['@context'], '@graph': []}
+
+
+def test_jsonld_from_triple_sequence():
+    """三元组序列与rdflib图生成相同的@graph条目"""
+    graph = Graph().parse(data=LABELED_OWL, format='xml')
+    from_graph = json.loads(OWLToJSONLDConverter().convert_triples(graph))
+    from_triples = json.loads(OWLToJSONLDConverter().convert_triples(list(graph)))
+    def entries(document):
+        # 同一谓词多个宾语的顺序取决于输入的遍历顺序
+        return sorted(json.dumps({key: sorted(value, key=json.dumps) if isinstance(value, list) else value
+                                  for key, value in entry.items()}, sort_keys=True, ensure_ascii=False)
+                      for entry in document['@graph'])
+    assert entries(from_triples) == entries(from_graph)
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from db import ConnectionPool, connection, get_pool
+
+
+def test_connection_uses_wal_and_is_reused(db_path):
+    with connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+        first = conn
+    with connection() as conn:
+        assert conn is first
+    assert get_pool() is get_pool(db_path)
+
+
+def test_commit_on_exit_and_rollback_on_error(db_path):
+    with connection() as conn:
+        conn.execute('CREATE TABLE items (value TEXT)')
+    with connection() as conn:
+        conn.execute("INSERT INTO items VALUES ('kept')")
+    with pytest.raises(RuntimeError):
+        with connection() as conn:
+            conn.execute("INSERT INTO items VALUES ('discarded')")
+            raise RuntimeError
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT value FROM items').fetchall() == [('kept',)]
+
+
+def test_pool_size_limit(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.1)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+    pool.release(second)
+    pool.close()
+    assert pool._created == 0
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+import deltas
+from deltas import apply_delta, compute_delta, decode_delta, encode_delta
+
+
+@pytest.mark.parametrize('base, text', [
+    ('', 'new text\n'),
+    ('line 1\nline 2\nline 3\n', ''),
+    ('line 1\nline 2\nline 3\n', 'line 1\nline 2\nline 3\n'),
+    ('line 1\nline 2\nline 3\n', 'line 0\nline 1\nline 2 changed\nline 3\nline 4\n'),
+    ('{"nodes": [{"id": "a"}, {"id": "b"}], "edges": []}', '{"nodes": [{"id": "a"}, {"id": "c"}], "edges": [1]}'),
+    ('[1,2,3,"x, y"]', '[1,3,"x, y",4]'),
+])
+def test_delta_round_trip(base, text):
+    """差异应用到基准数据后得到原文，编码后的差异校验基准数据长度"""
+    ops = compute_delta(base, text)
+    assert apply_delta(base, ops) == text
+    data = encode_delta(base, ops)
+    assert decode_delta(data, base) == text
+    with pytest.raises(ValueError):
+        decode_delta(data, base + 'x')
+
+
+def test_small_change_copies_base():
+    """小修改的差异只插入变化的文本，其余部分复制基准数据"""
+    base = ''.join(f'<owl:Class rdf:about="#C{i}"/>\n' for i in range(200))
+    text = base.replace('#C100"', '#Changed"')
+    ops = compute_delta(base, text)
+    inserted = ''.join(op for op in ops if isinstance(op, str))
+    assert inserted == 'hanged'
+    copies = [op for op in ops if not isinstance(op, str)]
+    assert copies == [[0, base.index('100"')], [base.index('100"') + 3, len(base) - base.index('100"') - 3]]
+
+
+def _version_owl(sample_owl, i):
+    """在示例本体末尾追加第i个类，得到互不相同、差异很小的版本数据"""
+    return sample_owl.replace('</rdf:RDF>', f'<owl:Class rdf:about="http://example.org/chemical#Extra{i}"/>\n</rdf:RDF>')
+
+
+def _artifacts(db_path, name='ontology_data'):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('''
+            SELECT version_id, encoding, base_version_id, depth FROM ontology_artifacts WHERE name=? ORDER BY version_id
+        ''', (name,)).fetchall()
+
+
+@pytest.fixture
+def no_text_cache(monkeypatch):
+    """禁用重建文本缓存，每次读取都从完整数据逐级应用差异"""
+    monkeypatch.setenv('DELTA_CACHE_BYTES', '0')
+    monkeypatch.setattr(deltas, '_text_cache', None)
+
+
+@pytest.fixture
+def chain(client, sample_owl, monkeypatch):
+    """以前一个版本为父版本依次创建的版本链，返回[(版本ID, 原始数据)]"""
+    monkeypatch.setenv('DELTA_KEYFRAME_INTERVAL', '2')
+    versions = []
+    parent_id = None
+    for i in range(7):
+        data = _version_owl(sample_owl, i)
+        response = client.post('/api/versions', json={'name': f'v{i}', 'ontology_data': data, 'parent_id': parent_id})
+        assert response.status_code == 201
+        parent_id = response.get_json()['id']
+        versions.append((parent_id, data))
+    return versions
+
+
+def test_keyframes_limit_chain_length(client, db_path, chain, no_text_cache):
+    """差异链不超过DELTA_KEYFRAME_INTERVAL，超过时保存完整数据；每个版本都能从关键帧重建"""
+    rows = _artifacts(db_path)
+    assert [encoding == 'delta' for _, encoding, _, _ in rows] == [False, True, True, False, True, True, False]
+    assert [depth for _, _, _, depth in rows] == [0, 1, 2, 0, 1, 2, 0]
+    ids = [version_id for version_id, _ in chain]
+    assert [base for _, encoding, base, _ in rows if encoding == 'delta'] == [ids[0], ids[1], ids[3], ids[4]]
+
+    for version_id, data in chain:
+        assert client.get(f'/api/versions/{version_id}').get_json()['ontology_data'] == data
+        assert client.get(f'/api/versions/{version_id}/download?format=owl').get_data(as_text=True) == data
+
+
+def test_delete_rebases_dependents(client, db_path, chain, no_text_cache):
+    """删除被用作差异基准的版本后，依赖它的版本改以其基准重新保存，仍能读取原数据"""
+    ids = [version_id for version_id, _ in chain]
+    for deleted in (ids[1], ids[3]):
+        assert client.delete(f'/api/versions/{deleted}').status_code == 200
+    remaining = [(version_id, data) for version_id, data in chain if version_id not in (ids[1], ids[3])]
+
+    for name in ('ontology_data', 'owl_data', 'jsonld_data', 'graph', 'tree', 'table'):
+        rows = _artifacts(db_path, name)
+        assert {base for _, encoding, base, _ in rows if encoding == 'delta'} <= set(ids) - {ids[1], ids[3]}
+    for version_id, data in remaining:
+        version = client.get(f'/api/versions/{version_id}').get_json()
+        assert version['ontology_data'] == data
+        assert version['owl_data'] == data
+    assert client.get(f'/api/versions/{ids[2]}').get_json()['parent_id'] == ids[0]
+
+
+def test_delta_storage_disabled(client, db_path, sample_owl, monkeypatch):
+    """DELTA_STORAGE为false时总是保存完整数据"""
+    monkeypatch.setenv('DELTA_STORAGE', 'false')
+    for i in range(3):
+        client.post('/api/versions', json={'name': f'v{i}', 'ontology_data': _version_owl(sample_owl, i)})
+    assert all(encoding != 'delta' and base is None for _, encoding, base, _ in _artifacts(db_path))
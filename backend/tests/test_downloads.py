@@ -0,0 +1,124 @@
+import gzip
+import sqlite3
+import zlib
+
+import pytest
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+import api
+from cache import content_hash
+from downloads import iter_artifact, iter_ntriples
+
+# 带引号、反斜杠、换行和非ASCII字符的文字，以及rdf:about=""的本体声明（相对IRI）
+ESCAPING_OWL = '''<?xml version="1.0"?>
+<rdf:RDF xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#">
+    <owl:Ontology rdf:about=""/>
+    <owl:Class rdf:about="http://example.org/escape#Quoted">
+        <rdfs:label xml:lang="zh">“引号” "quoted" \\ 反斜杠</rdfs:label>
+        <rdfs:comment>第一行
+第二行\tTab</rdfs:comment>
+    </owl:Class>
+</rdf:RDF>
+'''
+
+
+@pytest.fixture
+def version_id(client, sample_owl):
+    created = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    assert created.status_code == 201
+    return created.get_json()['id']
+
+
+def test_download_etag_and_not_modified(client, version_id, sample_owl):
+    """下载响应带弱ETag，If-None-Match匹配（弱比较）时返回304"""
+    url = f'/api/versions/{version_id}/download?format=owl'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag == f'W/"{content_hash(sample_owl)}-owl"'
+
+    for if_none_match in (etag, etag[2:], '*'):
+        not_modified = client.get(url, headers={'If-None-Match': if_none_match})
+        assert not_modified.status_code == 304
+        assert not_modified.headers['ETag'] == etag
+    assert client.get(url, headers={'If-None-Match': 'W/"other-owl"'}).status_code == 200
+    assert client.get(url.replace('owl', 'ttl'), headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_download_uses_saved_formats(client, version_id, sample_owl, monkeypatch):
+    """下载读取导入时保存的OWL/JSON-LD数据，不重新转换"""
+    monkeypatch.setattr(api, 'convert_formats', None)
+    body = client.get(f'/api/versions/{version_id}/download').get_json()
+    assert body['owl_data'] == sample_owl
+    assert '化学物质' in body['jsonld_data']
+    assert client.get(f'/api/versions/{version_id}/download?format=jsonld').get_data(as_text=True) == body['jsonld_data']
+
+
+def test_stale_formats_converted_once(client, db_path, version_id, monkeypatch):
+    """格式数据过期时下载重新转换并回写，之后的下载不再转换"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('UPDATE ontology_versions SET formats_hash = NULL WHERE id = ?', (version_id,))
+    calls = []
+    convert_formats = api.convert_formats
+    monkeypatch.setattr(api, 'convert_formats', lambda data: calls.append(data) or convert_formats(data))
+
+    first = client.get(f'/api/download/{version_id}').get_json()
+    second = client.get(f'/api/download/{version_id}').get_json()
+    assert len(calls) == 1
+    assert first == second
+
+
+def test_gzip_download(client, version_id, sample_owl):
+    """Accept-Encoding包含gzip时压缩输出，响应头带Vary和附件文件名"""
+    url = f'/api/versions/{version_id}/download?format=owl'
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['Content-Type'].startswith('application/rdf+xml')
+    assert 'filename=v1.owl' in response.headers['Content-Disposition']
+    assert gzip.decompress(response.get_data()).decode('utf-8') == sample_owl
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data(as_text=True) == sample_owl
+
+
+def test_download_errors(client, version_id):
+    """不支持的格式返回400，版本不存在返回404"""
+    invalid = client.get(f'/api/versions/{version_id}/download?format=xml')
+    assert invalid.status_code == 400
+    assert invalid.get_json()['details'] == ['不支持的格式: xml']
+    assert client.get('/api/versions/9999/download?format=owl').status_code == 404
+
+
+@pytest.mark.parametrize('data_format, parse_format', [('nt', 'nt'), ('ttl', 'turtle')])
+def test_serialized_download_round_trip(client, data_format, parse_format):
+    """Turtle和N-Triples下载可以解析回相同的图，文字中的引号、换行和非ASCII字符正确转义，相对IRI按下载地址解析"""
+    created = client.post('/api/versions', json={'name': 'escape', 'ontology_data': ESCAPING_OWL})
+    path = f"/api/versions/{created.get_json()['id']}/download"
+    text = client.get(f'{path}?format={data_format}').get_data(as_text=True)
+
+    downloaded = Graph().parse(data=text, format=parse_format)
+    base = f'http://localhost{path}'
+    expected = Graph().parse(data=ESCAPING_OWL, format='xml', publicID=base)
+    assert isomorphic(downloaded, expected)
+    assert Literal('“引号” "quoted" \\ 反斜杠', lang='zh') in set(downloaded.objects())
+    assert (URIRef(base), None, None) in downloaded
+
+
+def test_chunked_output():
+    """N-Triples按块合并输出，压缩保存的产物逐块解压"""
+    graph = Graph().parse(data=ESCAPING_OWL, format='xml', publicID='http://example.org/escape')
+    chunks = list(iter_ntriples(graph, 'http://example.org/escape', chunk_size=1))
+    assert len(chunks) == len(graph)
+    assert isomorphic(Graph().parse(data=b''.join(chunks), format='nt'), graph)
+
+    data = ESCAPING_OWL.encode('utf-8') * 50
+    chunks = list(iter_artifact('zlib', zlib.compress(data), chunk_size=256))
+    assert max(len(chunk) for chunk in chunks) <= 256
+    assert b''.join(chunks) == data
+    assert b''.join(iter_artifact(None, ESCAPING_OWL, chunk_size=7)) == ESCAPING_OWL.encode('utf-8')
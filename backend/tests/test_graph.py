@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def version_id(client, sample_owl):
+    return client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl}).get_json()['id']
+
+
+def test_graph_json(client, version_id):
+    """网络图接口返回紧凑JSON：样式按分组保存，边的from/to为节点下标"""
+    graph = client.get(f'/api/versions/{version_id}/graph').get_json()
+    assert {'version', 'options', 'styles', 'nodes', 'edges'} <= set(graph)
+    ids = [node['id'] for node in graph['nodes']]
+    assert len(ids) == len(set(ids))
+    for node in graph['nodes']:
+        assert node['group'] in graph['styles'] and 'color' not in node
+    for edge in graph['edges']:
+        assert 0 <= edge['from'] < len(ids) and 0 <= edge['to'] < len(ids)
+        assert edge['group'] in graph['styles']
+    catalyst = ids.index('http://example.org/chemical#Catalyst')
+    substance = ids.index('http://example.org/chemical#ChemicalSubstance')
+    assert {'from': catalyst, 'to': substance} in [{'from': e['from'], 'to': e['to']} for e in graph['edges']]
+
+
+def test_graph_html_and_invalid_format(client, version_id):
+    response = client.get(f'/api/versions/{version_id}/graph?format=html')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/html'
+    assert 'vis-network' in response.get_data(as_text=True)
+    assert client.get(f'/api/versions/{version_id}/graph?format=svg').status_code == 400
+    assert client.get('/api/versions/999/graph').status_code == 404
+
+
+def test_legacy_html_graph_regenerated(client, db_path, version_id):
+    """早期版本保存的HTML网络图在首次请求时按原始数据重新生成并回写"""
+    expected = client.get(f'/api/versions/{version_id}/graph').get_json()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE ontology_artifacts SET encoding = 'raw', data = '<html>legacy</html>' "
+                     "WHERE version_id = ? AND name = 'graph'", (version_id,))
+
+    assert client.get(f'/api/versions/{version_id}/graph').get_json() == expected
+    with sqlite3.connect(db_path) as conn:
+        data = conn.execute("SELECT data FROM ontology_artifacts WHERE version_id = ? AND name = 'graph'",
+                            (version_id,)).fetchone()[0]
+    assert data != '<html>legacy</html>'
+
+
+def test_build_network_matches_pyvis_add_methods(sample_owl):
+    """批量添加的节点和边与逐个调用pyvis的add_node/add_edge相同（重复节点保留第一个）"""
+    from pyvis.network import Network
+    from visualization import build_network, generate_visualization
+
+    graph_data = generate_visualization(sample_owl, use_cache=False)['graph']
+    graph_data['nodes'].append({**graph_data['nodes'][0], 'label': 'duplicate'})
+    net = build_network(graph_data)
+
+    expected = Network(directed=True)
+    styles = graph_data['styles']
+    for node in graph_data['nodes']:
+        options = {**styles[node['group']], **node}
+        del options['group']
+        expected.add_node(options.pop('id'), **options)
+    ids = [node['id'] for node in graph_data['nodes']]
+    for edge in graph_data['edges']:
+        options = {**styles[edge['group']], **edge}
+        del options['group']
+        expected.add_edge(ids[options.pop('from')], ids[options.pop('to')], **options)
+
+    assert net.nodes == expected.nodes
+    assert net.node_ids == expected.node_ids
+    assert net.edges == expected.edges
@@ -0,0 +1,74 @@
+import pytest
+
+from incremental import apply_edit
+from pipeline import build_artifacts
+
+CHEMICAL = 'http://example.org/chemical#'
+RAW_MATERIAL_PARENT = ('<owl:Class rdf:about="http://example.org/chemical#RawMaterial">\n'
+                       '        <rdfs:subClassOf rdf:resource="http://example.org/chemical#ChemicalSubstance"/>\n')
+BY_PRODUCT_PARENT = ('<owl:Class rdf:about="http://example.org/chemical#ByProduct">\n'
+                     '        <rdfs:subClassOf rdf:resource="http://example.org/chemical#ChemicalSubstance"/>\n')
+NEW_CLASS = '''<owl:Class rdf:about="http://example.org/chemical#Solvent">
+        <rdfs:subClassOf rdf:resource="http://example.org/chemical#RawMaterial"/>
+        <rdfs:label xml:lang="zh">溶剂</rdfs:label>
+    </owl:Class>
+
+    '''
+
+EDITS = {
+    # 在文档中间新增类
+    'add': lambda data: data.replace('<owl:Class rdf:about="http://example.org/chemical#Catalyst">',
+                                     NEW_CLASS + '<owl:Class rdf:about="http://example.org/chemical#Catalyst">', 1),
+    # 删除子类关系，RawMaterial成为根节点，应位于文档顺序中的位置而不是末尾
+    'remove': lambda data: data.replace(RAW_MATERIAL_PARENT,
+                                        '<owl:Class rdf:about="http://example.org/chemical#RawMaterial">\n', 1),
+    # 修改父类
+    'reparent': lambda data: data.replace(BY_PRODUCT_PARENT, BY_PRODUCT_PARENT.replace('ChemicalSubstance', 'Product'), 1),
+}
+
+
+@pytest.mark.parametrize('edit', sorted(EDITS))
+def test_apply_edit_matches_full_rebuild(edit, sample_owl, canonical):
+    """增量更新的graph、table、tree和检索文本与完整生成相同，包括节点和根节点的顺序"""
+    edited = EDITS[edit](sample_owl)
+    assert edited != sample_owl
+    previous = build_artifacts(sample_owl, parser_backend='stream')
+    artifacts = apply_edit(sample_owl, edited, previous, 'stream')
+    assert artifacts is not None
+    expected = build_artifacts(edited, parser_backend='stream')
+    for name in ('graph', 'table', 'tree', 'search'):
+        assert canonical(artifacts.get(name, previous[name])) == canonical(expected[name]), name
+    assert artifacts['index']['hash'] == expected['index']['hash']
+
+
+def test_removed_parent_keeps_root_position(sample_owl):
+    """删除子类关系后，RawMaterial在tree根节点中按文档顺序紧跟ChemicalSubstance"""
+    previous = build_artifacts(sample_owl, parser_backend='stream')
+    artifacts = apply_edit(sample_owl, EDITS['remove'](sample_owl), previous, 'stream')
+    roots = [node['id'] for node in artifacts['tree']['children']]
+    assert roots[:2] == [CHEMICAL + 'ChemicalSubstance', CHEMICAL + 'RawMaterial']
+
+
+def test_cached_artifacts_keep_index(sample_owl, monkeypatch):
+    """可视化结果命中缓存时仍生成index，之后的修改可以增量更新"""
+    import cache
+    from visualization import generate_visualization
+    monkeypatch.setattr(cache, '_visualization_cache', cache.ArtifactCache())
+    generate_visualization(sample_owl, parser_backend='stream')  # 缓存的结果没有index
+    previous = build_artifacts(sample_owl, parser_backend='stream')
+    edited = EDITS['add'](sample_owl)
+    assert apply_edit(sample_owl, edited, previous, 'stream') is not None
+
+    build_artifacts(edited, parser_backend='stream')
+    cached = build_artifacts(edited, parser_backend='stream')  # 命中build_artifacts写入的缓存
+    assert cache.get_visualization_cache().hits == 2
+    assert apply_edit(edited, sample_owl, cached, 'stream') is not None
+
+
+def test_default_backend_updates_incrementally(sample_owl, monkeypatch):
+    """未配置PARSER_BACKEND时使用流式后端，修改可以增量更新；其他后端没有index，修改时完整生成"""
+    monkeypatch.delenv('PARSER_BACKEND', raising=False)
+    assert apply_edit(sample_owl, EDITS['add'](sample_owl), build_artifacts(sample_owl)) is not None
+    previous = build_artifacts(sample_owl, parser_backend='rdflib')
+    assert previous['index'] == ''
+    assert apply_edit(sample_owl, EDITS['add'](sample_owl), previous, 'rdflib') is None
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程创建版本，后台任务开始执行后进程直接退出，模拟任务执行中进程崩溃
+CRASHING_SERVER = textwrap.dedent('''
+    import os
+    import sys
+    import threading
+
+    sys.path.insert(0, {backend_dir!r})
+    import api
+
+    started = threading.Event()
+
+    def crashing_ingest(*args):
+        started.set()
+        threading.Event().wait()
+
+    api.ingest_version = crashing_ingest
+    client = api.create_app().test_client()
+    with open(sys.argv[1], encoding='utf-8') as f:
+        body = client.post('/api/versions', json={{'name': 'v1', 'ontology_data': f.read()}}).get_json()
+    started.wait(30)
+    print(body['job']['id'], body['id'], flush=True)
+    os._exit(0)
+''')
+
+
+@pytest.fixture(autouse=True)
+def async_ingest(monkeypatch):
+    # 子进程继承环境变量，同样异步导入
+    monkeypatch.setenv('INGEST_MODE', 'async')
+
+
+def test_unfinished_jobs_recovered_after_restart(db_path, tmp_path):
+    """进程退出时执行中的任务在下次启动时重新执行，版本的产物和检索文本完整生成"""
+    script = tmp_path / 'crash.py'
+    script.write_text(CRASHING_SERVER.format(backend_dir=BACKEND_DIR), encoding='utf-8')
+    output = subprocess.run([sys.executable, str(script), os.path.join(BACKEND_DIR, 'data', 'RTO-V4.owl')],
+                            capture_output=True, text=True, check=True, timeout=60).stdout
+    job_id, version_id = output.split()
+
+    from api import create_app
+    from models import IngestJob, OntologyVersion
+    assert IngestJob.get_by_id(job_id)['status'] == IngestJob.RUNNING
+    assert not OntologyVersion.get_by_id(int(version_id), fields=('tree',)).tree
+
+    client = create_app().test_client()
+    deadline = time.monotonic() + 60
+    while client.get(f'/api/jobs/{job_id}').get_json()['status'] in (IngestJob.QUEUED, IngestJob.RUNNING):
+        assert time.monotonic() < deadline, '任务没有被重新执行'
+        time.sleep(0.05)
+    assert IngestJob.get_by_id(job_id)['status'] == IngestJob.SUCCEEDED
+
+    version = client.get(f'/api/versions/{version_id}?fields=tree,table').get_json()
+    assert version['tree'] and version['table']
+    found = client.get('/api/versions', query_string={'search': '化学物质'}).get_json()
+    assert found['pagination']['total'] == 1
+
+
+def test_jobs_of_running_process_not_recovered(client):
+    """其他仍在运行的进程的任务不会被接管"""
+    from jobs import get_job_queue
+    from models import IngestJob
+    job_id = IngestJob.create('create', 1, get_job_queue().owner)
+    assert get_job_queue().recover(lambda version_id: None) == []
+    assert IngestJob.get_by_id(job_id)['status'] == IngestJob.QUEUED
@@ -0,0 +1,46 @@
+import json
+import logging
+
+import pytest
+
+from log_config import JsonFormatter, configure_logging
+
+
+@pytest.fixture
+def root_logger():
+    """恢复根日志记录器的处理器和级别"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_json_formatter_merges_fields():
+    record = logging.LogRecord('parsers', logging.INFO, __file__, 1, '解析完成: %s', ('ok',), None)
+    record.fields = {'triples': 590}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == '解析完成: ok'
+    assert entry['level'] == 'INFO' and entry['logger'] == 'parsers'
+    assert entry['triples'] == 590
+
+
+def test_configure_logging_replaces_handler(root_logger, monkeypatch):
+    monkeypatch.setenv('LOG_LEVEL', 'warning')
+    configure_logging()
+    configure_logging(log_format='json')
+    handlers = [handler for handler in root_logger.handlers if getattr(handler, '_ontology_handler', False)]
+    assert len(handlers) == 1
+    assert isinstance(handlers[0].formatter, JsonFormatter)
+    assert root_logger.level == logging.WARNING
+
+
+def test_parse_logs_one_summary_without_printing(caplog, capsys, sample_owl):
+    """每次解析只输出一条带统计字段的INFO日志，热路径上不再print"""
+    from parsers import OWLParser
+    with caplog.at_level(logging.INFO):
+        OWLParser(sample_owl).parse()
+    records = [record for record in caplog.records if record.name == 'parsers']
+    assert len(records) == 1
+    assert records[0].fields['classes'] == 44
+    assert capsys.readouterr() == ('', '')
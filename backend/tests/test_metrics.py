@@ -0,0 +1,55 @@
+import re
+
+from metrics import Histogram, format_server_timing
+
+
+def _server_timing(response):
+    return {name: float(duration) for name, duration in
+            re.findall(r'([\w-]+);dur=([0-9.]+)', response.headers['Server-Timing'])}
+
+
+def test_histogram_render():
+    histogram = Histogram('test_seconds', '测试', ('stage',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'parse')
+    histogram.observe(0.5, 'parse')
+    histogram.observe(2.0, 'say "hi"\n')
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP test_seconds 测试', '# TYPE test_seconds histogram']
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="parse",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 2' in lines
+    assert 'test_seconds_sum{stage="parse"} 0.550000' in lines
+    assert 'test_seconds_count{stage="say \\"hi\\"\\n"} 1' in lines
+
+
+def test_format_server_timing_merges_stages():
+    assert format_server_timing([('parse', 0.01), ('graph', 0.002), ('parse', 0.005)], 0.02) == \
+        'parse;dur=15.0, graph;dur=2.0, total;dur=20.0'
+
+
+def test_server_timing_header(client, sample_owl, monkeypatch):
+    """导入请求的Server-Timing头包含各处理阶段和总耗时"""
+    monkeypatch.setenv('PARSER_BACKEND', 'rdflib')
+    # 其他测试未导入过的内容，不命中可视化缓存
+    data = sample_owl.replace('化学物质</rdfs:label>', '化学物质（计时）</rdfs:label>', 1)
+    response = client.post('/api/versions', json={'name': 'v1', 'ontology_data': data})
+    assert response.status_code == 201
+    stages = _server_timing(response)
+    assert {'json_decode', 'detect', 'parse', 'extract', 'graph', 'structure', 'formats', 'db_write', 'total'} \
+        <= set(stages)
+    assert stages['total'] >= stages['parse']
+    assert set(_server_timing(client.get('/api/versions'))) >= {'total'}
+
+
+def test_metrics_endpoint(client, sample_owl):
+    """/api/metrics以Prometheus文本格式输出阶段和接口耗时直方图，以及可视化缓存的统计"""
+    client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE ontology_stage_duration_seconds histogram' in text
+    assert re.search(r'^ontology_stage_duration_seconds_count\{stage="extract"\} [1-9]', text, re.M)
+    assert re.search(r'^ontology_http_request_duration_seconds_count'
+                     r'\{method="POST",endpoint="/api/versions",status="201"\} [1-9]', text, re.M)
+    assert re.search(r'^ontology_visualization_cache_hits_total [0-9]+$', text, re.M)
@@ -0,0 +1,75 @@
+import json
+import sqlite3
+
+from migrations import LATEST_VERSION, get_schema_version, migrate
+
+# 引入迁移前的版本表结构（当时每次启动DROP TABLE重建）
+BASELINE_SCHEMA = '''
+    CREATE TABLE ontology_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        ontology_data TEXT,
+        owl_data TEXT,
+        jsonld_data TEXT,
+        graph TEXT,
+        tree TEXT,
+        [table] TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+BASELINE_TREE = {'name': 'Root', 'children': [
+    {'id': 'http://example.org/chemical#Catalyst', 'name': 'Catalyst', 'label': '催化剂',
+     'comment': '加速化学反应的物质', 'children': []}]}
+
+
+def _create_baseline(db_path, sample_owl):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(BASELINE_SCHEMA)
+        conn.execute('''
+            INSERT INTO ontology_versions (name, description, ontology_data, owl_data, jsonld_data, graph, tree, [table],
+                                           created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ('v1', '旧版本', sample_owl, sample_owl, '{}', '<html>graph</html>', json.dumps(BASELINE_TREE),
+              json.dumps([]), '2024-01-01T00:00:00', '2024-01-02T00:00:00'))
+
+
+def test_migrate_baseline_database(db_path, sample_owl):
+    """引入迁移前创建的数据库依次执行全部迁移，已有版本的数据、产物和检索文本保留"""
+    _create_baseline(db_path, sample_owl)
+    assert get_schema_version(db_path) == 0
+
+    assert migrate(db_path) == list(range(1, LATEST_VERSION + 1))
+    assert get_schema_version(db_path) == LATEST_VERSION
+    assert migrate(db_path) == []
+
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(ontology_versions)')}
+        assert 'parent_id' in columns and 'content_hash' in columns and 'tree' not in columns
+        names = {row[0] for row in conn.execute("SELECT name FROM ontology_artifacts WHERE version_id = 1")}
+        assert {'ontology_data', 'owl_data', 'jsonld_data', 'graph', 'tree', 'table'} <= names
+        assert conn.execute('SELECT total FROM ontology_version_stats').fetchone()[0] == 1
+        assert {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")} \
+            >= {'ontology_artifacts', 'ontology_version_stats', 'ingest_jobs'}
+
+    from api import create_app
+    client = create_app().test_client()
+    version = client.get('/api/versions/1?fields=ontology_data,tree').get_json()
+    assert version['name'] == 'v1'
+    assert version['ontology_data'] == sample_owl
+    assert version['tree'] == BASELINE_TREE
+    # 检索文本从tree产物回填
+    found = client.get('/api/versions', query_string={'search': '催化剂'}).get_json()
+    assert [item['id'] for item in found['versions']] == [1]
+
+
+def test_migrations_resume_from_partial_version(db_path, sample_owl):
+    """只执行尚未应用的迁移"""
+    _create_baseline(db_path, sample_owl)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('ALTER TABLE ontology_versions ADD COLUMN content_hash TEXT')
+        conn.execute('ALTER TABLE ontology_versions ADD COLUMN formats_hash TEXT')
+        conn.execute('PRAGMA user_version = 2')
+    assert migrate(db_path) == list(range(3, LATEST_VERSION + 1))
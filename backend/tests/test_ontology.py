@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from rdflib import Graph
+
+from ontology import OntologyModel
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """记录rdflib解析RDF/XML的次数"""
+    calls = []
+    parse = Graph.parse
+
+    def counting_parse(self, *args, **kwargs):
+        calls.append(kwargs.get('format'))
+        return parse(self, *args, **kwargs)
+
+    monkeypatch.setattr(Graph, 'parse', counting_parse)
+    return calls
+
+
+def test_graph_parsed_once_and_shared(parse_calls, sample_owl):
+    """RDF图只在首次使用时解析一次，rdflib解析器和格式转换共用同一个图"""
+    model = OntologyModel.parse(sample_owl)
+    assert not model.has_graph()
+    parser = model.get_parser('rdflib')
+    assert model.get_parser('rdflib') is parser
+    assert model.to_owl() == sample_owl
+    assert json.loads(model.to_jsonld())['@graph']
+    assert len(model) == len(model.graph)
+    assert parse_calls == ['xml']
+
+
+def test_stream_backend_does_not_build_graph(parse_calls, sample_owl):
+    """流式后端直接读取原始数据，统计三元组数量也不需要构建RDF图"""
+    model = OntologyModel.parse(sample_owl)
+    parser = model.get_parser('stream')
+    assert parser.classes
+    assert len(model) == parser.triple_count
+    assert not model.has_graph()
+    assert parse_calls == []
+
+
+def test_jsonld_builds_graph_directly(parse_calls, sample_owl):
+    """JSON-LD数据直接构建RDF图，不经过RDF/XML字符串中转；其他后端退回rdflib后端"""
+    jsonld = OntologyModel.parse(sample_owl).to_jsonld()
+    parse_calls.clear()
+    model = OntologyModel.parse(jsonld)
+    assert model.data_type == 'jsonld' and model.has_graph()
+    assert model.get_parser('stream') is model.get_parser('rdflib')
+    assert model.to_jsonld() == jsonld
+    assert parse_calls == []
@@ -0,0 +1,166 @@
+import pytest
+
+from visualization import generate_visualization
+
+# 同一个实体在多处描述、宾语在其他实体中先出现：rdflib按谓词读取时子类关系按父类分组，
+# 主体的多个宾语按宾语首次出现的顺序排列，与文档顺序不同
+ORDERING_OWL = '''<?xml version="1.0"?>
+<rdf:RDF xmlns="http://example.org/order#" xml:base="http://example.org/order"
+         xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#">
+    <owl:Class rdf:about="#A">
+        <rdfs:label xml:lang="en">first</rdfs:label>
+    </owl:Class>
+    <owl:Class rdf:about="#B">
+        <rdfs:subClassOf rdf:resource="#A"/>
+    </owl:Class>
+    <owl:Class rdf:about="#C">
+        <rdfs:subClassOf rdf:resource="#D"/>
+        <rdfs:subClassOf>
+            <owl:Restriction>
+                <owl:onProperty rdf:resource="#p1"/>
+                <owl:someValuesFrom rdf:resource="#A"/>
+            </owl:Restriction>
+        </rdfs:subClassOf>
+    </owl:Class>
+    <owl:Class rdf:about="#D"/>
+    <owl:Class rdf:about="#E">
+        <rdfs:subClassOf rdf:resource="#A"/>
+        <rdfs:label xml:lang="en">shared</rdfs:label>
+        <rdfs:label xml:lang="en">first</rdfs:label>
+    </owl:Class>
+    <owl:ObjectProperty rdf:about="#p0">
+        <rdfs:domain rdf:resource="#A"/>
+    </owl:ObjectProperty>
+    <owl:ObjectProperty rdf:about="#p1">
+        <rdfs:domain rdf:resource="#B"/>
+        <rdfs:domain rdf:resource="#A"/>
+        <rdfs:range rdf:resource="#D"/>
+    </owl:ObjectProperty>
+    <rdf:Description rdf:about="#B">
+        <rdfs:subClassOf rdf:resource="#D"/>
+    </rdf:Description>
+</rdf:RDF>
+'''
+
+def _visualize(data, backend):
+    return generate_visualization(data, use_cache=False, parser_backend=backend)
+
+
+@pytest.mark.parametrize('name', ['sample', 'ordering'])
+def test_stream_output_matches_rdflib(name, sample_owl, canonical):
+    """流式后端输出的节点、边、表格行和tree节点与rdflib后端相同，包括顺序"""
+    data = sample_owl if name == 'sample' else ORDERING_OWL
+    assert canonical(_visualize(data, 'stream')) == canonical(_visualize(data, 'rdflib'))
+
+
+def test_stream_orders_like_rdflib_graph():
+    """子类关系按父类分组，多个标签时取在文档中最先出现的标签文本"""
+    result = _visualize(ORDERING_OWL, 'stream')
+    sources = [cluster['source'].rpartition('#')[2] for cluster in result['table']]
+    assert sources[:4] == ['B', 'E', 'C', 'p0']
+    labels = {node['id'].rpartition('#')[2]: node['label'] for node in result['graph']['nodes']}
+    assert labels['E'] == 'first'
+    assert '定义域: A, B' in next(node['title'] for node in result['graph']['nodes'] if node['id'].endswith('#p1'))
+
+
+def test_extraction_reads_only_the_index():
+    """rdflib后端只在建立索引时读取一次RDF图，之后的提取只查询索引"""
+    from parsers import OWLParser
+    parser = OWLParser(ORDERING_OWL)
+    parser._index_triples()
+    parser.graph = None  # 提取过程中访问RDF图会抛出AttributeError
+    parser._extract_classes()
+    parser._extract_properties()
+    parser._extract_restrictions()
+    parser._extract_relations()
+
+    base = 'http://example.org/order#'
+    assert list(parser.classes) == [base + name for name in 'ABCDE']
+    assert parser.classes[base + 'E']['label'] == 'first'
+    assert parser.object_properties[base + 'p1']['domain'] == [base + 'A', base + 'B']
+    assert parser.object_properties[base + 'p1']['range'] == [base + 'D']
+    (restriction,) = parser.restrictions.values()
+    assert (restriction['onProperty'], restriction['someValuesFrom']) == (base + 'p1', base + 'A')
+    assert {(relation['subclass'], relation['superclass']) for relation in parser.subclass_relations} >= {
+        (base + 'B', base + 'A'), (base + 'B', base + 'D'), (base + 'C', base + 'D'), (base + 'E', base + 'A')}
+
+
+@pytest.mark.parametrize('uri, local_name, meaningless', [
+    ('http://example.org/chemical#Catalyst', 'Catalyst', False),
+    ('http://example.org/chemical/Catalyst', 'Catalyst', False),
+    ('http://example.org/a/b#c/d', 'c/d', False),
+    ('Catalyst', 'Catalyst', False),
+    ('N018b698f83194c0b83c046e2697f22aa', 'Unknown_Node', True),
+    ('genid42', 'Unknown_Node', True),
+    ('_1a2b', 'Unknown_Node', True),
+    ('N018B698F83194C0B83C046E2697F22AA', 'N018B698F83194C0B83C046E2697F22AA', False),
+    ('http://example.org/genid42', 'genid42', False),
+])
+def test_local_name_and_meaningless_node(uri, local_name, meaningless):
+    """URI解析结果与逐次解析的规则相同：UUID空白节点、genid和匿名节点意义不明，其余取#或/之后的部分"""
+    from rdflib import URIRef
+
+    from parsers import get_local_name, is_meaningless_node, resolve_uri
+    for value in (uri, URIRef(uri)):
+        assert get_local_name(value) == local_name
+        assert is_meaningless_node(value) is meaningless
+    assert resolve_uri(uri) == (local_name, meaningless)
+    assert get_local_name('') == get_local_name(None) == 'Unknown'
+
+
+def test_owlready2_parses_concurrently(sample_owl, canonical, monkeypatch):
+    """owlready2后端在多个线程中同时解析，不写临时文件，也不在默认World中留下本体"""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import owlready2
+
+    def no_temp_file(*args, **kwargs):
+        raise AssertionError('owlready2后端不应写临时文件')
+    monkeypatch.setattr(tempfile, 'mkstemp', no_temp_file)
+    monkeypatch.setattr(tempfile, 'NamedTemporaryFile', no_temp_file)
+    ontologies = set(owlready2.default_world.ontologies)
+
+    data = [sample_owl, ORDERING_OWL] * 4
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda owl_data: _visualize(owl_data, 'owlready2'), data))
+    expected = [canonical(_visualize(sample_owl, 'owlready2')), canonical(_visualize(ORDERING_OWL, 'owlready2'))]
+    assert [canonical(result) for result in results] == expected * 4
+    assert set(owlready2.default_world.ontologies) == ontologies
+
+
+@pytest.mark.parametrize('name', ['sample', 'ordering'])
+def test_owlready2_output_matches_rdflib(name, sample_owl, canonical):
+    """owlready2后端输出的节点、边、表格行和tree节点与rdflib后端相同"""
+    data = sample_owl if name == 'sample' else ORDERING_OWL
+    assert canonical(_visualize(data, 'owlready2')) == canonical(_visualize(data, 'rdflib'))
+
+
+def test_parser_backend_selection(monkeypatch):
+    """未指定时使用PARSER_BACKEND配置（默认stream），不支持的名称抛出ValueError"""
+    from parsers import PARSER_BACKENDS, get_parser_backend
+    assert set(PARSER_BACKENDS) == {'rdflib', 'owlready2', 'stream'}
+    monkeypatch.delenv('PARSER_BACKEND', raising=False)
+    assert get_parser_backend() == 'stream'
+    monkeypatch.setenv('PARSER_BACKEND', 'owlready2')
+    assert get_parser_backend() == 'owlready2'
+    assert get_parser_backend('rdflib') == 'rdflib'
+    monkeypatch.setenv('PARSER_BACKEND', 'bogus')
+    with pytest.raises(ValueError, match='bogus'):
+        get_parser_backend()
+
+
+def test_parser_query_argument(client, sample_owl, canonical):
+    """接口的parser参数选择解析器后端，不支持的名称返回400且不创建版本"""
+    for method, url in [('post', '/api/versions'), ('post', '/api/versions/upload'),
+                        ('put', '/api/versions/1'), ('post', '/api/visualize')]:
+        response = getattr(client, method)(f'{url}?parser=bogus', json={'name': 'v', 'ontology_data': sample_owl})
+        assert response.status_code == 400
+        assert response.get_json()['details'] == ['不支持的解析器后端: bogus']
+    assert client.get('/api/versions').get_json()['versions'] == []
+
+    results = [client.post(f'/api/visualize?parser={backend}', json={'ontology_data': sample_owl}).get_json()
+               for backend in ('rdflib', 'owlready2', 'stream')]
+    assert canonical(results[1]) == canonical(results[0]) == canonical(results[2])
@@ -0,0 +1,51 @@
+import json
+import re
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+import cache
+import pipeline
+from pipeline import build_artifacts
+
+BNODE_ID = re.compile(r'N[0-9a-f]{32}')
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    """启用进程池（任意规模都并行生成），测试结束后关闭"""
+    monkeypatch.setattr(cache, '_visualization_cache', None)
+    monkeypatch.setenv('VIS_CACHE_SIZE', '0')
+    monkeypatch.setenv('PIPELINE_PROCESSES', '2')
+    monkeypatch.setenv('PIPELINE_PARALLEL_MIN_TRIPLES', '1')
+    yield
+    if pipeline._process_pool is not None:
+        pipeline._process_pool.shutdown()
+        pipeline._process_pool = None
+
+
+def _jsonld_entries(data):
+    """JSON-LD中的条目（不区分顺序和空白节点ID）"""
+    return sorted(BNODE_ID.sub('_:b', json.dumps(entry, ensure_ascii=False, sort_keys=True))
+                  for entry in json.loads(data)['@graph'])
+
+
+@pytest.mark.parametrize('data_type', ['owl', 'jsonld'])
+def test_process_pool_artifacts_match_serial(data_type, process_pool, monkeypatch, sample_owl, canonical):
+    """进程池中生成的网络图和跨格式数据与在当前线程中生成的相同"""
+    data = sample_owl if data_type == 'owl' else json.dumps(json.loads(build_artifacts(sample_owl)['jsonld_data']))
+    parallel = build_artifacts(data)
+    assert pipeline._process_pool is not None
+    monkeypatch.setenv('PIPELINE_PROCESSES', '0')
+    serial = build_artifacts(data)
+
+    for name in ('graph', 'tree', 'table', 'search'):
+        assert canonical(parallel[name]) == canonical(serial[name]), name
+    assert _jsonld_entries(parallel['jsonld_data']) == _jsonld_entries(serial['jsonld_data'])
+    if data_type == 'owl':
+        assert parallel['owl_data'] == sample_owl
+    else:
+        assert parallel['jsonld_data'] == data
+        assert isomorphic(Graph().parse(data=parallel['owl_data'], format='xml'),
+                          Graph().parse(data=serial['owl_data'], format='xml'))
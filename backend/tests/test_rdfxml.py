@@ -0,0 +1,128 @@
+import io
+from xml.etree.ElementTree import canonicalize
+
+import pytest
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from rdfxml import RDF_XML_LITERAL, RDFXMLReader, iter_rdfxml_triples, split_top_level
+
+BASE = 'http://example.org/syntax'
+
+# 覆盖流式读取支持的RDF/XML语法
+SYNTAX_OWL = '''<?xml version="1.0"?>
+<!DOCTYPE rdf:RDF [<!ENTITY ex "http://example.org/syntax#">]>
+<rdf:RDF xmlns="http://example.org/syntax#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+         xmlns:xsd="http://www.w3.org/2001/XMLSchema#"
+         xml:base="http://example.org/syntax">
+    <owl:Ontology rdf:about=""/>
+    <!-- 注释中的<标签>不影响读取 -->
+    <owl:Class rdf:ID="A" rdfs:label="属性特性">
+        <rdfs:label xml:lang="zh">甲</rdfs:label>
+        <rdfs:comment rdf:datatype="&ex;text">typed</rdfs:comment>
+        <rdfs:subClassOf rdf:nodeID="r1"/>
+        <rdfs:seeAlso rdf:parseType="Resource">
+            <rdfs:label>嵌套</rdfs:label>
+        </rdfs:seeAlso>
+    </owl:Class>
+    <owl:Restriction rdf:nodeID="r1">
+        <owl:onProperty rdf:resource="#p"/>
+        <owl:someValuesFrom rdf:resource="&ex;B"/>
+    </owl:Restriction>
+    <owl:Class rdf:about="#B" xml:lang="en">
+        <owl:unionOf rdf:parseType="Collection">
+            <rdf:Description rdf:about="#A"/>
+            <owl:Class rdf:about="#C"/>
+        </owl:unionOf>
+        <rdfs:label>inherited language</rdfs:label>
+        <rdfs:comment rdf:parseType="Literal"><b>XML</b> literal</rdfs:comment>
+        <rdfs:isDefinedBy rdfs:label="空属性元素" xml:lang="zh"/>
+    </owl:Class>
+    <rdf:Seq rdf:about="#list">
+        <rdf:li rdf:resource="#A"/>
+        <rdf:li>second</rdf:li>
+        <rdf:li><owl:Class rdf:about="#D"/></rdf:li>
+    </rdf:Seq>
+    <owl:DatatypeProperty rdf:about="#p">
+        <rdfs:range rdf:resource="http://www.w3.org/2001/XMLSchema#string"/>
+        <rdfs:label rdf:datatype="http://www.w3.org/2001/XMLSchema#string">p<![CDATA[ & q]]></rdfs:label>
+    </owl:DatatypeProperty>
+</rdf:RDF>
+'''
+
+
+def _to_graph(triples):
+    """流式读取的字符串三元组转换为rdflib图，"_"开头的节点为空白节点"""
+    def node(value):
+        if isinstance(value, Literal):
+            return value
+        return BNode(value) if value.startswith('_') else URIRef(value)
+    graph = Graph()
+    for triple in triples:
+        graph.add(tuple(node(value) for value in triple))
+    return graph
+
+
+def _split_xml_literals(graph):
+    """取出XML文字，按规范化的XML文本比较：ElementTree输出的命名空间前缀与rdflib不同（ns0与文档中的前缀）"""
+    literals = set()
+    for triple in list(graph):
+        obj = triple[2]
+        if isinstance(obj, Literal) and obj.datatype == URIRef(RDF_XML_LITERAL):
+            graph.remove(triple)
+            literals.add(canonicalize(f'<r>{obj}</r>', rewrite_prefixes=True))
+    return literals
+
+
+def _assert_same_graph(triples, expected):
+    actual = _to_graph(triples)
+    assert len(actual) == len(expected)
+    assert _split_xml_literals(actual) == _split_xml_literals(expected)
+    assert isomorphic(actual, expected)
+
+
+def test_reader_matches_rdflib():
+    """流式读取生成的三元组与rdflib解析的图同构"""
+    _assert_same_graph(iter_rdfxml_triples(SYNTAX_OWL), Graph().parse(data=SYNTAX_OWL, format='xml'))
+
+
+def test_reader_accepts_binary_file_and_base():
+    """可以读取已打开的二进制文件，没有xml:base时按指定的base解析相对IRI"""
+    data = SYNTAX_OWL.replace(f' xml:base="{BASE}"', '')
+    reader = RDFXMLReader(io.BytesIO(data.encode('utf-8')), base=BASE)
+    _assert_same_graph(reader.triples(), Graph().parse(data=data, format='xml', publicID=BASE))
+
+
+def test_custom_literal_constructor():
+    """文字构造函数接收文本、语言标签和数据类型"""
+    literals = [obj for _, _, obj in iter_rdfxml_triples(
+        SYNTAX_OWL, literal=lambda value, lang=None, datatype=None: (value, lang, datatype))
+        if isinstance(obj, tuple)]
+    assert ('甲', 'zh', None) in literals
+    assert ('inherited language', 'en', None) in literals
+    assert ('typed', None, 'http://example.org/syntax#text') in literals
+
+
+def test_split_top_level():
+    """顶层元素的位置覆盖根元素下的每个元素，注释不作为元素"""
+    head, tail, spans = split_top_level(SYNTAX_OWL)
+    assert SYNTAX_OWL[:head].rstrip().endswith('xml:base="http://example.org/syntax">')
+    assert SYNTAX_OWL[tail:] == '</rdf:RDF>\n'
+    elements = [SYNTAX_OWL[start:end] for start, end in spans]
+    assert len(elements) == 6
+    assert elements[0] == '<owl:Ontology rdf:about=""/>'
+    assert all(element.startswith('<') and element.endswith('>') for element in elements)
+    assert elements[-1].endswith('</owl:DatatypeProperty>')
+
+
+@pytest.mark.parametrize('text', [
+    '<rdf:RDF><owl:Class></rdf:RDF>',
+    '<rdf:RDF/>',
+    '<rdf:RDF></rdf:RDF><rdf:RDF></rdf:RDF>',
+    '<rdf:RDF>a < b</rdf:RDF>',
+])
+def test_split_top_level_rejects_malformed(text):
+    assert split_top_level(text) is None
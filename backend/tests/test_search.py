@@ -0,0 +1,77 @@
+import threading
+
+import api
+
+
+def test_search_total_refreshes_after_async_ingest(client, sample_owl, wait_for_job, monkeypatch):
+    """后台任务写入检索文本后，搜索计数不再使用任务完成前缓存的结果"""
+    monkeypatch.setenv('INGEST_MODE', 'async')
+    started = threading.Event()
+    release = threading.Event()
+    ingest_version = api.ingest_version
+
+    def blocked_ingest(*args):
+        started.set()
+        release.wait(30)
+        return ingest_version(*args)
+
+    monkeypatch.setattr(api, 'ingest_version', blocked_ingest)
+    response = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    assert started.wait(30)
+
+    during = client.get('/api/versions', query_string={'search': '化学物质'}).get_json()
+    assert during['versions'] == []
+    assert during['pagination']['total'] == 0
+
+    release.set()
+    assert wait_for_job(response)['status'] == 'succeeded'
+
+    after = client.get('/api/versions', query_string={'search': '化学物质'}).get_json()
+    assert [version['id'] for version in after['versions']] == [response.get_json()['id']]
+    assert after['pagination']['total'] == len(after['versions'])
+
+
+def test_search_count_cached_per_database(client, sample_owl, tmp_path, monkeypatch):
+    """未指定db_path时缓存按实际使用的数据库区分，切换ONTOLOGY_DB_PATH后不会读到其他数据库的计数"""
+    from models import OntologyVersion
+    assert client.post('/api/versions', json={'name': 'alpha', 'ontology_data': sample_owl}).status_code == 201
+    assert OntologyVersion.count_all('alpha') == 1
+
+    monkeypatch.setenv('ONTOLOGY_DB_PATH', str(tmp_path / 'other.db'))
+    client = api.create_app().test_client()
+    assert client.post('/api/versions', json={'name': 'beta', 'ontology_data': sample_owl}).status_code == 201
+    assert OntologyVersion.count_all('alpha') == 0
+    assert OntologyVersion.count_all('beta') == 1
+
+
+def _search(client, term):
+    body = client.get('/api/versions', query_string={'search': term}).get_json()
+    assert body['pagination']['total'] == len(body['versions'])
+    return [version['name'] for version in body['versions']]
+
+
+def test_full_text_search(client, sample_owl):
+    """检索名称、描述、类和属性的标签及注释；名称匹配排在注释匹配之前；不足3个字符的检索词同样可以匹配"""
+    small = sample_owl.replace('优化问题的约束条件', '约束').replace('分子量', '分子质量')
+    for name, description, data in (('约束条件集', '', small), ('qz', '分子量参考', small), ('full', '', sample_owl)):
+        created = client.post('/api/versions', json={'name': name, 'description': description, 'ontology_data': data})
+        assert created.status_code == 201
+
+    assert _search(client, '约束条件') == ['约束条件集', 'full']  # 名称权重高于注释
+    assert sorted(_search(client, '分子量')) == ['full', 'qz']  # 描述、属性标签
+    assert sorted(_search(client, '分子质量')) == ['qz', '约束条件集']
+    assert len(_search(client, 'hasCASNumber')) == 3  # 类和属性的本地名称
+    # 短检索词不使用trigram索引，退化为LIKE匹配
+    assert sorted(_search(client, '约束')) == ['full', 'qz', '约束条件集']
+    assert _search(client, 'qz') == ['qz']
+    assert _search(client, '不存在的词') == []
+
+
+def test_search_index_follows_updates_and_deletes(client, sample_owl):
+    version_id = client.post('/api/versions', json={'name': 'alpha', 'ontology_data': sample_owl}).get_json()['id']
+    client.put(f'/api/versions/{version_id}', json={'name': 'gamma'})
+    assert _search(client, 'alpha') == []
+    assert _search(client, 'gamma') == ['gamma']
+    client.delete(f'/api/versions/{version_id}')
+    assert _search(client, 'gamma') == []
+    assert _search(client, '化学物质') == []
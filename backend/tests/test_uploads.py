@@ -0,0 +1,88 @@
+import io
+import os
+
+import pytest
+
+from uploads import UploadTooLarge, sniff_data_type, spool_upload
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'uploads'
+    path.mkdir()
+    monkeypatch.setenv('UPLOAD_DIR', str(path))
+    return path
+
+
+def _version(client, response, fields='ontology_data,tree'):
+    return client.get(f"/api/versions/{response.get_json()['id']}?fields={fields}").get_json()
+
+
+def test_multipart_upload(client, upload_dir, sample_owl):
+    """multipart上传：名称默认取文件名，临时文件在导入后删除"""
+    response = client.post('/api/versions/upload', content_type='multipart/form-data', data={
+        'file': (io.BytesIO(sample_owl.encode('utf-8')), 'RTO-V4.owl'), 'description': 'd'})
+    assert response.status_code == 201
+    assert response.headers['Location'] == f"/api/versions/{response.get_json()['id']}"
+    version = _version(client, response)
+    assert version['name'] == 'RTO-V4' and version['description'] == 'd'
+    assert version['ontology_data'] == sample_owl
+    assert version['tree']['children']
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_raw_body_upload(client, upload_dir, sample_owl):
+    """直接以请求体上传，参数通过查询参数传递；支持带BOM的文件和JSON-LD"""
+    response = client.post('/api/versions/upload?name=raw', data=b'\xef\xbb\xbf' + sample_owl.encode('utf-8'))
+    assert response.status_code == 201
+    assert _version(client, response)['ontology_data'] == sample_owl
+
+    jsonld = client.get(f"/api/versions/{response.get_json()['id']}?fields=jsonld_data").get_json()['jsonld_data']
+    response = client.post('/api/versions/upload?name=jsonld', data=jsonld.encode('utf-8'))
+    assert response.status_code == 201
+    version = _version(client, response)
+    assert version['ontology_data'] == jsonld
+    assert version['tree']['children']
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_async_upload(client, upload_dir, sample_owl, wait_for_job, monkeypatch):
+    monkeypatch.setenv('INGEST_MODE', 'async')
+    response = client.post('/api/versions/upload?name=v1', data=sample_owl.encode('utf-8'))
+    assert wait_for_job(response)['status'] == 'succeeded'
+    assert _version(client, response)['tree']['children']
+    assert list(upload_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize('url, body, detail', [
+    ('/api/versions/upload', b'<rdf:RDF/>', '名称是必填项'),
+    ('/api/versions/upload?name=v1', b'', '数据内容是必填项'),
+    ('/api/versions/upload?name=v1', b'plain text', '无法识别的文件格式，仅支持OWL(RDF/XML)和JSON-LD'),
+])
+def test_upload_validation(client, upload_dir, url, body, detail):
+    response = client.post(url, data=body)
+    assert response.status_code == 400
+    assert detail in response.get_json()['details']
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_max_upload_bytes(client, upload_dir, sample_owl, monkeypatch):
+    """超过MAX_UPLOAD_BYTES的上传返回413，不写入临时文件"""
+    monkeypatch.setenv('MAX_UPLOAD_BYTES', '1000')
+    response = client.post('/api/versions/upload?name=v1', data=sample_owl.encode('utf-8'))
+    assert response.status_code == 413
+    assert '1000' in response.get_json()['details'][0]
+    multipart = client.post('/api/versions/upload', content_type='multipart/form-data', data={
+        'file': (io.BytesIO(sample_owl.encode('utf-8')), 'big.owl')})
+    assert multipart.status_code == 413
+    assert client.get('/api/versions').get_json()['pagination']['total'] == 0
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_spool_upload_limit_without_content_length(upload_dir):
+    """没有Content-Length（分块传输）时在写入过程中检查大小，超出后删除已写入的临时文件"""
+    path, size = spool_upload(io.BytesIO(b'<rdf:RDF/>'), max_bytes=10)
+    assert size == 10 and sniff_data_type(path) == 'owl'
+    with pytest.raises(UploadTooLarge):
+        spool_upload(io.BytesIO(b'x' * 11), max_bytes=10)
+    assert [p.name for p in upload_dir.iterdir()] == [os.path.basename(path)]
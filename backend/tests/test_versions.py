@@ -0,0 +1,121 @@
+import sqlite3
+
+
+def _artifact_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT * FROM ontology_artifacts ORDER BY version_id, name').fetchall()
+
+
+def test_default_ingest_is_sync(client, sample_owl, monkeypatch):
+    """未配置INGEST_MODE时同步导入，创建后即可读取产物"""
+    monkeypatch.delenv('INGEST_MODE', raising=False)
+    created = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    assert created.status_code == 201
+    version = client.get(f"/api/versions/{created.get_json()['id']}?fields=tree,table").get_json()
+    assert version['tree']['children'] and version['table']
+
+
+def test_rename_does_not_rewrite_artifacts(client, db_path, sample_owl):
+    """只修改名称和描述时不读取也不重写原始数据和产物"""
+    created = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    assert created.status_code == 201
+    version_id = created.get_json()['id']
+    before = _artifact_rows(db_path)
+
+    # 记录之后对产物表的所有写入（INSERT OR REPLACE也会触发INSERT触发器）
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('CREATE TABLE artifact_writes (version_id INTEGER, name TEXT)')
+        for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            conn.execute(f'''
+                CREATE TRIGGER trg_test_artifact_{event.lower()} AFTER {event} ON ontology_artifacts
+                BEGIN
+                    INSERT INTO artifact_writes VALUES ({row}.version_id, {row}.name);
+                END
+            ''')
+
+    response = client.put(f'/api/versions/{version_id}', json={'name': 'renamed', 'description': 'd'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['name'] == 'renamed'
+    assert body['ontology_data'] == sample_owl
+    assert body['tree'] == created.get_json()['tree']
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM artifact_writes').fetchone()[0] == 0
+    assert _artifact_rows(db_path) == before
+
+
+def test_incremental_update_returns_formats(client, sample_owl, monkeypatch):
+    """同步增量更新的响应包含重新生成的OWL/JSON-LD数据，之后读取时无需重新转换"""
+    import api
+    import pipeline
+    created = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl})
+    version_id = created.get_json()['id']
+
+    edited = sample_owl.replace('<rdfs:label xml:lang="zh">化学物质</rdfs:label>',
+                                '<rdfs:label xml:lang="zh">化学物质X</rdfs:label>', 1)
+    monkeypatch.setattr(pipeline, 'build_artifacts', None)  # 增量更新不应完整生成产物
+    response = client.put(f'/api/versions/{version_id}', json={'ontology_data': edited})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['owl_data'] == edited
+    assert '化学物质X' in body['jsonld_data']
+
+    monkeypatch.setattr(api, 'convert_formats', None)  # 格式数据未过期，读取时不应重新转换
+    version = client.get(f'/api/versions/{version_id}?fields=owl_data,jsonld_data').get_json()
+    assert version['owl_data'] == body['owl_data']
+    assert version['jsonld_data'] == body['jsonld_data']
+
+
+def test_field_projection(client, sample_owl):
+    """列表只返回元数据；详情默认不包含graph，fields只返回元数据和指定字段，不支持的字段返回400"""
+    from models import META_FIELDS
+    version_id = client.post('/api/versions', json={'name': 'v1', 'ontology_data': sample_owl}).get_json()['id']
+
+    listed = client.get('/api/versions').get_json()['versions']
+    assert set(listed[0]) <= set(META_FIELDS)
+
+    default = client.get(f'/api/versions/{version_id}').get_json()
+    assert 'graph' not in default and default['tree'] and default['ontology_data'] == sample_owl
+
+    projected = client.get(f'/api/versions/{version_id}?fields=tree,graph').get_json()
+    assert set(projected) == set(META_FIELDS) | {'tree', 'graph'}
+    assert projected['graph']['nodes']
+
+    invalid = client.get(f'/api/versions/{version_id}?fields=tree,index')
+    assert invalid.status_code == 400
+    assert invalid.get_json()['details'] == ['不支持的字段: index']
+
+
+SMALL_OWL = '''<?xml version="1.0"?>
+<rdf:RDF xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+    <owl:Class rdf:about="http://example.org/small#Thing"/>
+</rdf:RDF>
+'''
+
+
+def test_cursor_pagination(client):
+    """按next_cursor翻页得到与page分页相同的顺序（updated_at、id倒序），最后一页没有next_cursor"""
+    ids = [client.post('/api/versions', json={'name': f'v{i}', 'ontology_data': SMALL_OWL}).get_json()['id']
+           for i in range(5)]
+    by_page = [version['id'] for page in (1, 2, 3)
+               for version in client.get(f'/api/versions?page={page}&page_size=2').get_json()['versions']]
+    assert by_page == ids[::-1]
+
+    seen = []
+    query = {'page_size': 2, 'total': 'false'}
+    while True:
+        body = client.get('/api/versions', query_string=query).get_json()
+        assert body['pagination']['total'] is None
+        seen.extend(version['id'] for version in body['versions'])
+        cursor = body['pagination']['next_cursor']
+        if cursor is None:
+            break
+        query['cursor'] = cursor
+    assert seen == by_page
+
+    for cursor in ('not-a-cursor', 'W10', 'WyJ4Il0'):
+        response = client.get('/api/versions', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json()['details'] == ['无效的分页游标']
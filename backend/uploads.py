@@ -0,0 +1,80 @@
+"""
+本体文件上传模块
+将上传的本体文件分块写入磁盘临时文件，导入流程直接从文件解析，避免在内存中保存整个请求体及其JSON解码副本
+
+环境变量：
+- UPLOAD_DIR: 上传文件的临时目录，默认为系统临时目录
+- MAX_UPLOAD_BYTES: 单个上传文件的最大字节数，默认1GB，设为0不限制
+"""
+
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+# 识别数据类型时读取的文件头字节数
+SNIFF_BYTES = 4096
+
+
+class UploadTooLarge(ValueError):
+    """上传文件超过MAX_UPLOAD_BYTES限制"""
+
+
+def get_max_upload_bytes():
+    """获取上传文件的大小限制，不限制时返回None"""
+    max_bytes = int(os.environ.get('MAX_UPLOAD_BYTES', DEFAULT_MAX_UPLOAD_BYTES))
+    return max_bytes if max_bytes > 0 else None
+
+
+def spool_upload(stream, max_bytes=None):
+    """将上传数据流分块写入临时文件，返回(文件路径, 字节数)
+
+    超过max_bytes时删除临时文件并抛出UploadTooLarge；临时文件由调用方（或导入任务）在处理完成后删除
+    """
+    fd, path = tempfile.mkstemp(prefix='upload-', suffix='.tmp', dir=os.environ.get('UPLOAD_DIR') or None)
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(f'上传文件超过大小限制（{max_bytes}字节）')
+                f.write(chunk)
+    except BaseException:
+        discard_upload(path)
+        raise
+    logger.debug("上传文件已写入临时文件 %s，共 %s 字节", path, size)
+    return path, size
+
+
+def discard_upload(path):
+    """删除上传的临时文件"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sniff_data_type(path):
+    """根据文件开头的非空白字符识别数据类型：'<'为OWL(RDF/XML)，'{'或'['为JSON-LD，否则返回"unknown" """
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    head = head.lstrip(b'\xef\xbb\xbf').lstrip()
+    if head.startswith(b'<'):
+        return "owl"
+    if head.startswith((b'{', b'[')):
+        return "jsonld"
+    return "unknown"
+
+
+def read_upload_text(path):
+    """以UTF-8读取上传文件的全部内容（版本表保存的原始数据）"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
@@ -1,314 +1,437 @@
 import json
-import traceback
+import logging
 
 from pyvis.network import Network
 
-from convert import convert_jsonld_to_owl, convert_owl_to_jsonld, detect_data_type
-from parsers import OWLParser
+from cache import content_hash, get_visualization_cache
+from convert import convert_owl_to_jsonld, detect_data_type
+from metrics import span
+from ontology import OntologyModel
+from parsers import get_local_name, get_parser_backend, is_meaningless_node
+
+logger = logging.getLogger(__name__)
+
+# 紧凑网络图数据的格式版本，格式变化时递增
+GRAPH_FORMAT_VERSION = 1
+
+# vis-network的全局选项
+GRAPH_OPTIONS = {
+    "physics": {
+        "enabled": True,
+        "stabilization": {
+            "iterations": 100
+        }
+    }
+}
+
+# 节点和边的分组样式，节点和边通过group字段引用
+GRAPH_STYLES = {
+    'class': {
+        'shape': 'box',
+        'color': {'background': '#4CAF50', 'border': '#388E3C',
+                  'highlight': {'background': '#66BB6A', 'border': '#388E3C'}},
+        'font': {'color': 'black'}
+    },
+    'datatype_property': {
+        'shape': 'ellipse',
+        'color': {'background': '#2196F3', 'border': '#1976D2',
+                  'highlight': {'background': '#42A5F5', 'border': '#1976D2'}},
+        'font': {'color': 'black'}
+    },
+    'object_property': {
+        'shape': 'ellipse',
+        'color': {'background': '#FF9800', 'border': '#F57C00',
+                  'highlight': {'background': '#FFB74D', 'border': '#F57C00'}},
+        'font': {'color': 'black'}
+    },
+    'restriction': {
+        'shape': 'diamond',
+        'color': {'background': '#9C27B0', 'border': '#7B1FA2',
+                  'highlight': {'background': '#BA68C8', 'border': '#7B1FA2'}},
+        'font': {'color': 'black'}
+    },
+    'subClassOf': {
+        'label': 'subClassOf',
+        'color': {'color': '#4CAF50', 'highlight': '#66BB6A'},
+        'arrows': {'to': {'enabled': True, 'scaleFactor': 1}},
+        'width': 2
+    },
+    'domain': {
+        'label': 'domain',
+        'color': {'color': '#2196F3', 'highlight': '#42A5F5'},
+        'arrows': {'to': {'enabled': True, 'scaleFactor': 0.5}},
+        'width': 1,
+        'dashes': True
+    },
+    'range': {
+        'label': 'range',
+        'color': {'color': '#FF9800', 'highlight': '#FFB74D'},
+        'arrows': {'to': {'enabled': True, 'scaleFactor': 0.5}},
+        'width': 1,
+        'dashes': True
+    }
+}
 
 
 def generate_visualization_from_owl(owl_data):
-    """从OWL数据生成可视化网络图，返回图html、tree层级结构json象、统计信息"""
+    """从OWL数据生成可视化网络图，返回网络图数据、tree层级结构json对象、统计信息"""
+    logger.debug("开始生成OWL可视化，数据长度: %s 字符", len(owl_data))
     try:
-        print(f"[DEBUG] 开始生成OWL可视化，数据长度: {len(owl_data)} 字符")
-        # 使用OWL解析器
-        parser = OWLParser(owl_data)
-        if not parser.parse():
-            print("[DEBUG] OWL解析失败，无法生成可视化")
-            return None, None, [], 0, 0
-
-        # 使用pyvis生成可视化
-        net = Network(height="98vh", width="99vw", bgcolor="#ffffff", font_color="black", directed=True)
-        net.barnes_hut()
-        net.set_options("""
-        var options = {
-          "height": "100vh",
-          "width": "100vw",
-          "physics": {
-            "enabled": true,
-            "stabilization": {
-              "iterations": 100
-            }
-          }
-        }
-        """)
+        model = OntologyModel.parse(owl_data, "owl")
+    except Exception as e:
+        logger.exception("OWL解析错误: %s", e)
+        raise
+    return generate_visualization_from_model(model)
 
-        # 添加类节点
-        print(f"[DEBUG] 开始添加类节点，共 {len(parser.get_classes())} 个类")
-        class_stats = _add_class_nodes(net, parser)
 
-        # 添加数据属性节点
-        print(f"[DEBUG] 开始添加数据属性节点，共 {len(parser.get_datatype_properties())} 个数据属性")
-        dataprop_stats = _add_datatype_property_nodes(net, parser)
+def generate_visualization_from_model(model, parser_backend=None):
+    """从已解析的OntologyModel生成可视化网络图、tree层级结构、三元组关系和检索文本"""
+    try:
+        return generate_visualization_from_parser(model.get_parser(parser_backend))
+    except Exception as e:
+        logger.exception("OWL可视化错误: %s", e)
+        raise
 
-        # 添加对象属性节点
-        print(f"[DEBUG] 开始添加对象属性节点，共 {len(parser.get_object_properties())} 个对象属性")
-        objprop_stats = _add_object_property_nodes(net, parser)
 
-        # 添加限制节点
-        print(f"[DEBUG] 开始处理限制节点，共 {len(parser.get_restrictions())} 个限制")
-        restriction_count = _add_restriction_nodes(net, parser)
+def generate_visualization_from_parser(parser):
+    """从已完成解析的OWLParser生成可视化网络图数据、tree层级结构、三元组关系和检索文本"""
+    with span('graph'):
+        graph_data = build_graph_data(parser)
+    with span('structure'):
+        tree_data, triple_relations, search_text = build_structure_data(parser)
+    return (graph_data, tree_data, triple_relations,
+            len(graph_data['nodes']), len(graph_data['edges']), search_text)
 
-        # 添加subClassOf关系
-        print(f"[DEBUG] 开始添加子类关系，共 {len(parser.get_subclass_relations())} 个子类关系")
-        subclass_stats = _add_subclass_edges(net, parser)
 
-        # 添加domain和range关系
-        print(f"[DEBUG] 开始添加定义域/值域关系，共 {len(parser.get_domain_range_relations())} 个关系")
-        domain_range_stats = _add_domain_range_edges(net, parser)
+def build_graph_data(parser):
+    """生成紧凑格式的网络图数据（可在进程池中执行，parser序列化时不包含RDF图）
 
-        # 计算统计信息
-        total_nodes = sum([class_stats['added'], dataprop_stats['added'], objprop_stats['added'], restriction_count])
-        total_edges = sum([subclass_stats['added'], domain_range_stats['added']])
+    返回{"version", "options", "styles", "nodes", "edges"}：节点和边只保存id、label、title及所属分组，
+    颜色、形状、字体、箭头等样式按分组保存在styles中，由前端或render_graph_html合并；
+    边的from/to为节点在nodes数组中的下标，避免重复保存节点URI
+    """
+    # 节点按URI索引，保持添加顺序
+    nodes = {}
+    edges = []
 
-        _print_statistics(class_stats, dataprop_stats, objprop_stats, restriction_count, 
-                         subclass_stats, domain_range_stats, total_nodes, total_edges)
+    # 添加类节点
+    logger.debug("开始添加类节点，共 %s 个类", len(parser.get_classes()))
+    class_stats = _add_class_nodes(nodes, parser)
 
-        # 生成tree层级结构json
-        tree_data = _generate_tree_structure(parser)
-        
-        # 获取所有三元组关系并按source聚类
-        triple_relations = parser.get_all_relations()
+    # 添加数据属性节点
+    logger.debug("开始添加数据属性节点，共 %s 个数据属性", len(parser.get_datatype_properties()))
+    dataprop_stats = _add_datatype_property_nodes(nodes, parser)
 
-        return net.generate_html(), tree_data, triple_relations, total_nodes, total_edges
-    except Exception as e:
-        print(f"[ERROR] OWL可视化错误: {e}")
-        traceback.print_exc()
-        raise
+    # 添加对象属性节点
+    logger.debug("开始添加对象属性节点，共 %s 个对象属性", len(parser.get_object_properties()))
+    objprop_stats = _add_object_property_nodes(nodes, parser)
+
+    # 添加限制节点
+    logger.debug("开始处理限制节点，共 %s 个限制", len(parser.get_restrictions()))
+    restriction_count = _add_restriction_nodes(nodes, parser)
+
+    # 节点URI到下标的索引，用于检查边的端点是否存在
+    node_index = {uri: i for i, uri in enumerate(nodes)}
+
+    # 添加subClassOf关系
+    logger.debug("开始添加子类关系，共 %s 个子类关系", len(parser.get_subclass_relations()))
+    subclass_stats = _add_subclass_edges(edges, node_index, parser)
+
+    # 添加domain和range关系
+    logger.debug("开始添加定义域/值域关系，共 %s 个关系", len(parser.get_domain_range_relations()))
+    domain_range_stats = _add_domain_range_edges(edges, node_index, parser)
 
+    # 计算统计信息
+    total_nodes = sum([class_stats['added'], dataprop_stats['added'], objprop_stats['added'], restriction_count])
+    total_edges = sum([subclass_stats['added'], domain_range_stats['added']])
 
-def _add_class_nodes(net, parser):
+    _log_statistics(class_stats, dataprop_stats, objprop_stats, restriction_count,
+                    subclass_stats, domain_range_stats, total_nodes, total_edges)
+
+    return {
+        'version': GRAPH_FORMAT_VERSION,
+        'options': GRAPH_OPTIONS,
+        'styles': GRAPH_STYLES,
+        'nodes': list(nodes.values()),
+        'edges': edges
+    }
+
+
+def is_graph_data(graph):
+    """判断产物是否为紧凑格式的网络图数据（早期版本保存的是完整HTML页面）"""
+    return isinstance(graph, dict) and 'nodes' in graph and 'edges' in graph
+
+
+def build_network(graph_data):
+    """根据紧凑格式的网络图数据构建pyvis网络图，合并分组样式"""
+    net = Network(height="98vh", width="99vw", bgcolor="#ffffff", font_color="black", directed=True)
+    net.barnes_hut()
+    net.set_options(json.dumps({"height": "100vh", "width": "100vw", **graph_data.get('options', GRAPH_OPTIONS)}))
+
+    styles = graph_data.get('styles', GRAPH_STYLES)
+    _bulk_add_nodes(net, graph_data['nodes'], styles)
+    _bulk_add_edges(net, graph_data['edges'], styles, [node['id'] for node in graph_data['nodes']])
+    return net
+
+
+def _bulk_add_nodes(net, nodes, styles):
+    """批量添加节点
+
+    pyvis的add_node在node_ids列表中线性查找重复节点，逐个添加的总代价为O(N²)；
+    这里用字典索引去重后一次性写入，结果与逐个add_node相同（重复的id保留第一个）
+    """
+    node_map = dict(net.node_map)
+    added = []
+    for node in nodes:
+        if node['id'] in node_map:
+            continue
+        options = {**styles.get(node.get('group'), {}), **node}
+        options.pop('group', None)
+        options.setdefault('label', node['id'])
+        options.setdefault('font', {'color': net.font_color})
+        node_map[node['id']] = options
+        added.append(options)
+    net.nodes.extend(added)
+    net.node_ids.extend(options['id'] for options in added)
+    net.node_map.update((options['id'], options) for options in added)
+
+
+def _bulk_add_edges(net, edges, styles, node_ids):
+    """批量添加边，边的端点为节点下标，无需像add_edge那样在node_ids列表中查找端点"""
+    added = []
+    for edge in edges:
+        options = {**styles.get(edge.get('group'), {}), **edge}
+        options.pop('group', None)
+        options['from'] = node_ids[edge['from']]
+        options['to'] = node_ids[edge['to']]
+        if net.directed:
+            options.setdefault('arrows', 'to')
+        added.append(options)
+    net.edges.extend(added)
+
+
+def render_graph_html(graph_data):
+    """将紧凑格式的网络图数据渲染为独立的pyvis HTML页面"""
+    with span('pyvis_build'):
+        net = build_network(graph_data)
+    with span('render_html'):
+        return net.generate_html()
+
+
+def build_structure_data(parser):
+    """生成tree层级结构、按source聚类的三元组关系和全文检索文本"""
+    # 生成tree层级结构json
+    tree_data = _generate_tree_structure(parser)
+
+    # 获取所有三元组关系并按source聚类
+    triple_relations = parser.get_all_relations()
+
+    # 获取全文检索文本
+    search_labels, search_comments = parser.get_search_text()
+
+    return tree_data, triple_relations, {'labels': search_labels, 'comments': search_comments}
+
+
+def make_visualization_result(graph_data, tree_data, triple_relations, search_text):
+    """组装generate_visualization的返回结果"""
+    return {
+        "graph": graph_data,
+        "tree": {"name": "Root", "children": tree_data},
+        "table": triple_relations,
+        "search": search_text
+    }
+
+
+def make_graph_node(uri, parser):
+    """按build_graph_data的规则生成单个实体的网络图节点，实体不在网络图中时返回None
+
+    同一URI有多种类型时依次按类、数据属性、对象属性、限制取第一种；类和属性中意义不明的节点被过滤，限制节点保留
+    """
+    if not is_meaningless_node(uri):
+        if uri in parser.get_classes():
+            return _class_node(uri, parser.get_classes()[uri])
+        if uri in parser.get_datatype_properties():
+            return _property_node(uri, parser.get_datatype_properties()[uri], 'datatype_property')
+        if uri in parser.get_object_properties():
+            return _property_node(uri, parser.get_object_properties()[uri], 'object_property')
+    if uri in parser.get_restrictions():
+        return _restriction_node(uri, parser.get_restrictions()[uri])
+    return None
+
+
+def build_graph_edges(parser, node_index):
+    """按build_graph_data的规则生成全部边（子类关系在前，定义域/值域关系在后），node_index为节点URI到下标的索引"""
+    edges = []
+    _add_subclass_edges(edges, node_index, parser)
+    _add_domain_range_edges(edges, node_index, parser)
+    return edges
+
+
+def _add_class_nodes(nodes, parser):
     """添加类节点到网络图"""
     added_count = 0
     filtered_count = 0
-    
+
     for class_uri, class_info in parser.get_classes().items():
         # 过滤意义不明的节点
-        if parser._is_meaningless_node(class_uri):
-            print(f"[DEBUG] 过滤意义不明的类节点: {class_uri}")
+        if is_meaningless_node(class_uri):
             filtered_count += 1
             continue
 
-        class_name = class_info['name']
-        label = _clean_label(class_info['label'], class_name)
-        title = f"类: {class_name}"
-        if class_info['comment']:
-            title += f"\n注释: {class_info['comment']}"
-
-        net.add_node(
-            class_uri,
-            label=label,
-            title=title,
-            color={
-                'background': '#4CAF50',
-                'border': '#388E3C',
-                'highlight': {
-                    'background': '#66BB6A',
-                    'border': '#388E3C'
-                }
-            },
-            shape='box',
-            font={'color': 'white', 'size': 14}
-        )
+        nodes.setdefault(class_uri, _class_node(class_uri, class_info))
         added_count += 1
-    
+
     return {'added': added_count, 'filtered': filtered_count}
 
 
-def _add_datatype_property_nodes(net, parser):
+def _add_datatype_property_nodes(nodes, parser):
     """添加数据属性节点到网络图"""
     added_count = 0
     filtered_count = 0
-    
+
     for prop_uri, prop_info in parser.get_datatype_properties().items():
         # 过滤意义不明的节点
-        if parser._is_meaningless_node(prop_uri):
-            print(f"[DEBUG] 过滤意义不明的数据属性节点: {prop_uri}")
+        if is_meaningless_node(prop_uri):
             filtered_count += 1
             continue
 
-        prop_name = prop_info['name']
-        label = _clean_label(prop_info['label'], prop_name)
-        title = f"数据属性: {prop_name}"
-        if prop_info['comment']:
-            title += f"\n注释: {prop_info['comment']}"
-        if prop_info['domain']:
-            title += f"\n定义域: {', '.join([parser._get_local_name(d) for d in prop_info['domain']])}"
-        if prop_info['range']:
-            title += f"\n值域: {', '.join([parser._get_local_name(r) for r in prop_info['range']])}"
-
-        net.add_node(
-            prop_uri,
-            label=label,
-            title=title,
-            color={
-                'background': '#2196F3',
-                'border': '#1976D2',
-                'highlight': {
-                    'background': '#42A5F5',
-                    'border': '#1976D2'
-                }
-            },
-            shape='ellipse',
-            font={'color': 'white', 'size': 12}
-        )
+        nodes.setdefault(prop_uri, _property_node(prop_uri, prop_info, 'datatype_property'))
         added_count += 1
-    
+
     return {'added': added_count, 'filtered': filtered_count}
 
 
-def _add_object_property_nodes(net, parser):
+def _add_object_property_nodes(nodes, parser):
     """添加对象属性节点到网络图"""
     added_count = 0
     filtered_count = 0
-    
+
     for prop_uri, prop_info in parser.get_object_properties().items():
         # 过滤意义不明的节点
-        if parser._is_meaningless_node(prop_uri):
-            print(f"[DEBUG] 过滤意义不明的对象属性节点: {prop_uri}")
+        if is_meaningless_node(prop_uri):
             filtered_count += 1
             continue
 
-        prop_name = prop_info['name']
-        label = _clean_label(prop_info['label'], prop_name)
-        title = f"对象属性: {prop_name}"
-        if prop_info['comment']:
-            title += f"\n注释: {prop_info['comment']}"
-        if prop_info['domain']:
-            title += f"\n定义域: {', '.join([parser._get_local_name(d) for d in prop_info['domain']])}"
-        if prop_info['range']:
-            title += f"\n值域: {', '.join([parser._get_local_name(r) for r in prop_info['range']])}"
-
-        net.add_node(
-            prop_uri,
-            label=label,
-            title=title,
-            color={
-                'background': '#FF9800',
-                'border': '#F57C00',
-                'highlight': {
-                    'background': '#FFB74D',
-                    'border': '#F57C00'
-                }
-            },
-            shape='ellipse',
-            font={'color': 'white', 'size': 12}
-        )
+        nodes.setdefault(prop_uri, _property_node(prop_uri, prop_info, 'object_property'))
         added_count += 1
-    
+
     return {'added': added_count, 'filtered': filtered_count}
 
 
-def _add_restriction_nodes(net, parser):
+def _add_restriction_nodes(nodes, parser):
     """添加限制节点到网络图"""
     restriction_count = 0
-    
+
     for restriction_uri, restriction_info in parser.get_restrictions().items():
         restriction_count += 1
-        # 打印限制节点信息日志
-        print(f"[DEBUG] 发现限制节点: {restriction_uri}")
-        print(f"[DEBUG] 限制详情: {restriction_info}")
-
-        restriction_name = parser._get_local_name(restriction_uri)
-        title = f"限制: {restriction_name}"
-        if restriction_info['onProperty']:
-            title += f"\n属性: {parser._get_local_name(restriction_info['onProperty'])}"
-        if restriction_info['someValuesFrom']:
-            title += f"\n存在值来自: {parser._get_local_name(restriction_info['someValuesFrom'])}"
-        if restriction_info['allValuesFrom']:
-            title += f"\n所有值来自: {parser._get_local_name(restriction_info['allValuesFrom'])}"
-        if restriction_info['hasValue']:
-            title += f"\n值为: {restriction_info['hasValue']}"
-        
-        net.add_node(
-            restriction_uri,
-            label=f"限制: {restriction_name}",
-            title=title,
-            color={
-                'background': '#9C27B0',
-                'border': '#7B1FA2',
-                'highlight': {
-                    'background': '#BA68C8',
-                    'border': '#7B1FA2'
-                }
-            },
-            shape='diamond',
-            font={'color': 'white', 'size': 10}
-        )
-    
+        nodes.setdefault(restriction_uri, _restriction_node(restriction_uri, restriction_info))
+
     return restriction_count
 
 
-def _add_subclass_edges(net, parser):
+def _class_node(class_uri, class_info):
+    """生成类节点"""
+    class_name = class_info['name']
+    label = _clean_label(class_info['label'], class_name)
+    title = f"类: {class_name}"
+    if class_info['comment']:
+        title += f"\n注释: {class_info['comment']}"
+    return {'id': class_uri, 'label': label, 'title': title, 'group': 'class'}
+
+
+def _property_node(prop_uri, prop_info, group):
+    """生成数据属性或对象属性节点，group为datatype_property或object_property"""
+    prop_name = prop_info['name']
+    label = _clean_label(prop_info['label'], prop_name)
+    title = f"{'数据属性' if group == 'datatype_property' else '对象属性'}: {prop_name}"
+    if prop_info['comment']:
+        title += f"\n注释: {prop_info['comment']}"
+    if prop_info['domain']:
+        title += f"\n定义域: {', '.join([get_local_name(d) for d in prop_info['domain']])}"
+    if prop_info['range']:
+        title += f"\n值域: {', '.join([get_local_name(r) for r in prop_info['range']])}"
+    return {'id': prop_uri, 'label': label, 'title': title, 'group': group}
+
+
+def _restriction_node(restriction_uri, restriction_info):
+    """生成限制节点"""
+    restriction_name = get_local_name(restriction_uri)
+    title = f"限制: {restriction_name}"
+    if restriction_info['onProperty']:
+        title += f"\n属性: {get_local_name(restriction_info['onProperty'])}"
+    if restriction_info['someValuesFrom']:
+        title += f"\n存在值来自: {get_local_name(restriction_info['someValuesFrom'])}"
+    if restriction_info['allValuesFrom']:
+        title += f"\n所有值来自: {get_local_name(restriction_info['allValuesFrom'])}"
+    if restriction_info['hasValue']:
+        title += f"\n值为: {restriction_info['hasValue']}"
+    return {
+        'id': restriction_uri,
+        'label': f"限制: {restriction_name}",
+        'title': title,
+        'group': 'restriction'
+    }
+
+
+def _add_subclass_edges(edges, node_index, parser):
     """添加子类关系边到网络图"""
     added_count = 0
     filtered_count = 0
-    
+
     for relation in parser.get_subclass_relations():
+        edge = _subclass_edge(relation['subclass'], relation['superclass'], node_index)
         # 确保节点存在
-        if relation['subclass'] not in net.node_ids or relation['superclass'] not in net.node_ids:
+        if edge is None:
             filtered_count += 1
             continue
-
-        subclass_name = parser._get_local_name(relation['subclass'])
-        superclass_name = parser._get_local_name(relation['superclass'])
-        net.add_edge(
-            relation['subclass'],
-            relation['superclass'],
-            label='subClassOf',
-            title=f"{subclass_name} 是 {superclass_name} 的子类",
-            color={'color': '#4CAF50', 'highlight': '#66BB6A'},
-            arrows={'to': {'enabled': True, 'scaleFactor': 1}},
-            width=2
-        )
+        edges.append(edge)
         added_count += 1
-    
+
     return {'added': added_count, 'filtered': filtered_count}
 
 
-def _add_domain_range_edges(net, parser):
+def _add_domain_range_edges(edges, node_index, parser):
     """添加定义域和值域关系边到网络图"""
     added_count = 0
     filtered_count = 0
-    
+
     for relation in parser.get_domain_range_relations():
+        edge = _domain_range_edge(relation['type'], relation['property'], relation['class'], node_index)
         # 确保节点存在
-        if relation['property'] not in net.node_ids or relation['class'] not in net.node_ids:
+        if edge is None:
             filtered_count += 1
             continue
+        edges.append(edge)
+        added_count += 1
 
-        if relation['type'] == 'domain':
-            prop_name = parser._get_local_name(relation['property'])
-            class_name = parser._get_local_name(relation['class'])
-            net.add_edge(
-                relation['property'],
-                relation['class'],
-                label='domain',
-                title=f"{prop_name} 的定义域是 {class_name}",
-                color={'color': '#2196F3', 'highlight': '#42A5F5'},
-                arrows={'to': {'enabled': True, 'scaleFactor': 0.5}},
-                width=1,
-                dashes=True
-            )
-            added_count += 1
-        elif relation['type'] == 'range':
-            prop_name = parser._get_local_name(relation['property'])
-            class_name = parser._get_local_name(relation['class'])
-            net.add_edge(
-                relation['property'],
-                relation['class'],
-                label='range',
-                title=f"{prop_name} 的值域是 {class_name}",
-                color={'color': '#FF9800', 'highlight': '#FFB74D'},
-                arrows={'to': {'enabled': True, 'scaleFactor': 0.5}},
-                width=1,
-                dashes=True
-            )
-            added_count += 1
-    
     return {'added': added_count, 'filtered': filtered_count}
 
 
+def _subclass_edge(subclass, superclass, node_index):
+    """生成子类关系边，端点不是网络图节点时返回None"""
+    if subclass not in node_index or superclass not in node_index:
+        return None
+    return {
+        'from': node_index[subclass],
+        'to': node_index[superclass],
+        'title': f"{get_local_name(subclass)} 是 {get_local_name(superclass)} 的子类",
+        'group': 'subClassOf'
+    }
+
+
+def _domain_range_edge(relation_type, prop_uri, class_uri, node_index):
+    """生成定义域（relation_type为domain）或值域（range）关系边，端点不是网络图节点时返回None"""
+    if prop_uri not in node_index or class_uri not in node_index:
+        return None
+    verb = '定义域' if relation_type == 'domain' else '值域'
+    return {
+        'from': node_index[prop_uri],
+        'to': node_index[class_uri],
+        'title': f"{get_local_name(prop_uri)} 的{verb}是 {get_local_name(class_uri)}",
+        'group': relation_type
+    }
+
+
 def _clean_label(label, default):
     """清理标签文本，移除引号"""
     if label and isinstance(label, str):
@@ -317,22 +440,23 @@ def _clean_label(label, default):
     return default
 
 
-def _print_statistics(class_stats, dataprop_stats, objprop_stats, restriction_count,
-                     subclass_stats, domain_range_stats, total_nodes, total_edges):
-    """打印统计信息"""
-    print("[DEBUG] 可视化生成完成统计:")
-    print(
-        f"[DEBUG] - 类节点: {class_stats['added']}/{class_stats['added'] + class_stats['filtered']} (过滤 {class_stats['filtered']} 个)")
-    print(
-        f"[DEBUG] - 数据属性节点: {dataprop_stats['added']}/{dataprop_stats['added'] + dataprop_stats['filtered']} (过滤 {dataprop_stats['filtered']} 个)")
-    print(
-        f"[DEBUG] - 对象属性节点: {objprop_stats['added']}/{objprop_stats['added'] + objprop_stats['filtered']} (过滤 {objprop_stats['filtered']} 个)")
-    print(f"[DEBUG] - 限制节点: {restriction_count} 个")
-    print(
-        f"[DEBUG] - 子类关系: {subclass_stats['added']}/{subclass_stats['added'] + subclass_stats['filtered']} (过滤 {subclass_stats['filtered']} 个)")
-    print(
-        f"[DEBUG] - 定义域/值域关系: {domain_range_stats['added']}/{domain_range_stats['added'] + domain_range_stats['filtered']} (过滤 {domain_range_stats['filtered']} 个)")
-    print(f"[DEBUG] - 总节点数: {total_nodes}, 总边数: {total_edges}")
+def _log_statistics(class_stats, dataprop_stats, objprop_stats, restriction_count,
+                    subclass_stats, domain_range_stats, total_nodes, total_edges):
+    """输出一条可视化生成的汇总日志（被过滤的节点和边只计数）"""
+    stats = {
+        'nodes': total_nodes,
+        'edges': total_edges,
+        'class_nodes': class_stats['added'],
+        'datatype_property_nodes': dataprop_stats['added'],
+        'object_property_nodes': objprop_stats['added'],
+        'restriction_nodes': restriction_count,
+        'subclass_edges': subclass_stats['added'],
+        'domain_range_edges': domain_range_stats['added'],
+        'filtered_nodes': class_stats['filtered'] + dataprop_stats['filtered'] + objprop_stats['filtered'],
+        'filtered_edges': subclass_stats['filtered'] + domain_range_stats['filtered']
+    }
+    logger.info("可视化生成完成: %(nodes)s 个节点, %(edges)s 条边, 过滤 %(filtered_nodes)s 个节点和 %(filtered_edges)s 条边",
+                stats, extra={'fields': stats})
 
 
 def _generate_tree_structure(parser):
@@ -354,13 +478,7 @@ def _generate_tree_structure(parser):
         # 创建节点映射
         node_map = {}
         for uri, info in classes.items():
-            node_map[uri] = {
-                'id': uri,
-                'name': info['name'],
-                'label': info['label'],
-                'comment': info['comment'],
-                'children': []
-            }
+            node_map[uri] = make_tree_node(uri, info)
         
         # 建立父子关系
         for parent_uri, children_uris in parent_child_map.items():
@@ -381,65 +499,92 @@ def _generate_tree_structure(parser):
         
         return root_nodes
     except Exception as e:
-        print(f"[ERROR] 生成tree结构时出错: {e}")
-        traceback.print_exc()
+        logger.exception("生成tree结构时出错: %s", e)
         return []
 
 
-def generate_visualization(data):
-    """统一方法处理OWL和JSON-LD数据并生成可视化HTML和tree层级结构json"""
-    # 自动识别数据格式
-    data_type = detect_data_type(data)
-    
-    if data_type == "jsonld":
-        try:
-            owl_data = convert_jsonld_to_owl(data)
-            if not owl_data:
-                print("[ERROR] JSON-LD解析失败，无法生成可视化")
-                return None
-        except Exception as e:
-            print(f"[ERROR] JSON-LD转换为HTML时出错: {e}")
-            traceback.print_exc()
-            return None
-    elif data_type == "owl":
-        owl_data = data
-    else:
+def make_tree_node(uri, class_info, children=None):
+    """生成tree层级结构中的类节点"""
+    return {
+        'id': uri,
+        'name': class_info['name'],
+        'label': class_info['label'],
+        'comment': class_info['comment'],
+        'children': [] if children is None else children
+    }
+
+
+def visualization_cache_key(data, parser_backend=None):
+    """可视化结果的缓存键：内容哈希加网络图格式版本和解析器后端，格式变化后不会命中旧格式的缓存"""
+    return f"{content_hash(data)}-g{GRAPH_FORMAT_VERSION}-{get_parser_backend(parser_backend)}"
+
+
+def generate_visualization(data, use_cache=True, parser_backend=None):
+    """统一方法处理OWL和JSON-LD数据并生成可视化网络图数据和tree层级结构json
+
+    结果按规范化数据的内容哈希缓存，相同内容的重复请求直接返回缓存结果；
+    parser_backend指定解析器后端，为None时使用PARSER_BACKEND配置
+    """
+    cache = get_visualization_cache() if use_cache else None
+    if cache is None:
+        return _generate_visualization(data, parser_backend)
+
+    key = visualization_cache_key(data, parser_backend)
+    cached = cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    result = _generate_visualization(data, parser_backend)
+    if result is not None:
+        cache.put(key, result)
+        result = dict(result)
+    return result
+
+
+def _generate_visualization(data, parser_backend=None):
+    """解析数据并生成可视化结果（不经过缓存）"""
+    # 自动识别数据格式，JSON-LD直接构建RDF图，不经过RDF/XML中转
+    with span('detect'):
+        data_type = detect_data_type(data)
+    if data_type not in ("jsonld", "owl"):
         raise ValueError(f"不支持的数据类型: {data_type}")
 
     try:
-        vis_response = generate_visualization_from_owl(owl_data)
+        model = OntologyModel.parse(data, data_type)
+    except Exception as e:
+        logger.exception("%s解析失败，无法生成可视化: %s", 'JSON-LD' if data_type == 'jsonld' else 'OWL', e)
+        if data_type == "jsonld":
+            return None
+        raise
+
+    try:
+        vis_response = generate_visualization_from_model(model, parser_backend)
         if vis_response:
             # 解包返回值
-            graph_html, tree_data, triple_relations, _, _ = vis_response
-            return {
-                "graph": graph_html,
-                "tree": {"name": "Root", "children": tree_data},
-                "table": triple_relations
-            }
+            graph_data, tree_data, triple_relations, _, _, search_text = vis_response
+            return make_visualization_result(graph_data, tree_data, triple_relations, search_text)
     except Exception as e:
-        print(f"[ERROR] 可视化生成失败: {e}")
-        traceback.print_exc()
+        logger.exception("可视化生成失败: %s", e)
         raise
 
     return None
 
 
 if __name__ == "__main__":
-    with open("data/RTO-V4.owl", mode="r", encoding="utf-8") as fp1, open("data/test_owl.html", mode="w", encoding="utf-8") as fp2,\
-        open("data/test_jsonld.html", mode="w", encoding="utf-8") as fp3, open("data/tree_data.json", mode="w", encoding="utf-8") as fp4:
-        owl_data = fp1.read()
-        result = generate_visualization(owl_data)
-        if result:
-            fp2.write(result['html'])
-            # 保存tree层级结构json
-            json.dump(result['tree_data'], fp4, ensure_ascii=False, indent=2)
-
-        jsonld_data = convert_owl_to_jsonld(owl_data)
-        result = generate_visualization(jsonld_data)
-        if result:
-            fp3.write(result['html'])
-            # 注意：对于JSON-LD数据，我们不需要再次保存tree数据，因为它是从相同的OWL数据转换而来
-
-    # with open("data/RTO-V4.json", mode="r", encoding="utf-8") as fp1, open("data/test_jsonld.html", mode="w", encoding="utf-8") as fp2:
-    #     html_content = convert_data_to_html(fp1.read())
-    #     fp2.write(html_content)
+    # 生成示例本体的HTML网络图和tree层级结构，便于人工检查；性能测试见benchmarks/
+    with open("data/RTO-V4.owl", mode="r", encoding="utf-8") as fp:
+        owl_data = fp.read()
+
+    result = generate_visualization(owl_data)
+    if result:
+        with open("data/test_owl.html", mode="w", encoding="utf-8") as fp:
+            fp.write(render_graph_html(result['graph']))
+        # 保存tree层级结构json
+        with open("data/tree_data.json", mode="w", encoding="utf-8") as fp:
+            json.dump(result['tree'], fp, ensure_ascii=False, indent=2)
+
+    # JSON-LD数据由相同的OWL数据转换而来，tree数据相同，只输出网络图
+    result = generate_visualization(convert_owl_to_jsonld(owl_data))
+    if result:
+        with open("data/test_jsonld.html", mode="w", encoding="utf-8") as fp:
+            fp.write(render_graph_html(result['graph']))
@@ -4,7 +4,7 @@ import Sidebar from './components/Sidebar';
 import ChatPanel from './components/ChatPanel';
 import Editor from './components/Editor';
 import FileExplorer from './components/FileExplorer';
-import { updateVersion, createVersion, deleteVersion, visualizeData, getVersion } from './services/api';
+import { updateVersion, createVersion, deleteVersion, visualizeData, getVersion, getVersionGraph } from './services/api';
 import { ToastContainer } from 'react-toastify';
 import { showSuccess, showError } from './services/notification';
 import 'react-toastify/dist/ReactToastify.css';
@@ -25,7 +25,7 @@ interface OntologyVersion {
   name: string;
   description: string;
   ontology_data?: string;
-  graph?: string;
+  graph?: any;
   tree?: string;
   table?: string;
   created_at?: string;
@@ -76,13 +76,14 @@ function App() {
     } else {
       // 如果没有可视化数据，调用API获取完整版本信息
       try {
-        const fullVersion = await getVersion(version.id!);
+        // 版本详情不包含网络图数据，单独获取
+        const [fullVersion, graph] = await Promise.all([getVersion(version.id!), getVersionGraph(version.id!)]);
         setSelectedVersion(fullVersion);
         // 使用统一的ontology_data字段设置编辑器内容
         setFileContent(fullVersion.ontology_data || '');
         // 设置可视化数据
         setVisualizationData({
-          graph: fullVersion.graph,
+          graph,
           tree: fullVersion.tree,
           table: fullVersion.table
         });
@@ -208,24 +208,27 @@ const FileExplorer = forwardRef(({
     }
     
     try {
-      // 调用API获取两种格式的数据
-      const response = await api.downloadVersion(version.id);
+      // 分别下载OWL和JSON-LD文件，只传输所需格式且支持压缩
+      const [owlFile, jsonldFile] = await Promise.all([
+        api.downloadVersionFile(version.id, 'owl'),
+        api.downloadVersionFile(version.id, 'jsonld')
+      ]);
       
       // 创建ZIP文件
       const zip = new JSZip();
       
       // 添加OWL文件
-      zip.file(`${response.name}.owl`, response.owl_data);
+      zip.file(`${version.name}.owl`, owlFile);
       
       // 添加JSON-LD文件
-      zip.file(`${response.name}.jsonld`, response.jsonld_data);
+      zip.file(`${version.name}.jsonld`, jsonldFile);
       
       // 生成ZIP文件并下载
       const content = await zip.generateAsync({ type: 'blob' });
       const url = window.URL.createObjectURL(content);
       const link = document.createElement('a');
       link.href = url;
-      link.download = `${response.name}.zip`;
+      link.download = `${version.name}.zip`;
       document.body.appendChild(link);
       link.click();
       document.body.removeChild(link);
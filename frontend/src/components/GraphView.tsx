@@ -1,23 +1,76 @@
-import React, { useEffect, useRef } from 'react';
+import React, { useEffect, useMemo, useRef } from 'react';
+import { Network } from 'vis-network/standalone';
+
+// 后端返回的紧凑网络图数据：节点和边只包含id、label、title和分组，样式按分组保存在styles中，
+// 边的from/to为节点在nodes数组中的下标
+interface GraphData {
+  version: number;
+  options?: Record<string, any>;
+  styles: Record<string, Record<string, any>>;
+  nodes: Array<{ id: string; label?: string; title?: string; group?: string }>;
+  edges: Array<{ from: number; to: number; title?: string; group?: string }>;
+}
 
 interface GraphViewProps {
-  data: string; // HTML string
+  data: GraphData | string; // 紧凑网络图数据，或早期版本保存的HTML字符串
 }
 
+// 解析网络图数据，HTML字符串返回null
+const parseGraphData = (data: GraphData | string): GraphData | null => {
+  if (typeof data !== 'string') {
+    return data;
+  }
+  try {
+    const parsed = JSON.parse(data);
+    return parsed && Array.isArray(parsed.nodes) ? parsed : null;
+  } catch {
+    return null;
+  }
+};
+
+// 合并分组样式，节点自身的属性优先
+const applyStyles = <T extends { group?: string }>(items: T[], styles: GraphData['styles']) =>
+  items.map(({ group, ...item }) => ({ ...(group ? styles[group] : undefined), ...item }));
+
 const GraphView: React.FC<GraphViewProps> = ({ data }) => {
+  const containerRef = useRef<HTMLDivElement>(null);
   const iframeRef = useRef<HTMLIFrameElement>(null);
+  const graphData = useMemo(() => parseGraphData(data), [data]);
 
   useEffect(() => {
-    if (iframeRef.current && data) {
-      const iframe = iframeRef.current;
-      const iframeDoc = iframe.contentDocument || iframe.contentWindow?.document;
-      if (iframeDoc) {
-        iframeDoc.open();
-        iframeDoc.write(data);
-        iframeDoc.close();
-      }
+    if (!graphData || !containerRef.current) {
+      return;
     }
-  }, [data]);
+    const network = new Network(
+      containerRef.current,
+      {
+        nodes: applyStyles(graphData.nodes, graphData.styles),
+        edges: applyStyles(graphData.edges, graphData.styles).map((edge) => ({
+          ...edge,
+          from: graphData.nodes[edge.from].id,
+          to: graphData.nodes[edge.to].id
+        }))
+      },
+      { ...graphData.options, height: '100%', width: '100%' }
+    );
+    return () => network.destroy();
+  }, [graphData]);
+
+  useEffect(() => {
+    if (graphData || !iframeRef.current || typeof data !== 'string') {
+      return;
+    }
+    const iframeDoc = iframeRef.current.contentDocument || iframeRef.current.contentWindow?.document;
+    if (iframeDoc) {
+      iframeDoc.open();
+      iframeDoc.write(data);
+      iframeDoc.close();
+    }
+  }, [data, graphData]);
+
+  if (graphData) {
+    return <div ref={containerRef} style={{ width: '100%', height: '100%', minHeight: '400px' }} />;
+  }
 
   return (
     <iframe
@@ -28,4 +81,4 @@ const GraphView: React.FC<GraphViewProps> = ({ data }) => {
   );
 };
 
-export default GraphView;
\ No newline at end of file
+export default GraphView;
@@ -66,6 +66,32 @@ export const getVersion = async (id: number): Promise<any> => {
     }
 };
 
+// 获取版本的网络图数据
+export const getVersionGraph = async (id: number): Promise<any> => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/versions/${id}/graph`);
+    const data = await response.json();
+    
+    if (!response.ok) {
+      const errorMessage = data.error || '获取网络图数据失败';
+      showError(errorMessage);
+      throw new Error(errorMessage);
+    }
+    
+    return data;
+  } catch (error: any) {
+      // 检查是否是网络错误
+      if (error instanceof TypeError && error.message.includes('fetch')) {
+        showError('网络错误，请稍后重试');
+      } else if (error.message) {
+        showError(`获取网络图数据失败: ${error.message}`);
+      } else {
+        showError('获取网络图数据失败，请稍后重试');
+      }
+      throw error;
+    }
+};
+
 // 创建新版本
 export const createVersion = async (version: OntologyVersion): Promise<any> => {
   try {
@@ -198,28 +224,24 @@ export const visualizeData = async (data: any): Promise<any> => {
   }
 };
 
-// 下载版本
-export const downloadVersion = async (id: number): Promise<any> => {
+// 下载版本的单一格式文件（owl、jsonld、ttl或nt），服务端分块传输并按需压缩
+export const downloadVersionFile = async (id: number, format: 'owl' | 'jsonld' | 'ttl' | 'nt'): Promise<Blob> => {
   try {
-    const response = await fetch(`${API_BASE_URL}/download/${id}`);
-    const data = await response.json();
-    
+    const response = await fetch(`${API_BASE_URL}/download/${id}?format=${format}`);
+
     if (!response.ok) {
+      const data = await response.json().catch(() => ({}));
       const errorMessage = data.error || '下载版本失败';
       showError(errorMessage);
       throw new Error(errorMessage);
     }
-    
-    return data;
+
+    return await response.blob();
   } catch (error: any) {
     // 检查是否是网络错误
     if (error instanceof TypeError && error.message.includes('fetch')) {
       showError('网络错误，请稍后重试');
-    } else if (error.message) {
-      showError(error.message);
-    } else {
-      showError('操作失败，请稍后重试');
     }
     throw error;
   }
-};
\ No newline at end of file
+};